@@ -2,14 +2,28 @@ import os
 import sys
 import json
 import datetime
-import glob
 import logging
 import yaml
 import re
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple, Set
+from typing import List, Dict, Any, Optional, Tuple, Set, Iterable
 from collections import defaultdict
-import ollama
+
+# Sensor log reader (v2 NDJSON + legacy JSON), per-machine log merging, per-stage
+# sensor metrics and commit-to-session links
+try:
+    import commit_links
+    import log_merger
+    import sensor_log
+    import sensor_metrics
+    from sensor_log import SensorLogReader
+except ImportError:
+    sys.path.insert(0, str(Path(__file__).parent))
+    import commit_links
+    import log_merger
+    import sensor_log
+    import sensor_metrics
+    from sensor_log import SensorLogReader
 
 # --- Configuration & Setup ---
 if Path("/app").exists():
@@ -44,6 +58,8 @@ class ConfigLoader:
         self.host = os.environ.get("OLLAMA_HOST", "http://host.docker.internal:11434")
         self.model = self.config.get("ollama_model", "llama3")
         self.fallback_model = self.config.get("fallback_model")
+        # Browsing this many minutes before a commit is linked to it as research
+        self.commit_lookback_minutes = self.config.get("commit_lookback_minutes", commit_links.LOOKBACK_MINUTES)
 
         
         # Path Resolution
@@ -60,16 +76,29 @@ class ConfigLoader:
 cfg = ConfigLoader()
 JOURNALS_DIR = cfg.journals_dir
 JOURNALS_DIR.mkdir(parents=True, exist_ok=True)
-client = ollama.Client(host=cfg.host)
+class OllamaClient:
+    """
+    ollama.Client created on first use, so Categorizer / TimelineVisualizer
+    can be imported where ollama is not installed (the sensor host's tools).
+    """
+    def __init__(self, host: str):
+        self.host = host
+        self._client = None
+
+    def __getattr__(self, name):
+        if self._client is None:
+            import ollama
+            self._client = ollama.Client(host=self.host)
+        return getattr(self._client, name)
+
+client = OllamaClient(cfg.host)
 
 PROMPT_SYSTEM = """
 あなたはユーザーのデジタルツインとして、日次活動ログを深く分析し、日本語で洞察に満ちた振り返りを書くアシスタントです。
 
 **絶対ルール**:
 1. **ハルシネーション禁止**: ログにないことは絶対に書かない。
-2. **情報の「連鎖」を抽出（最重要）**: 異なるデータソース間の論理的な繋がりを見つけてください。
-   - **調査から実装への流れ**: ブラウザで特定の技術やエラーを調べていた時間と、その後の関連するコード修正（Gitコミット）を繋げてください。
-   - **一貫したプロジェクト進捗**: 複数のアプリ（エディタ、ターミナル、ブラウザ）を跨いだ作業が、一つの成果（コミット）に結びついている様を描写してください。
+2. **情報の「連鎖」（最重要）**: 「調査→実装→コミットの連鎖」は記録から抽出済みの事実です。これを根拠に調査と成果の繋がりを描写し、記載のない繋がりは推測しないでください。
 3. **脱・定型文化（マンネリ防止）**: 
    - 「毎日同じようなアドバイス」を避け、その日特有のデータ（最も長く触れていたファイル、特定の検索クエリ、コミットの質）に焦点を当ててください。
    - 「集中しましょう」「休憩を取りましょう」といった汎用的な言葉ではなく、「今日の〇〇プロジェクトの進捗は、××の理由で加速/停滞していた」といった、その日だけの具体的な分析を行ってください。
@@ -95,9 +124,12 @@ PROMPT_USER = """
 ■ 時間統計:
 {stats_text}
 
-■ Git コミット:
+■ Git コミット（← 作業中のセッションは記録から対応付け済み）:
 {git_text}
 
+■ 調査→実装→コミットの連鎖（記録から抽出済み、共通語で関連を判定）:
+{chains_text}
+
 ■ 昨日のコンテキスト（継続性の確認）:
 {yesterday_context}
 
@@ -200,10 +232,21 @@ class Categorizer:
 
 # --- Core Logic: Visualization ---
 
+BROWSER_APPS = ['floorp.exe', 'chrome.exe', 'msedge.exe', 'firefox.exe', 'brave.exe', 'floorp', 'chrome', 'msedge', 'firefox', 'brave']
+
 class TimelineVisualizer:
-    def __init__(self, timeline_data: List[Dict]):
+    # Blocks shorter than this are absorbed into a preceding work block
+    NOISE_SECONDS = 30
+    # Blocks further apart than this are never merged
+    MAX_MERGE_GAP_SECONDS = 1800
+
+    def __init__(self, timeline_data: Iterable[Dict], noise_seconds: float = NOISE_SECONDS,
+                 max_merge_gap_seconds: float = MAX_MERGE_GAP_SECONDS, categorizer: Optional[Categorizer] = None):
+        # Any iterable of sessions: a v2 log's sessions are streamed through once
         self.raw_timeline = timeline_data
-        self.categorizer = Categorizer()
+        self.noise_seconds = noise_seconds
+        self.max_merge_gap_seconds = max_merge_gap_seconds
+        self.categorizer = categorizer or Categorizer()
         self.processed_blocks = []
         self.stats = defaultdict(int) # Duration by Category
         self.process()
@@ -256,12 +299,12 @@ class TimelineVisualizer:
             next_block = temp_blocks[i]
             
             # Time gap check (Important to prevent hallucination from idle apps)
-            # If there is a gap > 30 minutes, do not merge even if same category
+            # If there is a gap > max_merge_gap_seconds (30 minutes), do not merge even if same category
             try:
                 curr_end = datetime.datetime.fromisoformat(current['end'].replace('Z', '+00:00'))
                 next_start = datetime.datetime.fromisoformat(next_block['start'].replace('Z', '+00:00'))
                 gap_seconds = (next_start - curr_end).total_seconds()
-                is_large_gap = gap_seconds > 1800 # 30 minutes
+                is_large_gap = gap_seconds > self.max_merge_gap_seconds
             except:
                 is_large_gap = False
 
@@ -275,7 +318,7 @@ class TimelineVisualizer:
                 continue
             
             # Merge Condition 2: Noise Smoothing (Next block is short noise)
-            is_noise = next_block['duration'] < 30 # 30 seconds threshold
+            is_noise = next_block['duration'] < self.noise_seconds
             is_compatible = (current['category'] == "💻 Work") and (next_block['category'] != "🎮 Entertainment")
             
             if is_noise and is_compatible and not is_large_gap:
@@ -323,6 +366,9 @@ class TimelineVisualizer:
             lines.append(f"### {b['icon']} **{b['activity']}** ({s_str} - {e_str}) `{duration_min} min`")
             lines.append(f"- **App**: *{b['app']}*")
             lines.append(f"- **Detail**: {title_clean}")
+            for link in b.get('commits', []):
+                research = "".join(f", 調査: {r['title']}" for r in link.get('research', [])[:1])
+                lines.append(f"- **Commit**: `{link.get('hash', '')}` {link.get('message', '')} ({link['repo']}{research})")
             lines.append("") # Blank line to separate entries
 
         return "\n".join(lines)
@@ -351,10 +397,9 @@ class TimelineVisualizer:
         
         # 1. Browser Detection & Topic Extraction (Task 1.1)
         # Prioritize browser detection before general ' - ' split
-        browsers = ['floorp.exe', 'chrome.exe', 'msedge.exe', 'firefox.exe', 'brave.exe', 'floorp', 'chrome', 'msedge', 'firefox', 'brave']
-        is_browser = any(b in app.lower() for b in browsers) or "Browse" in category
+        browsers = BROWSER_APPS
         
-        if is_browser:
+        if self.is_browsing(block):
             # Try to extract topic from title using keywords in categories.yaml
             # Sort categories by priority (Task 1.4 integration)
             sorted_cats = sorted(self.categorizer.rules.items(), key=lambda k_v: k_v[1].get('priority', 999))
@@ -414,6 +459,27 @@ class TimelineVisualizer:
         
         return self.format_section(app_clean.title() if app_clean else "Other", category)
 
+    def is_browsing(self, block: Dict) -> bool:
+        return any(b in block.get('app', '').lower() for b in BROWSER_APPS) or "Browse" in block.get('category', '')
+
+    def is_editing(self, block: Dict) -> bool:
+        """Work blocks outside the browser (editors, terminals): where commits are implemented."""
+        return block.get('category') == "💻 Work" and not self.is_browsing(block)
+
+    def link_commits(self, git_activity: List[Dict]) -> List[Dict]:
+        """
+        Attributes each commit to the block active when it was made and the
+        browsing before it (see commit_links). Linked blocks get "commits".
+        """
+        index = commit_links.SessionIndex.from_blocks(self.processed_blocks)
+        return commit_links.attribute_commits(index, git_activity, self.extract_project, self.is_browsing,
+                                              lookback_minutes=cfg.commit_lookback_minutes)
+
+    def extract_chains(self, links: List[Dict]) -> List[Dict]:
+        """Research -> editor session -> commit chains over the processed blocks (see commit_links)."""
+        return commit_links.extract_chains(self.processed_blocks, links, self.extract_project, self.is_browsing,
+                                           self.is_editing, lookback_minutes=cfg.commit_lookback_minutes)
+
     def format_section(self, name: str, category: str) -> str:
         """Helper to format section name with consistent emoji (Task 1.3)"""
         # Map category label (e.g. "💻 Work") back to key (e.g. "work")
@@ -566,17 +632,46 @@ class TimelineVisualizer:
 
 # --- Main Pipeline ---
 
+def format_chains(chains: List[Dict]) -> str:
+    """One line per chain: 09:10 調査「topic」→ 09:20-10:00 project 編集「title」→ 09:50 commit hash「message」(共通: ...)"""
+    jst = datetime.timezone(datetime.timedelta(hours=9))
+    def hhmm(iso_str):
+        dt = datetime.datetime.fromisoformat(iso_str)
+        if dt.tzinfo is not None:
+            dt = dt.astimezone(jst)
+        return dt.strftime("%H:%M")
+
+    lines = []
+    for chain in chains:
+        topic, session, commit = chain["topic"], chain["session"], chain["commit"]
+        ts = commit.get("timestamp", "")
+        time_str = ts.split(" ")[1][:5] if " " in ts else ""
+        lines.append(
+            f"{hhmm(topic['start'])} 調査「{topic['title']}」"
+            f" → {hhmm(session['start'])}-{hhmm(session['end'])} {chain['project']} 編集「{session['title']}」"
+            f" → {time_str} commit {commit.get('hash', '')}「{commit.get('message', '')}」"
+            f" (共通: {', '.join(chain['shared'])})"
+        )
+    return "\n".join(lines)
+
 def process_logs(log_file: Path):
     logger.info(f"Processing {log_file}...")
     
-    with open(log_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    reader = SensorLogReader(log_file)
+    logger.info(f"Log format: v{reader.version}")
         
-    date_str = data.get("date", str(datetime.date.today()))
+    date_str = reader.date or str(datetime.date.today())
     safe_date = date_str.split("T")[0]
     
+    # 1. Visualize & Categorize (sessions are streamed; git/status records are
+    # collected by the reader on the same pass)
+    viz = TimelineVisualizer(reader.sessions())
+    
     # 0. Extract Git Activity (Task 2.1)
-    git_activity = data.get("git_activity", [])
+    git_activity = reader.git_activity
+    links = viz.link_commits(git_activity) if git_activity else []
+    # Research -> implementation -> commit chains, as compact facts for the prompt
+    chains_text = format_chains(viz.extract_chains(links)) or "(No research-to-commit chains found)"
     git_text = ""       # For LLM prompt
     git_md_footer = ""   # For markdown display at bottom
     
@@ -596,9 +691,22 @@ def process_logs(log_file: Path):
                     msg = c.get("message", "")
                     ts = c.get("timestamp", "")
                     time_str = ts.split(" ")[1][:5] if " " in ts else ""
-                    
-                    git_lines_for_llm.append(f"[{repo_name}] {msg} ({time_str})")
                     git_footer_lines.append(f"- {msg} ({time_str})")
+
+        # Commits in time order, each with the session it was made in,
+        # precomputed so the model does not have to infer it
+        for link in links:
+            msg = link.get("message", "")
+            ts = link.get("timestamp", "")
+            time_str = ts.split(" ")[1][:5] if " " in ts else ""
+            # Diff size (recorded by the sensor's --numstat pass) hints at the weight of the change
+            stat_str = ""
+            if "files_changed" in link:
+                stat_str = f", {link['files_changed']} files +{link.get('insertions', 0)}/-{link.get('deletions', 0)}"
+            line = f"[{link['repo']}] {msg} ({time_str}{stat_str})"
+            if link["session"] is not None:
+                line += f" ← 作業中: {link['project']} / {link['session']['activity']}「{link['session']['title']}」"
+            git_lines_for_llm.append(line)
         
         git_text = "\n".join(git_lines_for_llm) if git_lines_for_llm else "(No commits today)"
         git_md_footer = "\n".join(git_footer_lines)
@@ -606,10 +714,6 @@ def process_logs(log_file: Path):
         git_text = "(No git activity recorded)"
         git_md_footer = "> [!NOTE] 本日の Git コミットはありません。"
 
-    # 1. Visualize & Categorize
-    timeline_raw = data.get("timeline", [])
-    viz = TimelineVisualizer(timeline_raw)
-    
     # 2. Get Yesterday's Journal (for context)
     yesterday_context = ""
     try:
@@ -707,7 +811,7 @@ def process_logs(log_file: Path):
         rag_context = "(RAG unavailable)"
     
     # 0.1 Sensor Status & Diagnostics (Part 3)
-    status_info = data.get("status", {})
+    status_info = reader.status
     diagnostics = status_info.get("diagnostics", [])
     diag_md = ""
     if diagnostics:
@@ -716,6 +820,21 @@ def process_logs(log_file: Path):
             diag_lines.append(f"> - {diag}")
         diag_md = "\n".join(diag_lines) + "\n"
     
+    # Sensor cost compared with recent runs (status["stages"] vs data/logs/sensor_metrics.ndjson)
+    stages = status_info.get("stages")
+    if stages:
+        try:
+            past_runs = sensor_metrics.load_metrics(LOGS_DIR, before=reader.date)
+            regressions = sensor_metrics.find_regressions(stages, past_runs)
+        except Exception as e:
+            logger.warning(f"Sensor metrics comparison failed: {e}")
+            regressions = []
+        if regressions:
+            perf_lines = ["\n> [!WARNING]", "> **センサー性能の変化:** 直近の実行と比べて以下の処理段階に異常があります。"]
+            for finding in regressions:
+                perf_lines.append(f"> - {finding}")
+            diag_md += "\n".join(perf_lines) + "\n"
+    
     # 4. LLM Summary with context
     timeline_text = viz.get_text_for_llm()
     stats_text = viz.generate_stats_table()
@@ -742,6 +861,7 @@ def process_logs(log_file: Path):
                 timeline_text=timeline_text,
                 stats_text=stats_text,
                 git_text=git_text,
+                chains_text=chains_text,
                 yesterday_context=yesterday_context,
                 voice_context=voice_context,
                 rag_context=rag_context
@@ -770,6 +890,7 @@ def process_logs(log_file: Path):
                         timeline_text=timeline_text,
                         stats_text=stats_text,
                         git_text=git_text,
+                        chains_text=chains_text,
                         yesterday_context=yesterday_context,
                         voice_context=voice_context,
                         rag_context=rag_context
@@ -843,7 +964,7 @@ tags: [daily, digital_twin]
             logger.warning(f"Failed to ingest insights to memory: {e}")
 
     # Rename processed file (Task 3: Robustness)
-    new_name = log_file.with_suffix('.json.processed')
+    new_name = log_file.with_name(log_file.name + ".processed")
     try:
         if new_name.exists():
             new_name.unlink()
@@ -861,10 +982,14 @@ def main():
         else:
             logger.error(f"File not found: {log_path}")
     else:
-        # Auto-process logs
-        logs = glob.glob(str(LOGS_DIR / "sensor_log_*.json"))
+        # Auto-process logs; a day logged on several machines becomes one merged log
+        try:
+            logs = log_merger.merge_pending(LOGS_DIR)
+        except Exception as e:
+            logger.warning(f"Merging per-machine logs failed: {e}")
+            logs = sensor_log.find_logs(LOGS_DIR)
         for log in logs:
-            process_logs(Path(log))
+            process_logs(log)
 
 if __name__ == "__main__":
     main()
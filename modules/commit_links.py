@@ -0,0 +1,278 @@
+"""
+Links git commits to the timeline: each commit is attributed to the session
+(and project) active when it was made, plus the browsing of the minutes
+before it, so the journal prompt receives the links instead of asking the
+model to infer them.
+
+SessionIndex is a sorted-interval index over one day's sessions, which may
+overlap (merged multi-machine logs, absorbed noise). "Active at t" is
+precomputed for every elementary segment between session boundaries in one
+sweep, so each lookup is a single binary search however long the sessions
+are. "Overlapping [lo, hi)" bisects the sorted starts and the running maximum
+of end times, then filters the sessions in between.
+
+    index = SessionIndex.from_blocks(viz.processed_blocks)
+    links = attribute_commits(index, git_activity, project_of, is_browsing)
+    # each block gains "commits": [link, ...]
+
+extract_chains turns the links into research-to-implementation chains
+(browsing topic -> editor session on the commit's project -> commit) in one
+time-ordered sweep, scored by the keywords the topic shares with the commit
+and session.
+"""
+import re
+import heapq
+import bisect
+import datetime
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+# Browsing within this many minutes before a commit counts as its research
+LOOKBACK_MINUTES = 30
+# A commit made this soon after a session ended (terminal, git GUI) belongs to it
+GAP_TOLERANCE_SECONDS = 300
+# Research titles kept per commit, by time spent within the lookback window
+MAX_RESEARCH = 3
+# Shared keywords a browsing topic needs to join a chain
+MIN_SHARED_KEYWORDS = 1
+
+# Words that say nothing about the topic: tool names, title decorations,
+# conventional-commit prefixes and common English words
+STOPWORDS = {
+    "google", "chrome", "microsoft", "edge", "firefox", "floorp", "brave", "search",
+    "visual", "studio", "code", "antigravity", "github", "exe",
+    "feat", "fix", "chore", "refactor", "docs", "test", "tests", "wip", "add", "update", "merge",
+    "the", "and", "for", "with", "from", "into", "how", "what", "not", "use", "new",
+}
+
+def parse_time(ts: str) -> Optional[float]:
+    """Epoch seconds of an ISO timestamp or git's "2026-02-23 10:00:00 +0900"."""
+    if not ts:
+        return None
+    try:
+        return datetime.datetime.strptime(ts, "%Y-%m-%d %H:%M:%S %z").timestamp()
+    except ValueError:
+        pass
+    try:
+        dt = datetime.datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return dt.timestamp()
+
+class SessionIndex:
+    def __init__(self, sessions: List[Dict[str, Any]], starts: List[float], ends: List[float]):
+        """sessions/starts/ends are parallel lists sorted by start; use from_blocks."""
+        self.sessions = sessions
+        self.starts = starts
+        self.ends = ends
+        # max_ends[i] = max(ends[:i + 1]): non-decreasing, so it can be bisected
+        self.max_ends = []
+        running = float("-inf")
+        for end in ends:
+            running = max(running, end)
+            self.max_ends.append(running)
+        self._build_segments()
+
+    def _build_segments(self):
+        """
+        Sweeps the sorted session boundaries once. For boundary k, at_point[k]
+        is the session active exactly at points[k] and in_gap[k] the one active
+        strictly between points[k] and points[k + 1] (None: nothing spans it).
+        The active session is the spanning one that started last, i.e. the
+        highest index; a max-heap with lazy deletion tracks it.
+        """
+        self.points = sorted(set(self.starts) | set(self.ends))
+        self.at_point: List[Optional[int]] = []
+        self.in_gap: List[Optional[int]] = []
+        heap: List[int] = []
+        n = 0
+        for point in self.points:
+            while n < len(self.starts) and self.starts[n] <= point:
+                heapq.heappush(heap, -n)
+                n += 1
+            # Ended before this point: gone for good, since points increase
+            while heap and self.ends[-heap[0]] < point:
+                heapq.heappop(heap)
+            self.at_point.append(-heap[0] if heap else None)
+            # Ending exactly here: spans the point but not the gap after it
+            while heap and self.ends[-heap[0]] <= point:
+                heapq.heappop(heap)
+            self.in_gap.append(-heap[0] if heap else None)
+
+    @classmethod
+    def from_blocks(cls, blocks: Iterable[Dict[str, Any]], start_key: str = "start",
+                    end_key: str = "end") -> "SessionIndex":
+        """Indexes blocks (or sensor sessions with start_key="start_time") that have parseable spans."""
+        spans = []
+        for block in blocks:
+            start = parse_time(block.get(start_key))
+            end = parse_time(block.get(end_key))
+            if start is not None:
+                spans.append((start, max(start, end if end is not None else start), block))
+        # Sessions arrive sorted; sort() is linear on sorted input
+        spans.sort(key=lambda span: span[0])
+        return cls([s[2] for s in spans], [s[0] for s in spans], [s[1] for s in spans])
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def active_at(self, ts: float, tolerance: float = 0.0) -> Optional[int]:
+        """
+        Index of the session active at ts: among the sessions spanning ts, the
+        one that started last. Failing that, the session that ended last
+        within tolerance seconds before ts.
+        """
+        k = bisect.bisect_right(self.points, ts) - 1
+        if k >= 0:
+            active = self.at_point[k] if self.points[k] == ts else self.in_gap[k]
+            if active is not None:
+                return active
+        i = bisect.bisect_right(self.starts, ts) - 1
+        if i >= 0 and self.max_ends[i] >= ts - tolerance:
+            # Nothing spans ts: the first session reaching the running maximum ended last
+            return bisect.bisect_left(self.max_ends, self.max_ends[i])
+        return None
+
+    def overlapping(self, lo: float, hi: float) -> List[int]:
+        """
+        Indices of the sessions overlapping [lo, hi), in start order. Sessions
+        between the first one whose running max end passes lo and the last one
+        starting before hi are checked, so a long early session widens the scan.
+        """
+        first = bisect.bisect_right(self.max_ends, lo)
+        last = bisect.bisect_left(self.starts, hi)
+        return [k for k in range(first, last) if self.ends[k] > lo]
+
+def iter_commits(git_activity: Iterable[Dict[str, Any]]) -> Iterable[Dict[str, Any]]:
+    """Commits of all repositories, each with its "repo" name."""
+    for repo_data in git_activity:
+        for commit in repo_data.get("commits", []):
+            yield dict(commit, repo=repo_data.get("repo", "Unknown"))
+
+def attribute_commits(index: SessionIndex, git_activity: Iterable[Dict[str, Any]],
+                      project_of: Callable[[Dict[str, Any]], str],
+                      is_browsing: Callable[[Dict[str, Any]], bool],
+                      lookback_minutes: float = LOOKBACK_MINUTES,
+                      gap_tolerance: float = GAP_TOLERANCE_SECONDS) -> List[Dict[str, Any]]:
+    """
+    One link per commit, oldest first: the commit's fields and "repo", plus
+        "session": block or None, "project": str or None,
+        "research": [{"title", "seconds"}, ...]
+    Each attributed block gets the link appended to its "commits" list.
+    """
+    links = []
+    for commit in iter_commits(git_activity):
+        ts = parse_time(commit.get("timestamp", ""))
+        link = dict(commit, session=None, project=None, research=[], _ts=ts)
+        if ts is not None:
+            i = index.active_at(ts, gap_tolerance)
+            if i is not None:
+                block = index.sessions[i]
+                link["session"] = block
+                link["project"] = project_of(block)
+                block.setdefault("commits", []).append(link)
+            link["research"] = research_before(index, ts, is_browsing, lookback_minutes)
+        links.append(link)
+
+    links.sort(key=lambda link: (link["_ts"] is None, link["_ts"] or 0))
+    for link in links:
+        del link["_ts"]
+    return links
+
+def research_before(index: SessionIndex, ts: float, is_browsing: Callable[[Dict[str, Any]], bool],
+                    lookback_minutes: float = LOOKBACK_MINUTES) -> List[Dict[str, Any]]:
+    """Browsing titles within the lookback window before ts, most time spent first."""
+    lo = ts - lookback_minutes * 60
+    seconds: Dict[str, float] = {}
+    for k in index.overlapping(lo, ts):
+        block = index.sessions[k]
+        title = block.get("title")
+        if title and is_browsing(block):
+            overlap = min(index.ends[k], ts) - max(index.starts[k], lo)
+            seconds[title] = seconds.get(title, 0.0) + overlap
+    ranked = sorted(seconds.items(), key=lambda item: -item[1])[:MAX_RESEARCH]
+    return [{"title": title, "seconds": round(s)} for title, s in ranked]
+
+def keywords(text: str) -> Set[str]:
+    """Lowercased words of a title or message (split on "_" too), minus STOPWORDS."""
+    words = re.findall(r"[^\W_]+", (text or "").lower())
+    return {w for w in words if (len(w) >= 3 or not w.isascii()) and not w.isdigit() and w not in STOPWORDS}
+
+def same_project(project: str, link: Dict[str, Any]) -> bool:
+    """Whether a block's project is the commit's: its attributed project, or one naming its repo."""
+    if project and project == link.get("project"):
+        return True
+    repo = (link.get("repo") or "").lower()
+    return bool(repo) and repo != "unknown" and repo in (project or "").lower()
+
+def extract_chains(blocks: Iterable[Dict[str, Any]], links: List[Dict[str, Any]],
+                   project_of: Callable[[Dict[str, Any]], str],
+                   is_browsing: Callable[[Dict[str, Any]], bool],
+                   is_editing: Callable[[Dict[str, Any]], bool],
+                   lookback_minutes: float = LOOKBACK_MINUTES) -> List[Dict[str, Any]]:
+    """
+    One chain per commit that has related browsing, in commit order:
+        {"topic": browse block, "session": editor block, "commit": link,
+         "project": str, "shared": [keyword, ...], "score": int}
+
+    Blocks (sorted by start) and commits (sorted by time) are merged in a
+    single sweep. Browse and editor blocks that ended more than the lookback
+    before the commit are dropped from two deques as the sweep advances;
+    blocks that are neither (music, chat) never enter them. For each commit
+    the editor session is the recent editor block on the commit's project
+    (see same_project) sharing most keywords with the commit (ties: the
+    attributed one, then the latest to end); commits without one get no
+    chain. The topic is the recent browsing, started before that session
+    ended, sharing most keywords with the commit message, repo, project and
+    session title.
+    """
+    window = lookback_minutes * 60
+    index = SessionIndex.from_blocks(blocks)
+    spans = list(zip(index.starts, index.ends, index.sessions))
+    commits = sorted((ts, n, link) for n, link in enumerate(links)
+                     for ts in [parse_time(link.get("timestamp", ""))] if ts is not None)
+
+    browsing: deque = deque()
+    editing: deque = deque()
+    chains = []
+    b = 0
+    for ts, _, link in commits:
+        while b < len(spans) and spans[b][0] <= ts:
+            start, end, block = spans[b]
+            if is_browsing(block):
+                browsing.append((start, end, block, keywords(block.get("title", ""))))
+            elif is_editing(block):
+                editing.append((start, end, block, keywords(block.get("title", "")), project_of(block)))
+            b += 1
+        for recent in (browsing, editing):
+            # Commits come in time order, so an expired block never returns; a
+            # long block can shield later expired ones, which the checks below skip
+            while recent and recent[0][1] < ts - window:
+                recent.popleft()
+
+        commit_words = keywords(link.get("message", "")) | keywords(link.get("repo", ""))
+        attributed = link.get("session")
+        candidates = [(len(words & commit_words), block is attributed, end, block, project)
+                      for start, end, block, words, project in editing
+                      if end >= ts - window and same_project(project, link)]
+        if not candidates:
+            continue
+        _, _, _, session, project = max(candidates, key=lambda c: c[:3])
+        session_end = parse_time(session.get("end")) or ts
+        context = commit_words | keywords(session.get("title", "")) | keywords(project)
+
+        best = None
+        for start, end, block, words in browsing:
+            if end < ts - window or start > session_end:
+                continue
+            shared = words & context
+            if len(shared) >= MIN_SHARED_KEYWORDS:
+                rank = (len(shared), end - start)
+                if best is None or rank > best[0]:
+                    best = (rank, block, shared)
+        if best is not None:
+            chains.append({"topic": best[1], "session": session, "commit": link, "project": project,
+                           "shared": sorted(best[2]), "score": len(best[2])})
+    return chains
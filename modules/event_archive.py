@@ -0,0 +1,197 @@
+"""
+Per-day archive of the sensor's raw inputs, kept after the cache has been pruned:
+
+    data/archive/YYYYMMDD/          (JST day)
+        windows.npy         WINDOW_DTYPE records, sorted by start: the raw
+                            ActivityWatch events, before clean_window_events
+        history.npy         HISTORY_DTYPE records, sorted by timestamp
+        strings.npy         uint8, every distinct string UTF-8 encoded back to back
+        string_offsets.npy  int64, string i is strings[offsets[i]:offsets[i + 1]]
+
+Records are fixed width (timestamps as epoch microseconds, text as ids into
+the day's string table), so every file is opened with np.load(mmap_mode="r")
+and a day is re-cleaned / re-fused / re-sessionized without ActivityWatch or
+the browser databases (see sensor.replay_day). Changes to the noise filter
+therefore apply to archived days as well.
+"""
+import os
+import shutil
+import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    import event_columns
+    from event_columns import EventColumns, StringTable
+except ImportError:
+    import sys
+    sys.path.insert(0, str(Path(__file__).parent))
+    import event_columns
+    from event_columns import EventColumns, StringTable
+
+JST = datetime.timezone(datetime.timedelta(hours=9))
+
+WINDOW_DTYPE = np.dtype([
+    ("start", "<i8"),       # epoch microseconds (UTC)
+    ("duration", "<f8"),    # seconds
+    ("app", "<i4"),
+    ("title", "<i4"),
+])
+HISTORY_DTYPE = np.dtype([
+    ("timestamp", "<i8"),   # epoch microseconds (UTC)
+    ("url", "<i4"),
+    ("title", "<i4"),
+    ("source", "<i4"),
+])
+
+FILES = ("windows.npy", "history.npy", "strings.npy", "string_offsets.npy")
+
+def jst_day(us: int) -> datetime.date:
+    return datetime.datetime.fromtimestamp(us / 1_000_000, JST).date()
+
+class DayArchive:
+    """One archived day, memory-mapped."""
+    def __init__(self, path: Path, day: datetime.date):
+        self.path = path
+        self.day = day
+        self.windows = np.load(path / "windows.npy", mmap_mode="r")
+        self.history = np.load(path / "history.npy", mmap_mode="r")
+        self._blob = np.load(path / "strings.npy", mmap_mode="r")
+        self._offsets = np.load(path / "string_offsets.npy", mmap_mode="r")
+        self._strings: Optional[StringTable] = None
+
+    @property
+    def strings(self) -> StringTable:
+        """Decoded on first use."""
+        if self._strings is None:
+            blob = self._blob.tobytes()
+            offsets = self._offsets.tolist()
+            self._strings = StringTable.from_values(
+                [blob[lo:hi].decode("utf-8") for lo, hi in zip(offsets[:-1], offsets[1:])]
+            )
+        return self._strings
+
+    def window_events(self) -> List[Dict]:
+        """The day's raw window events, shaped like ActivityWatch returns them."""
+        w = self.windows
+        columns = EventColumns(np.array(w["start"]), np.array(w["duration"]), np.array(w["app"]),
+                               np.array(w["title"]), strings=self.strings)
+        return [{"timestamp": e["timestamp"], "duration": e["duration"],
+                 "data": {"app": e["app"], "title": e["title"]}}
+                for e in columns.to_events()]
+
+    def history_items(self) -> List[Dict]:
+        s = self.strings
+        h = self.history
+        return [{"timestamp": ts, "url": s[url], "title": s[title], "source": s[source]}
+                for ts, url, title, source in zip(
+                    event_columns.format_iso_column(np.array(h["timestamp"])), h["url"].tolist(),
+                    h["title"].tolist(), h["source"].tolist())]
+
+class EventArchive:
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def day_path(self, day: datetime.date) -> Path:
+        return self.root / day.strftime("%Y%m%d")
+
+    def has_day(self, day: datetime.date) -> bool:
+        return (self.day_path(day) / FILES[0]).exists()
+
+    def days(self) -> List[datetime.date]:
+        """Archived days, oldest first."""
+        if not self.root.exists():
+            return []
+        found = []
+        for path in self.root.iterdir():
+            try:
+                day = datetime.datetime.strptime(path.name, "%Y%m%d").date()
+            except ValueError:
+                continue
+            if self.has_day(day):
+                found.append(day)
+        return sorted(found)
+
+    def load_day(self, day: datetime.date) -> Optional[DayArchive]:
+        if not self.has_day(day):
+            return None
+        return DayArchive(self.day_path(day), day)
+
+    def write_day(self, day: datetime.date, window_events: List[Dict], history: List[Dict]):
+        """
+        Replaces the day's archive with raw AW window events and history
+        items. The files are written to a sibling directory that is swapped
+        in afterwards, so readers never see a mix.
+        """
+        strings = StringTable()
+        flat = [{"timestamp": e["timestamp"], "duration": e.get("duration", 0),
+                 "app": e.get("data", {}).get("app", ""), "title": e.get("data", {}).get("title", "")}
+                for e in window_events]
+        windows = EventColumns.from_events(flat, strings).sorted()
+        win = np.empty(len(windows), dtype=WINDOW_DTYPE)
+        win["start"], win["duration"] = windows.start, windows.duration
+        win["app"], win["title"] = windows.app, windows.title
+
+        hist = np.empty(len(history), dtype=HISTORY_DTYPE)
+        hist["timestamp"] = event_columns.parse_iso_column([h["timestamp"] for h in history])
+        hist["url"] = strings.encode(h["url"] for h in history)
+        hist["title"] = strings.encode(h.get("title") or "" for h in history)
+        hist["source"] = strings.encode(h.get("source", "") for h in history)
+        hist = hist[np.argsort(hist["timestamp"], kind="stable")]
+
+        encoded = [v.encode("utf-8") for v in strings.values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+        final = self.day_path(day)
+        tmp = final.with_name(final.name + ".tmp")
+        old = final.with_name(final.name + ".old")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        for name, array in zip(FILES, (win, hist, blob, offsets)):
+            np.save(tmp / name, array)
+        if final.exists():
+            shutil.rmtree(old, ignore_errors=True)
+            os.replace(final, old)
+        os.replace(tmp, final)
+        shutil.rmtree(old, ignore_errors=True)
+
+    def update(self, window_events: List[Dict], history: List[Dict],
+               start: datetime.datetime, end: datetime.datetime):
+        """
+        Archives a freshly collected range: for every JST day overlapping
+        [start, end), archived events starting inside the range are replaced
+        by the new ones that start inside it; the rest of the day is kept.
+        """
+        start_us = event_columns.to_epoch_us(start.isoformat())
+        end_us = event_columns.to_epoch_us(end.isoformat())
+
+        def by_day(items):
+            grouped = {}
+            for item in items:
+                ts = event_columns.to_epoch_us(item["timestamp"])
+                if start_us <= ts < end_us:
+                    grouped.setdefault(jst_day(ts), []).append(item)
+            return grouped
+
+        new_windows, new_history = by_day(window_events), by_day(history)
+
+        def outside(items):
+            return [i for i in items if not start_us <= event_columns.to_epoch_us(i["timestamp"]) < end_us]
+
+        day = start.astimezone(JST).date()
+        # end is exclusive: a range ending at midnight does not touch the next day
+        last_day = (end - datetime.timedelta(microseconds=1)).astimezone(JST).date()
+        while day <= last_day:
+            windows, hist = new_windows.get(day, []), new_history.get(day, [])
+            archived = self.load_day(day)
+            if archived is not None:
+                windows = outside(archived.window_events()) + windows
+                hist = outside(archived.history_items()) + hist
+                del archived  # Release the mapping before the directory is replaced
+            if windows or hist:
+                self.write_day(day, windows, hist)
+            day += datetime.timedelta(days=1)
@@ -0,0 +1,363 @@
+"""
+Columnar event representation for the sensor pipeline.
+
+Window events and sessions are held as parallel NumPy arrays instead of
+lists of dicts:
+    start     int64    epoch microseconds (UTC), parsed once at ingest
+    duration  float64  seconds
+    app/title int32    ids into a shared StringTable (dictionary encoding)
+    url       int32    id of the attached browser URL, -1 if none
+
+Dicts and ISO strings are only produced at the output boundary
+(EventColumns.to_events / Session.to_dict).
+
+Sessionization runs as composable generator stages over chunks of events,
+each holding a bounded amount of state (the open session, a two-session
+stack), so a stream of any length is processed in one pass:
+
+    chunks = iter_chunks(events.sorted())
+    sessions = iter_merged_interruptions(iter_without_noise(iter_sessions(chunks)))
+    timeline = [s.to_dict() for s in sessions]
+"""
+import datetime
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+try:
+    from heavy_hitters import CAPACITY_FACTOR, TOP_K, SpaceSaving
+except ImportError:
+    import sys
+    from pathlib import Path
+    sys.path.insert(0, str(Path(__file__).parent))
+    from heavy_hitters import CAPACITY_FACTOR, TOP_K, SpaceSaving
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+NO_ID = -1
+# Events per chunk handed from one stage to the next
+CHUNK_EVENTS = 65536
+
+def to_epoch_us(iso_str: str) -> int:
+    """ISO timestamp -> epoch microseconds. Naive values are treated as UTC."""
+    dt = datetime.datetime.fromisoformat(iso_str.replace('Z', '+00:00'))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    delta = dt - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+def from_epoch_us(us: int) -> str:
+    """Epoch microseconds -> ISO timestamp (UTC)."""
+    return (EPOCH + datetime.timedelta(microseconds=int(us))).isoformat()
+
+UTC_SUFFIXES = ("+00:00", "Z")
+
+def parse_iso_column(values: List[str]) -> np.ndarray:
+    """
+    ISO timestamps -> int64 epoch microseconds. UTC timestamps (what AW
+    returns) are converted by NumPy in one call; anything else falls back to
+    to_epoch_us per value.
+    """
+    if all(v.endswith(UTC_SUFFIXES) for v in values):
+        naive = [v[:-1] if v.endswith("Z") else v[:-6] for v in values]
+        try:
+            return np.array(naive, dtype="datetime64[us]").astype(np.int64)
+        except ValueError:
+            pass
+    return np.fromiter((to_epoch_us(v) for v in values), dtype=np.int64, count=len(values))
+
+def format_iso_column(us: np.ndarray) -> List[str]:
+    """
+    int64 epoch microseconds -> ISO strings identical to datetime.isoformat()
+    in UTC (microseconds omitted when zero).
+    """
+    dt = us.astype("datetime64[us]")
+    with_us = np.datetime_as_string(dt, unit="us")
+    whole = np.datetime_as_string(dt, unit="s")
+    return [v + "+00:00" for v in np.where(us % 1_000_000 == 0, whole, with_us).tolist()]
+
+class StringTable:
+    """Dictionary encoding: each distinct string gets a dense int id."""
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    @classmethod
+    def from_values(cls, values: List[str]) -> "StringTable":
+        """Table whose ids are the positions in values (which must be distinct)."""
+        table = cls()
+        table.values = list(values)
+        table.ids = {v: i for i, v in enumerate(table.values)}
+        return table
+
+    def intern(self, value: str) -> int:
+        idx = self.ids.get(value)
+        if idx is None:
+            idx = len(self.values)
+            self.ids[value] = idx
+            self.values.append(value)
+        return idx
+
+    def encode(self, values: Iterable[str]) -> np.ndarray:
+        return np.fromiter((self.intern(v) for v in values), dtype=np.int32)
+
+    def __getitem__(self, idx: int) -> str:
+        return self.values[idx]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+class EventColumns:
+    """Window (or fused) events as columns sharing one StringTable."""
+    def __init__(self, start: np.ndarray, duration: np.ndarray, app: np.ndarray,
+                 title: np.ndarray, url: Optional[np.ndarray] = None,
+                 strings: Optional[StringTable] = None):
+        self.start = start
+        self.duration = duration
+        self.app = app
+        self.title = title
+        self.url = url if url is not None else np.full(len(start), NO_ID, dtype=np.int32)
+        self.strings = strings if strings is not None else StringTable()
+
+    @classmethod
+    def from_events(cls, events: List[Dict], strings: Optional[StringTable] = None) -> "EventColumns":
+        """
+        Ingest boundary: parses each timestamp exactly once. The first detail
+        URL of an event (fuse_streams attaches at most one) becomes its url.
+        """
+        strings = strings if strings is not None else StringTable()
+        n = len(events)
+        start = parse_iso_column([e["timestamp"] for e in events])
+        duration = np.fromiter((e.get("duration", 0) for e in events), dtype=np.float64, count=n)
+        app = strings.encode(e["app"] for e in events)
+        title = strings.encode(e["title"] for e in events)
+        url = np.fromiter(
+            (strings.intern(e["details"][0]["url"]) if e.get("details") else NO_ID for e in events),
+            dtype=np.int32, count=n
+        )
+        return cls(start, duration, app, title, url, strings)
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    @property
+    def end(self) -> np.ndarray:
+        return self.start + np.round(self.duration * 1_000_000).astype(np.int64)
+
+    def take(self, idx: np.ndarray) -> "EventColumns":
+        return EventColumns(self.start[idx], self.duration[idx], self.app[idx],
+                            self.title[idx], self.url[idx], self.strings)
+
+    def sorted(self) -> "EventColumns":
+        return self.take(np.argsort(self.start, kind="stable"))
+
+    def to_events(self) -> List[Dict]:
+        """Output boundary: plain dicts with ISO timestamps."""
+        s = self.strings
+        return [{
+            "timestamp": start,
+            "duration": duration,
+            "app": s[app],
+            "title": s[title],
+            "details": [{"url": s[url]}] if url != NO_ID else []
+        } for start, duration, app, title, url in zip(
+            format_iso_column(self.start), self.duration.tolist(), self.app.tolist(),
+            self.title.tolist(), self.url.tolist())]
+
+def segmented_cummax(values: np.ndarray, segment_id: np.ndarray) -> np.ndarray:
+    """
+    Running maximum of values that restarts at every segment (segment_id is
+    non-decreasing). Each segment is lifted above the previous one so a single
+    np.maximum.accumulate does the work; if the lift would overflow int64 the
+    segments are accumulated one by one.
+    """
+    if len(values) == 0:
+        return values.copy()
+    base = values.min()
+    rel = values - base
+    span = int(rel.max()) + 1
+    n_segments = int(segment_id[-1]) + 1
+    if span * n_segments < 2 ** 62:
+        lift = segment_id.astype(np.int64) * span
+        return np.maximum.accumulate(rel + lift) - lift + base
+    out = np.empty_like(values)
+    bounds = np.flatnonzero(np.diff(segment_id)) + 1
+    for lo, hi in zip(np.r_[0, bounds], np.r_[bounds, len(values)]):
+        out[lo:hi] = np.maximum.accumulate(values[lo:hi])
+    return out
+
+def weighted_groups(group: np.ndarray, ids: np.ndarray, weights: np.ndarray, n_groups: int):
+    """
+    For (group, id, weight) triples in stream order, returns CSR (offsets, ids,
+    summed weights) of the distinct ids per group, heaviest first and ties in
+    order of first appearance. Triples with id == NO_ID are ignored.
+    """
+    keep = ids != NO_ID
+    group, ids, weights = group[keep], ids[keep], weights[keep]
+    if len(ids) == 0:
+        return np.zeros(n_groups + 1, dtype=np.int64), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float64)
+    key = group.astype(np.int64) * (int(ids.max()) + 1) + ids
+    _, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+    sums = np.bincount(inverse.ravel(), weights=weights, minlength=len(first))
+    owner = group[first]
+    order = np.lexsort((first, -sums, owner))
+    counts = np.bincount(owner, minlength=n_groups)
+    offsets = np.zeros(n_groups + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return offsets, ids[first][order].astype(np.int32), sums[order]
+
+class Session:
+    """
+    One session between the streaming stages: epoch microseconds and string
+    ids. Titles and URLs are weighted by dwell time in bounded SpaceSaving
+    sketches of top_k * CAPACITY_FACTOR entries, so a session's size does not
+    grow with the number of distinct pages it saw.
+    """
+    __slots__ = ("start", "end", "app", "duration", "event_count", "titles", "urls", "strings")
+
+    def __init__(self, start: int, end: int, app: int, strings: StringTable, top_k: int = TOP_K):
+        self.start = start
+        self.end = end
+        self.app = app
+        self.duration = 0.0
+        self.event_count = 0
+        self.titles = SpaceSaving(top_k * CAPACITY_FACTOR)
+        self.urls = SpaceSaving(top_k * CAPACITY_FACTOR)
+        self.strings = strings
+
+    def absorb(self, other: "Session"):
+        """Folds a later session of the merge group into this one."""
+        self.end = other.end
+        self.duration += other.duration
+        self.event_count += other.event_count
+        self.titles.update(other.titles)
+        self.urls.update(other.urls)
+
+    @classmethod
+    def from_dict(cls, session: Dict, strings: StringTable, top_k: int = TOP_K) -> "Session":
+        """A logged session back to ids; its listed titles/URLs are all that is known of them."""
+        s = cls(to_epoch_us(session["start_time"]), to_epoch_us(session["end_time"]),
+                strings.intern(session["app"]), strings, top_k)
+        s.duration = session["duration"]
+        s.event_count = session["event_count"]
+        for key, summary, seconds_key, other_key in (("titles", s.titles, "title_seconds", "titles_other"),
+                                                     ("urls", s.urls, "url_seconds", "urls_other")):
+            values = session.get(key, [])
+            seconds = session.get(seconds_key)
+            if seconds is None:
+                # No dwell times recorded: split the session's duration evenly
+                seconds = [session["duration"] / len(values)] * len(values) if values else []
+            for value, weight in zip(values, seconds):
+                summary.add(strings.intern(value), weight)
+            summary.hidden += session.get(other_key, 0)
+        return s
+
+    def to_dict(self, top_k: int = TOP_K) -> Dict:
+        """
+        Output boundary: the session dict written to the sensor log, with the
+        top_k titles/URLs by dwell time and the number left out of each.
+        """
+        s = self.strings
+        titles, urls = self.titles.top(top_k), self.urls.top(top_k)
+        return {
+            "start_time": from_epoch_us(self.start),
+            "end_time": from_epoch_us(self.end),
+            "app": s[self.app],
+            "titles": [s[t] for t, _ in titles],
+            "title_seconds": [w for _, w in titles],
+            "titles_other": self.titles.other(top_k),
+            "urls": [s[u] for u, _ in urls],
+            "url_seconds": [w for _, w in urls],
+            "urls_other": self.urls.other(top_k),
+            "duration": self.duration,
+            "event_count": self.event_count
+        }
+
+def iter_chunks(events: EventColumns, size: int = CHUNK_EVENTS) -> Iterator[EventColumns]:
+    """Consecutive slices of events (views, not copies)."""
+    for lo in range(0, len(events), size):
+        yield events.take(slice(lo, lo + size))
+
+def iter_sessions(chunks: Iterable[EventColumns], gap_threshold: int = 300,
+                  top_k: int = TOP_K) -> Iterator[Session]:
+    """
+    Groups consecutive events of the same app into sessions; a new session
+    starts when the app changes or the event starts at least gap_threshold
+    seconds after the session's latest end. Each session is yielded as soon
+    as the next one starts.
+
+    Breaks are found per chunk with vectorized operations. The "latest end so
+    far" is a running max that restarts at every app run, led by the open
+    session's end; within a run it equals the per-session running max, since
+    after a gap break the new event's end already exceeds everything before it.
+    Titles and URLs are summed per session in the chunk, then folded into the
+    session's sketches (sized for top_k) heaviest first, so the pages that
+    dominate a chunk are tracked before its long tail can evict anything.
+    """
+    current: Optional[Session] = None
+    gap_us = gap_threshold * 1_000_000
+    for chunk in chunks:
+        n = len(chunk)
+        if n == 0:
+            continue
+        start, end, app = chunk.start, chunk.end, chunk.app
+        app_change = np.ones(n, dtype=bool)
+        app_change[1:] = app[1:] != app[:-1]
+        if current is not None:
+            app_change[0] = app[0] != current.app
+        lead = current.end if current is not None else start[0]
+        run_max = segmented_cummax(np.r_[lead, end].astype(np.int64), np.r_[0, np.cumsum(app_change)])
+        breaks = app_change | (start - run_max[:-1] >= gap_us)
+        # Group 0 continues the open session; group k >= 1 is the chunk's k-th new session
+        group = np.cumsum(breaks)
+        n_groups = int(group[-1]) + 1
+        firsts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+
+        title_offsets, title_ids, title_weights = weighted_groups(group, chunk.title, chunk.duration, n_groups)
+        url_offsets, url_ids, url_weights = weighted_groups(group, chunk.url, chunk.duration, n_groups)
+        title_offsets, title_ids, title_weights = title_offsets.tolist(), title_ids.tolist(), title_weights.tolist()
+        url_offsets, url_ids, url_weights = url_offsets.tolist(), url_ids.tolist(), url_weights.tolist()
+
+        for g, first, group_end, duration, count in zip(
+                group[firsts].tolist(), firsts.tolist(), np.maximum.reduceat(end, firsts).tolist(),
+                np.add.reduceat(chunk.duration, firsts).tolist(), np.diff(np.r_[firsts, n]).tolist()):
+            if g > 0:
+                if current is not None:
+                    yield current
+                current = Session(int(start[first]), group_end, int(app[first]), chunk.strings, top_k)
+            current.end = max(current.end, group_end)
+            current.duration += duration
+            current.event_count += count
+            for k in range(title_offsets[g], title_offsets[g + 1]):
+                current.titles.add(title_ids[k], title_weights[k])
+            for k in range(url_offsets[g], url_offsets[g + 1]):
+                current.urls.add(url_ids[k], url_weights[k])
+    if current is not None:
+        yield current
+
+def iter_without_noise(sessions: Iterable[Session], noise_threshold: int = 2) -> Iterator[Session]:
+    """Drops 'noise' sessions shorter than noise_threshold seconds."""
+    return (s for s in sessions if s.duration >= noise_threshold)
+
+def iter_merged_interruptions(sessions: Iterable[Session], interruption_threshold: int = 60) -> Iterator[Session]:
+    """
+    Merges A-B-A patterns where B is shorter than interruption_threshold,
+    cascading (A-B-A-B-A -> A), with a stack of at most two sessions: the open
+    group head A and the candidate interruption B. When the next session is
+    A's app again and B was short, B and it are folded into A (which then ends
+    where the last A ends); otherwise A is final and B becomes the new head.
+    A merged group re-ranks the members' titles/URLs by their summed dwell time.
+    """
+    stack: List[Session] = []
+    for s in sessions:
+        if len(stack) < 2:
+            stack.append(s)
+            continue
+        head, interruption = stack
+        if s.app == head.app and interruption.duration < interruption_threshold:
+            head.absorb(interruption)
+            head.absorb(s)
+            stack = [head]
+        else:
+            yield head
+            stack = [interruption, s]
+    yield from stack
@@ -0,0 +1,61 @@
+"""
+Bounded heavy-hitter summaries for session titles and URLs.
+
+A session keeps its top_k titles (and URLs) by dwell time plus a count of
+the ones left out, instead of every distinct value. SpaceSaving (Metwally et
+al.) gives the streaming pipeline that in bounded memory: it tracks at most
+`capacity` items, and an item arriving while it is full replaces the lightest
+one and inherits its weight. Anything heavier than total / capacity is never
+lost, and all weights are exact while no more than capacity distinct items
+were seen.
+
+    sketch = SpaceSaving(TOP_K * CAPACITY_FACTOR)
+    for title, seconds in chunk_of_session:
+        sketch.add(title, seconds)
+    sketch.update(merged_session_sketch)    # A-B-A merges
+    titles = sketch.top(TOP_K)              # [(title, seconds), ...] heaviest first
+    left_out = sketch.other(TOP_K)
+"""
+from typing import Dict, Hashable, List, Tuple
+
+TOP_K = 10
+# Items tracked per sketch, relative to the number reported
+CAPACITY_FACTOR = 4
+
+class SpaceSaving:
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        # Insertion order breaks ties between equal weights (first seen wins)
+        self.weights: Dict[Hashable, float] = {}
+        self.evicted = 0
+        # Items known to exist but never tracked (long tails of merged summaries)
+        self.hidden = 0
+
+    def add(self, key: Hashable, weight: float):
+        weights = self.weights
+        if key in weights:
+            weights[key] += weight
+        elif len(weights) < self.capacity:
+            weights[key] = weight
+        else:
+            lightest = min(weights, key=weights.get)
+            floor = weights.pop(lightest)
+            weights[key] = floor + weight
+            self.evicted += 1
+
+    def update(self, other: "SpaceSaving"):
+        """Folds another sketch in; what it evicted or hid stays counted as hidden."""
+        for key, weight in other.weights.items():
+            self.add(key, weight)
+        self.hidden += other.evicted + other.hidden
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    def top(self, k: int) -> List[Tuple[Hashable, float]]:
+        """The k heaviest items, heaviest first (stable for ties)."""
+        return sorted(self.weights.items(), key=lambda item: -item[1])[:k]
+
+    def other(self, k: int) -> int:
+        """How many distinct items top(k) leaves out (an upper bound once items were evicted)."""
+        return max(0, len(self.weights) - k) + self.evicted + self.hidden
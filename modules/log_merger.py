@@ -0,0 +1,211 @@
+"""
+Merges the sensor logs that several machines (desktop, laptop, ...) wrote
+for the same day into one log, so the cognizer writes one journal per day.
+
+Each log's header names its machine (sensor config `machine_id`). For every
+date with logs from two or more machines, the latest log of each machine is
+taken (an earlier run of the same machine is covered by it) and:
+
+    sessions    k-way merged by start time (heapq). Where machines overlap,
+                the window that gained focus last is the active one: the
+                session it interrupts is cut at its start and resumes after
+                it ends, if it lasted longer.
+    git         deduplicated by commit hash (the same repo cloned on both
+                machines reports the same commits).
+    status      per-machine statuses under "sources"; diagnostics prefixed
+                with the machine.
+
+Logs are read and parsed in worker processes, one per source. The inputs
+are renamed to *.merged (kept, but no longer picked up by find_logs) and the
+merged log is written as sensor_log_<latest stamp>_merged.ndjson.gz.
+"""
+import os
+import heapq
+import datetime
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import sensor_log
+    from sensor_log import SensorLogReader, SensorLogWriter
+except ImportError:
+    import sys
+    sys.path.insert(0, str(Path(__file__).parent))
+    import sensor_log
+    from sensor_log import SensorLogReader, SensorLogWriter
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+MERGED_SUFFIX = ".merged"
+MERGED_MACHINE = "merged"
+# Pieces of a cut session shorter than this are dropped (like the sensor's noise filter)
+MIN_PIECE_SECONDS = 2.0
+
+# The cognizer imports this module, so it stays free of NumPy (event_columns)
+def to_epoch_us(iso_str: str) -> int:
+    """ISO timestamp -> epoch microseconds. Naive values are treated as UTC."""
+    dt = datetime.datetime.fromisoformat(iso_str.replace('Z', '+00:00'))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return (dt - EPOCH) // datetime.timedelta(microseconds=1)
+
+def from_epoch_us(us: int) -> str:
+    """Epoch microseconds -> ISO timestamp (UTC)."""
+    return (EPOCH + datetime.timedelta(microseconds=int(us))).isoformat()
+
+def read_header(path: Path) -> Dict[str, Any]:
+    """Date and machine of a log; reads only its first record."""
+    reader = SensorLogReader(path)
+    return {"path": path, "date": reader.date or "", "machine": reader.header.get("machine")}
+
+def load_source(path: Path) -> Dict[str, Any]:
+    """
+    Worker: one machine's log, parsed. Sessions are sorted by start and carry
+    their span as epoch microseconds in "_start"/"_end".
+    """
+    reader = SensorLogReader(path)
+    sessions = []
+    for session in reader.sessions():
+        session["_start"] = to_epoch_us(session["start_time"])
+        session["_end"] = max(session["_start"], to_epoch_us(session["end_time"]))
+        sessions.append(session)
+    sessions.sort(key=lambda s: s["_start"])
+    machine = reader.header.get("machine")
+    for session in sessions:
+        session["machine"] = machine
+    return {"path": path, "date": reader.date, "machine": machine, "sessions": sessions,
+            "git": reader.git_activity, "status": reader.status}
+
+def _piece(session: Dict[str, Any], start: int, end: int) -> Dict[str, Any]:
+    """The part of a session within [start, end); durations are scaled to the span."""
+    span = session["_end"] - session["_start"]
+    factor = (end - start) / span if span > 0 else 0.0
+    piece = dict(session, _start=start, _end=end, _cut=True)
+    piece["start_time"], piece["end_time"] = from_epoch_us(start), from_epoch_us(end)
+    piece["duration"] = round(session["duration"] * factor, 3)
+    for key in ("title_seconds", "url_seconds"):
+        if key in session:
+            piece[key] = [round(w * factor, 3) for w in session[key]]
+    return piece
+
+def merge_sessions(sources: List[List[Dict[str, Any]]]) -> Iterator[Dict[str, Any]]:
+    """
+    K-way merge of time-sorted session lists from different machines with
+    active-window precedence. O(n log k): cut-off remainders go back into
+    the heap instead of rescanning the timeline.
+    """
+    heap = [(s["_start"], i, n, s) for i, sessions in enumerate(sources) for n, s in enumerate(sessions[:1])]
+    heapq.heapify(heap)
+    positions = [1] * len(sources)
+    seq = len(heap)
+    current = None
+
+    def emit(session):
+        if not session.get("_cut") or session["_end"] - session["_start"] >= MIN_PIECE_SECONDS * 1_000_000:
+            yield {k: v for k, v in session.items() if not k.startswith("_")}
+
+    while heap:
+        _, source, _, s = heapq.heappop(heap)
+        # Refill from the source the session came from (remainders have source -1)
+        if source >= 0 and positions[source] < len(sources[source]):
+            seq += 1
+            nxt = sources[source][positions[source]]
+            positions[source] += 1
+            heapq.heappush(heap, (nxt["_start"], source, seq, nxt))
+
+        if current is None:
+            current = s
+            continue
+        if s["_start"] >= current["_end"] or s["machine"] == current["machine"]:
+            yield from emit(current)
+            current = s
+            continue
+
+        # Overlap across machines: s took the focus at its start
+        if current["_end"] > s["_end"]:
+            remainder = _piece(current, s["_end"], current["_end"])
+            remainder["event_count"] = 0
+            seq += 1
+            heapq.heappush(heap, (remainder["_start"], -1, seq, remainder))
+        yield from emit(_piece(current, current["_start"], s["_start"]))
+        current = s
+
+    if current is not None:
+        yield from emit(current)
+
+def merge_git(sources: Iterable[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Repositories in first-seen order; each commit hash is kept once."""
+    seen = set()
+    repos: Dict[str, List[Dict[str, Any]]] = {}
+    for git_activity in sources:
+        for repo in git_activity:
+            commits = repos.setdefault(repo.get("repo", "Unknown"), [])
+            for commit in repo.get("commits", []):
+                if commit.get("hash") not in seen:
+                    seen.add(commit.get("hash"))
+                    commits.append(commit)
+    return [{"repo": name, "commits": sorted(commits, key=lambda c: c.get("timestamp", ""), reverse=True)}
+            for name, commits in repos.items() if commits]
+
+def merge_status(loaded: List[Dict[str, Any]]) -> Dict[str, Any]:
+    status = {"diagnostics": [], "sources": {}}
+    for source in loaded:
+        machine, source_status = source["machine"], source["status"]
+        status["sources"][machine] = {k: v for k, v in source_status.items() if k != "diagnostics"}
+        status["diagnostics"].extend(f"[{machine}] {d}" for d in source_status.get("diagnostics", []))
+    for key in ("browser", "window", "git"):
+        states = {s["status"].get(key) for s in loaded}
+        status[key] = "ok" if states == {"ok"} else "failed" if "failed" in states else "partial"
+    return status
+
+def merge_logs(paths: List[Path], out_dir: Path, max_workers: Optional[int] = None) -> Path:
+    """Merges one day's logs (one per machine) into a new log in out_dir and returns its path."""
+    workers = min(len(paths), max_workers or os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            loaded = list(pool.map(load_source, paths))
+    else:
+        loaded = [load_source(p) for p in paths]
+
+    date = max(source["date"] for source in loaded)
+    stamp = datetime.datetime.fromisoformat(date).strftime("%Y%m%d_%H%M%S")
+    out_path = out_dir / sensor_log.log_filename(stamp, MERGED_MACHINE)
+    machines = [source["machine"] for source in loaded]
+    with SensorLogWriter(out_path, date, {"machine": MERGED_MACHINE, "machines": machines}) as writer:
+        writer.write_sessions(merge_sessions([source["sessions"] for source in loaded]))
+        for repo_activity in merge_git(source["git"] for source in loaded):
+            writer.write_git(repo_activity)
+        writer.write_status(merge_status(loaded))
+    return out_path
+
+def merge_pending(logs_dir: Path, max_workers: Optional[int] = None) -> List[Path]:
+    """
+    Merges every date of the unprocessed logs that has logs from several
+    machines. Returns the logs to process, oldest first: merged logs in
+    place of their inputs, everything else unchanged.
+    """
+    headers = [read_header(p) for p in sensor_log.find_logs(logs_dir)]
+    by_date: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for header in headers:
+        if header["machine"] and header["machine"] != MERGED_MACHINE:
+            latest = by_date.setdefault(header["date"][:10], {})
+            previous = latest.get(header["machine"])
+            if previous is None or header["date"] >= previous["date"]:
+                latest[header["machine"]] = header
+
+    replaced = set()
+    pending = []
+    for day, latest in sorted(by_date.items()):
+        if len(latest) < 2:
+            continue
+        inputs = [h["path"] for h in sorted(latest.values(), key=lambda h: h["machine"])]
+        pending.append(merge_logs(inputs, logs_dir, max_workers))
+        # Earlier runs of the same machines that day are covered by the merged log
+        covered = [h["path"] for h in headers if h["date"][:10] == day and h["machine"] in latest]
+        for path in covered:
+            path.rename(path.with_name(path.name + MERGED_SUFFIX))
+        replaced.update(covered)
+
+    pending.extend(h["path"] for h in headers if h["path"] not in replaced and h["path"] not in pending)
+    return sorted(pending, key=lambda p: p.name)
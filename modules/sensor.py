@@ -5,18 +5,64 @@ import datetime
 import json
 import re
 import time
+import heapq
+import itertools
+import socket
+import fnmatch
 import yaml
 import requests
-from typing import List, Dict, Any, Optional
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator, Set
 from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit, unquote_plus
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+import numpy as np
+
+try:
+    import event_columns
+    import sensor_log
+    import sensor_metrics
+    from event_columns import EventColumns, Session, StringTable
+    from heavy_hitters import TOP_K
+    from event_archive import EventArchive
+    from sensor_log import SensorLogWriter
+except ImportError:
+    import sys
+    sys.path.insert(0, str(Path(__file__).parent))
+    import event_columns
+    import sensor_log
+    import sensor_metrics
+    from event_columns import EventColumns, Session, StringTable
+    from heavy_hitters import TOP_K
+    from event_archive import EventArchive
+    from sensor_log import SensorLogWriter
 
 # --- Configuration & Setup ---
+# Tracking and session parameters; see url_strip_params
+DEFAULT_STRIP_PARAMS = [
+    "utm_*", "fbclid", "gclid", "gbraid", "wbraid", "dclid", "msclkid", "yclid", "igshid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "_hsenc", "_hsmi", "mkt_tok", "ref_src", "ref_url",
+    "spm", "si", "jsessionid", "phpsessid", "sessionid", "session_id"
+]
 BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / "data"
 LOGS_DIR = DATA_DIR / "logs"
+CACHE_DIR = DATA_DIR / "cache"
+ARCHIVE_DIR = DATA_DIR / "archive"
+STATE_PATH = DATA_DIR / "sensor_state.json"
+GIT_DISCOVERY_PATH = DATA_DIR / "git_discovery.json"
+GIT_COMMIT_CACHE_PATH = DATA_DIR / "git_commit_cache.json"
+SENSOR_LOCK_PATH = DATA_DIR / "sensor.lock"
+DAEMON_PID_PATH = DATA_DIR / "sensor_daemon.pid"
+DAEMON_STOP_PATH = DATA_DIR / "sensor_daemon.stop"
 CONFIG_PATH = BASE_DIR / "config" / "secrets.yaml"
 
+# Japan Standard Time (UTC+9): logs and cache partitions are split by JST day
+JST = datetime.timezone(datetime.timedelta(hours=9))
+
 # Ensure directories exist
 LOGS_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -32,6 +78,34 @@ class ConfigLoader:
         self.git_repos = self.config.get("git_repos", [])
         self.git_base_folders = self.config.get("git_base_folders", [])
         self.git_author = self.config.get("git_author", "yamadarikuto")
+        # Parallel `git log`: max concurrent processes and per-repo timeout (seconds)
+        self.git_max_workers = self.config.get("git_max_workers", 4)
+        self.git_timeout = self.config.get("git_timeout", 30)
+        # Directory names never descended into while discovering repos
+        self.git_discovery_prune = self.config.get("git_discovery_prune", [
+            "node_modules", "venv", ".venv", "env", "__pycache__", "site-packages",
+            "AppData", "dist", "build", "target", "vendor"
+        ])
+        # Days of raw events kept in data/cache for incremental runs
+        self.cache_retention_days = self.config.get("cache_retention_days", 14)
+        # ActivityWatch fetching
+        self.aw_url = self.config.get("activitywatch_url", "http://localhost:5600")
+        self.aw_slice_minutes = self.config.get("aw_slice_minutes", 60)
+        self.aw_max_workers = self.config.get("aw_max_workers", 4)
+        # Let the AW server drop AFK time and merge duplicates (query2 API)
+        self.aw_query_mode = self.config.get("aw_query_mode", False)
+        # Browser profiles read concurrently
+        self.browser_max_workers = self.config.get("browser_max_workers", 4)
+        # Query parameters dropped from visited URLs (fnmatch patterns, case-insensitive)
+        self.url_strip_params = self.config.get("url_strip_params", DEFAULT_STRIP_PARAMS)
+        # Visits of the same canonical URL and title within this many seconds count as one (0: keep all)
+        self.visit_dedupe_seconds = self.config.get("visit_dedupe_seconds", 300)
+        # --daemon: minutes between incremental collection cycles
+        self.daemon_interval_minutes = self.config.get("daemon_interval_minutes", 15)
+        # Written to every log header; logs of several machines for one day are merged by the cognizer
+        self.machine_id = self.config.get("machine_id") or socket.gethostname()
+        # --since/--until: days collected concurrently
+        self.backfill_max_workers = self.config.get("backfill_max_workers", 4)
 
     @property
     def blocked_domains(self) -> List[str]:
@@ -42,38 +116,379 @@ class ConfigLoader:
         return self.config.get("sensitive_keywords", [])
 
 config = ConfigLoader()
+# Bumped by the collectors (also from worker threads); main attributes them to stages
+io_counters = sensor_metrics.Counters()
 
 # --- Privacy & Sanitization ---
+class PrivacyFilter:
+    """
+    Privacy engine built once from secrets.yaml and shared by the window,
+    browser and git paths.
+
+    - sensitive_keywords: one precompiled alternation (longest keyword first)
+    - blocked_domains: one combined regex; if the patterns cannot be combined
+      (e.g. inline flags), each valid pattern is compiled on its own
+    - results are LRU-cached: the same titles/URLs repeat all day
+    """
+    EMAIL_PATTERN = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+
+    def __init__(self, sensitive_keywords: List[str], blocked_domains: List[str], cache_size: int = 65536):
+        keywords = sorted({k for k in sensitive_keywords if k}, key=len, reverse=True)
+        self.keyword_re = re.compile("|".join(re.escape(k) for k in keywords)) if keywords else None
+        self.domain_res = self._compile_domains([p for p in blocked_domains if p])
+
+        self.sanitize = lru_cache(maxsize=cache_size)(self._sanitize)
+        self.is_blocked = lru_cache(maxsize=cache_size)(self._is_blocked)
+        self.filter_title = lru_cache(maxsize=cache_size)(self._filter_title)
+
+    @classmethod
+    def from_config(cls, cfg: "ConfigLoader") -> "PrivacyFilter":
+        return cls(cfg.sensitive_keywords, cfg.blocked_domains)
+
+    @staticmethod
+    def _compile_domains(patterns: List[str]) -> List["re.Pattern"]:
+        if not patterns:
+            return []
+        try:
+            return [re.compile("|".join(f"(?:{p})" for p in patterns))]
+        except re.error:
+            compiled = []
+            for p in patterns:
+                try:
+                    compiled.append(re.compile(p))
+                except re.error as e:
+                    print(f"Warning: Invalid blocked_domains pattern {p!r}: {e}. Ignoring.")
+            return compiled
+
+    def _sanitize(self, text: str) -> str:
+        if not text:
+            return ""
+        # 1. Redact specific keywords
+        if self.keyword_re:
+            text = self.keyword_re.sub("[REDACTED]", text)
+        # 2. Basic PII (Email) - naive regex
+        return self.EMAIL_PATTERN.sub("[EMAIL_REDACTED]", text)
+
+    def _is_blocked(self, url: str) -> bool:
+        if not url:
+            return False
+        return any(r.search(url) for r in self.domain_res)
+
+    def is_sensitive(self, text: str) -> bool:
+        """True if text hits a blocked domain pattern or contains a sensitive keyword."""
+        if not text:
+            return False
+        return self.is_blocked(text) or bool(self.keyword_re and self.keyword_re.search(text))
+
+    def _filter_title(self, title: str) -> str:
+        """Window titles are only sanitized when they look sensitive."""
+        return self.sanitize(title) if self.is_sensitive(title) else title
+
+privacy = PrivacyFilter.from_config(config)
+
+class UrlCanonicalizer:
+    """
+    Maps the URLs of one page to a single form before they are fused:
+    - scheme and host lowercased; "www.", default ports, credentials dropped
+    - ;jsessionid=... path parameters removed, repeated slashes collapsed
+    - query parameters matching strip_params removed (the rest keep their order and encoding)
+    - fragments removed, except hash routes (#/..., #!...) of single-page apps
+    Non-HTTP URLs are returned unchanged. Results are LRU-cached like PrivacyFilter's.
+    """
+    DEFAULT_PORTS = {"http": 80, "https": 443}
+    PATH_SESSION_PATTERN = re.compile(r";(?:jsessionid|phpsessid|sid)=[^/]*", re.IGNORECASE)
+
+    def __init__(self, strip_params: List[str], cache_size: int = 65536):
+        patterns = [fnmatch.translate(p.lower()) for p in strip_params if p]
+        self.strip_re = re.compile("|".join(f"(?:{p})" for p in patterns)) if patterns else None
+        self.canonicalize = lru_cache(maxsize=cache_size)(self._canonicalize)
+
+    @classmethod
+    def from_config(cls, cfg: "ConfigLoader") -> "UrlCanonicalizer":
+        return cls(cfg.url_strip_params)
+
+    def _keep_param(self, param: str) -> bool:
+        if not param:
+            return False
+        if self.strip_re is None:
+            return True
+        return not self.strip_re.match(unquote_plus(param.split("=", 1)[0]).lower())
+
+    def _canonicalize(self, url: str) -> str:
+        try:
+            parts = urlsplit(url)
+            port = parts.port
+        except ValueError:
+            return url
+        scheme = parts.scheme.lower()
+        if scheme not in self.DEFAULT_PORTS or not parts.hostname:
+            return url
+
+        host = parts.hostname.rstrip(".")
+        if host.startswith("www."):
+            host = host[4:]
+        if ":" in host:
+            host = f"[{host}]"  # IPv6 literal
+        netloc = host if port in (None, self.DEFAULT_PORTS[scheme]) else f"{host}:{port}"
+
+        path = re.sub(r"/{2,}", "/", self.PATH_SESSION_PATTERN.sub("", parts.path)) or "/"
+        query = "&".join(p for p in parts.query.split("&") if self._keep_param(p))
+        fragment = parts.fragment if parts.fragment.startswith(("/", "!")) else ""
+        return urlunsplit((scheme, netloc, path, query, fragment))
+
+canonicalizer = UrlCanonicalizer.from_config(config)
+
+def canonicalize_url(url: str) -> str:
+    return canonicalizer.canonicalize(url) if url else url
+
 def sanitize_text(text: str) -> str:
-    if not text:
-        return ""
-    
-    # 1. Redact specific keywords
-    for keyword in config.sensitive_keywords:
-        if keyword:
-            text = text.replace(keyword, "[REDACTED]")
-    
-    # 2. Basic PII (Email) - naive regex
-    email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-    text = re.sub(email_pattern, "[EMAIL_REDACTED]", text)
-    
-    return text
+    return privacy.sanitize(text)
 
 def is_domain_blocked(url: str) -> bool:
-    if not url:
+    return privacy.is_blocked(url)
+
+# --- Incremental State (Watermarks & Event Cache) ---
+
+def parse_timestamp(iso_str: str) -> datetime.datetime:
+    """
+    Parses an ISO timestamp (AW uses 'Z' or '+00:00'). Naive values are treated as UTC.
+    """
+    dt = datetime.datetime.fromisoformat(iso_str.replace('Z', '+00:00'))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return dt
+
+def read_json_file(path: Path) -> Dict[str, Any]:
+    """
+    Reads a JSON cache/state file. A missing or corrupt file yields {} so the
+    caller simply rebuilds it from scratch.
+    """
+    if not path.exists():
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f) or {}
+    except Exception as e:
+        print(f"Warning: Failed to read {path}: {e}. Starting from scratch.")
+        return {}
+
+def write_json_atomic(path: Path, data: Dict[str, Any], indent: Optional[int] = 2):
+    """
+    Writes JSON atomically (temp file + replace) so an interrupted run
+    never leaves a half-written file behind.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=indent, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def load_state() -> Dict[str, Any]:
+    """
+    Loads persisted sensor state (per-bucket watermarks etc.) from data/sensor_state.json.
+    A missing or corrupt file simply means "no state": the next run does a full fetch.
+    """
+    return read_json_file(STATE_PATH)
+
+def save_state(state: Dict[str, Any]):
+    """
+    Writes sensor state atomically so an interrupted run never leaves a
+    half-written watermark behind.
+    """
+    write_json_atomic(STATE_PATH, state)
+
+def _try_lock_file(f) -> bool:
+    """Non-blocking exclusive lock on an open file; the OS drops it if the process dies."""
+    try:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
         return False
-    for pattern in config.blocked_domains:
-        if re.search(pattern, url):
-            return True
-    return False
+
+def _unlock_file(f):
+    if os.name == "nt":
+        import msvcrt
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+@contextmanager
+def sensor_lock(wait: float = 0, poll: float = 1.0):
+    """
+    Serializes collection between the daemon and one-shot runs, which update
+    the same state file and caches. Yields whether the lock was acquired
+    within `wait` seconds.
+    """
+    SENSOR_LOCK_PATH.parent.mkdir(parents=True, exist_ok=True)
+    deadline = time.monotonic() + wait
+    with open(SENSOR_LOCK_PATH, "a+") as f:
+        acquired = _try_lock_file(f)
+        while not acquired and time.monotonic() < deadline:
+            time.sleep(poll)
+            acquired = _try_lock_file(f)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                _unlock_file(f)
+
+class EventPartitionStore:
+    """
+    Append-only cache of raw events, partitioned by JST day:
+        data/cache/<stream>/YYYYMMDD.ndjson
+
+    Each line holds one event. When the same key (e.g. the AW event id) is
+    appended again, the later line wins on load. This makes re-fetching an
+    overlapping range idempotent: an AW event that grew through heartbeats
+    since the last run simply replaces its older copy.
+
+    Events without a stable id (query results) are appended with replace_from:
+    a marker line that drops every earlier cached event starting at or after it.
+
+    With dry_run, appended lines are kept in memory on top of the files
+    (for --dry-run); nothing is written, compacted or pruned.
+    """
+    def __init__(self, stream: str, key_field: str = "id", dry_run: bool = False):
+        self.dir = CACHE_DIR / stream
+        self.key_field = key_field
+        self.dry_run = dry_run
+        self._unsaved: Dict[datetime.date, List[Dict]] = {}
+
+    def _day_path(self, day: datetime.date) -> Path:
+        return self.dir / f"{day.strftime('%Y%m%d')}.ndjson"
+
+    def _key(self, event: Dict) -> Any:
+        # Fall back to the timestamp for events without an id (e.g. query results)
+        key = event.get(self.key_field)
+        return key if key is not None else event.get("timestamp")
+
+    def has_day(self, day: datetime.date) -> bool:
+        return day in self._unsaved or self._day_path(day).exists()
+
+    def append(self, events: List[Dict], replace_from: Optional[datetime.datetime] = None):
+        """
+        Appends events to the partition of the JST day they start in.
+        With replace_from, cached events starting at or after it are superseded.
+        """
+        by_day = {}
+        for e in events:
+            day = parse_timestamp(e["timestamp"]).astimezone(JST).date()
+            by_day.setdefault(day, []).append(e)
+
+        if replace_from is not None:
+            # Every existing partition from replace_from onwards gets a marker
+            day = replace_from.astimezone(JST).date()
+            last_day = max(by_day.keys(), default=day)
+            while day <= last_day:
+                if self.has_day(day):
+                    by_day.setdefault(day, [])
+                day += datetime.timedelta(days=1)
+
+        if self.dry_run:
+            for day, day_events in by_day.items():
+                lines = self._unsaved.setdefault(day, [])
+                if replace_from is not None:
+                    lines.append({"_replace_from": replace_from.isoformat()})
+                lines.extend(day_events)
+            return
+
+        self.dir.mkdir(parents=True, exist_ok=True)
+        for day, day_events in by_day.items():
+            with open(self._day_path(day), "a", encoding="utf-8") as f:
+                if replace_from is not None:
+                    f.write(json.dumps({"_replace_from": replace_from.isoformat()}) + "\n")
+                for e in day_events:
+                    f.write(json.dumps(e, ensure_ascii=False) + "\n")
+
+    def _read_lines(self, path: Path) -> Iterator[Dict]:
+        if not path.exists():
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Torn write from an interrupted run
+
+    def load_day(self, day: datetime.date) -> List[Dict]:
+        path = self._day_path(day)
+        merged = {}
+        line_count = 0
+        for e in itertools.chain(self._read_lines(path), self._unsaved.get(day, [])):
+            line_count += 1
+            if "_replace_from" in e:
+                cutoff = parse_timestamp(e["_replace_from"])
+                merged = {k: v for k, v in merged.items() if parse_timestamp(v["timestamp"]) < cutoff}
+                continue
+            merged[self._key(e)] = e
+
+        events = list(merged.values())
+        # Compact partitions that accumulated many superseded lines
+        if not self.dry_run and line_count > 2 * len(events) + 100:
+            tmp_path = path.with_suffix(".ndjson.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for e in events:
+                    f.write(json.dumps(e, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, path)
+        return events
+
+    def load(self, start: datetime.datetime, end: datetime.datetime) -> List[Dict]:
+        """Returns cached events overlapping [start, end), oldest first."""
+        events = []
+        day = start.astimezone(JST).date()
+        last_day = end.astimezone(JST).date()
+        while day <= last_day:
+            for e in self.load_day(day):
+                ts = parse_timestamp(e["timestamp"])
+                ts_end = ts + datetime.timedelta(seconds=e.get("duration", 0) or 0)
+                if ts < end and ts_end >= start:
+                    events.append(e)
+            day += datetime.timedelta(days=1)
+
+        events.sort(key=lambda e: parse_timestamp(e["timestamp"]))
+        return events
+
+    def prune(self, keep_days: int):
+        """Deletes partitions older than keep_days (JST)."""
+        if self.dry_run or not self.dir.exists():
+            return
+        cutoff = (datetime.datetime.now(JST) - datetime.timedelta(days=keep_days)).strftime("%Y%m%d")
+        for path in self.dir.glob("*.ndjson"):
+            if path.stem < cutoff:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
 
 # --- ActivityWatch Integration ---
 
-def discover_git_repos(base_paths: List[str], max_depth: int = 4) -> List[Dict]:
+def discover_git_repos(base_paths: List[str], max_depth: int = 4, dry_run: bool = False) -> List[Dict]:
     """
     Recursively find git repositories in base_paths up to max_depth.
+
+    Every scanned directory is remembered in data/git_discovery.json together
+    with its mtime. A directory's mtime only changes when entries are added,
+    removed or renamed directly inside it, so an unchanged directory reuses its
+    cached child list (and repo flag) with a single stat instead of a scandir.
+    With dry_run the index is read but not saved.
     """
     discovered = []
+    prune = {name.lower() for name in config.git_discovery_prune}
+    cached = read_json_file(GIT_DISCOVERY_PATH)
+    # Cached child lists were filtered with the prune list they were built with
+    index = cached.get("dirs", {}) if cached.get("prune") == sorted(prune) else {}
+    new_index = {}
+    changed = False
     
     for base in base_paths:
         base_path = Path(base)
@@ -82,54 +497,205 @@ def discover_git_repos(base_paths: List[str], max_depth: int = 4) -> List[Dict]:
             continue
             
         # Recursive scan with depth limit
-        stack = [(base_path, 0)]
+        stack = [(str(base_path), 0)]
         while stack:
             curr_path, depth = stack.pop()
+            if curr_path in new_index:
+                continue
             
+            try:
+                mtime = os.stat(curr_path).st_mtime
+            except OSError:
+                changed = True
+                continue
+
+            entry = index.get(curr_path)
+            if entry is None or entry.get("mtime") != mtime:
+                entry = {"mtime": mtime, "repo": False, "children": []}
+                try:
+                    with os.scandir(curr_path) as it:
+                        for child in it:
+                            if child.name == ".git":
+                                entry["repo"] = True
+                            elif (not child.name.startswith('.')
+                                  and child.name.lower() not in prune
+                                  and child.is_dir()):
+                                entry["children"].append(child.name)
+                except (PermissionError, OSError):
+                    pass
+                entry["children"].sort()
+                changed = True
+            new_index[curr_path] = entry
+
             # Check if current path is a git repo
-            if (curr_path / ".git").exists():
+            if entry["repo"]:
                 discovered.append({
-                    "path": str(curr_path),
-                    "name": curr_path.name
+                    "path": curr_path,
+                    "name": os.path.basename(curr_path)
                 })
                 # Don't go deeper into a git repo (usually)
                 continue
                 
             if depth < max_depth:
-                try:
-                    for child in curr_path.iterdir():
-                        if child.is_dir() and not child.name.startswith('.'):
-                            stack.append((child, depth + 1))
-                except PermissionError:
-                    continue
+                for name in reversed(entry["children"]):
+                    stack.append((os.path.join(curr_path, name), depth + 1))
+
+    # Directories no longer reachable drop out of the index
+    if not dry_run and (changed or len(new_index) != len(index)):
+        try:
+            write_json_atomic(GIT_DISCOVERY_PATH, {"prune": sorted(prune), "dirs": new_index}, indent=None)
+        except OSError as e:
+            print(f"Warning: Failed to save git discovery index: {e}")
                     
     return discovered
 
-def get_git_activity(hours: int = 24) -> List[Dict]:
+# One record per commit: NUL, then the unit-separated header line, then its --numstat lines
+GIT_LOG_FORMAT = "--format=%x00%H%x1f%ai%x1f%ci%x1f%an%x1f%s"
+
+def parse_git_timestamp(ts: str) -> datetime.datetime:
+    """Parses git's ISO-like date ("2026-02-23 10:00:00 +0900") into an aware datetime."""
+    return datetime.datetime.strptime(ts, "%Y-%m-%d %H:%M:%S %z")
+
+def parse_git_log(stdout: str) -> Dict[str, Dict]:
     """
-    Fetch git commit logs from configured and discovered repositories.
+    Parses `git log GIT_LOG_FORMAT --numstat` output into {full_hash: commit}.
+    Subjects are never split on their content (the fields are \\x1f-separated),
+    and numstat lines are summed into files_changed / insertions / deletions.
+    Binary files count as changed with no line counts.
+    """
+    commits = {}
+    for record in stdout.split("\0"):
+        lines = record.strip("\n").split("\n")
+        if not lines:
+            continue
+        fields = lines[0].split("\x1f", 4)
+        if len(fields) < 5:
+            continue
+        hash_val, ts, committed, author, msg = fields
+        files_changed = insertions = deletions = 0
+        for stat in lines[1:]:
+            parts = stat.split("\t", 2)
+            if len(parts) < 3:
+                continue
+            files_changed += 1
+            if parts[0].isdigit():
+                insertions += int(parts[0])
+            if parts[1].isdigit():
+                deletions += int(parts[1])
+        commits[hash_val] = {
+            "message": privacy.sanitize(msg),
+            "timestamp": ts,
+            "committed": committed,
+            "author": author,
+            "files_changed": files_changed,
+            "insertions": insertions,
+            "deletions": deletions
+        }
+    return commits
+
+def collect_repo_commits(repo_path: Path, since_str: str, known_hashes: List[str] = (),
+                         until_str: Optional[str] = None) -> Dict[str, Dict]:
+    """
+    Runs one `git log --numstat` for a repository and parses its commits.
+    Commits reachable from known_hashes (already cached) are excluded via
+    `^hash` revisions on stdin, so only new commits are listed and diffed.
+    Raises RuntimeError with git's first stderr line on failure and
+    subprocess.TimeoutExpired when the repo takes longer than git_timeout.
     """
     import subprocess
-    import shutil
-    
-    if not shutil.which("git"):
-        print("Git CLI not found, skipping git activity collection.")
-        return []
-    
-    # Calculate 'since' date
-    jst = datetime.timezone(datetime.timedelta(hours=9))
-    since_dt = datetime.datetime.now(jst) - datetime.timedelta(hours=hours)
-    # Format for git: "2024-02-23 00:00:00"
-    since_str = since_dt.strftime("%Y-%m-%d %H:%M:%S")
-    
-    all_activity = []
-    diagnostics = []
+
+    cmd = [
+        "git", "log", 
+        f'--since="{since_str}"',
+        "--all",
+        "--no-merges",
+        "--numstat",
+        GIT_LOG_FORMAT
+    ]
+    if until_str:
+        cmd.append(f'--until="{until_str}"')
+    if config.git_author:
+        cmd.append(f'--author={config.git_author}')
+    stdin_revs = None
+    if known_hashes:
+        # Passed on stdin: thousands of hashes would overflow the Windows command line
+        cmd.append("--stdin")
+        stdin_revs = "".join(f"^{h}\n" for h in known_hashes)
+        
+    result = subprocess.run(
+        cmd, 
+        cwd=str(repo_path),
+        input=stdin_revs,
+        capture_output=True, 
+        text=True, 
+        encoding="utf-8", 
+        errors="replace",
+        timeout=config.git_timeout
+    )
+    io_counters.add("requests")
+    io_counters.add("bytes_read", len(result.stdout))
     
+    if result.returncode != 0:
+        # Capture stderr for diagnostics
+        raise RuntimeError(result.stderr.strip().splitlines()[0] if result.stderr else "Return code != 0")
+        
+    commits = parse_git_log(result.stdout)
+    io_counters.add("items_read", len(commits))
+    return commits
+
+def list_reachable_commits(repo_path: Path, since_str: str) -> Set[str]:
+    """
+    Hashes of the commits reachable from any ref and committed since since_str,
+    via `git rev-list` (no diffs, so cheap). Raises like collect_repo_commits.
+    """
+    import subprocess
+
+    result = subprocess.run(
+        ["git", "rev-list", f'--since="{since_str}"', "--all", "--no-merges"],
+        cwd=str(repo_path),
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        timeout=config.git_timeout
+    )
+    io_counters.add("requests")
+    io_counters.add("bytes_read", len(result.stdout))
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[0] if result.stderr else "Return code != 0")
+    return set(result.stdout.split())
+
+def fetch_repo_commits(repo_path: Path, since_str: str,
+                       repo_cache: Dict[str, Any]) -> Tuple[Dict[str, Dict], Optional[Set[str]]]:
+    """
+    Returns (new commits, reachable) for one repository. The cached hashes are
+    only used when the cache already covers the requested window with the same
+    author filter; reachable is then the set of hashes still reachable since
+    the cache's start (None otherwise), so commits dropped by an amend or a
+    rebase can be evicted, and only those are excluded from the numstat pass.
+    If git rejects a cached hash the call is retried without them.
+    """
+    known = []
+    reachable = None
+    if (repo_cache.get("author") == config.git_author
+            and repo_cache.get("since", "9999") <= since_str and repo_cache.get("commits")):
+        reachable = list_reachable_commits(repo_path, repo_cache["since"])
+        known = [h for h in repo_cache["commits"] if h in reachable]
+    if not known:
+        return collect_repo_commits(repo_path, since_str), reachable
+    try:
+        return collect_repo_commits(repo_path, since_str, known), reachable
+    except RuntimeError:
+        io_counters.add("retries")
+        return collect_repo_commits(repo_path, since_str), reachable
+
+def resolve_git_repos(diagnostics: List[str], dry_run: bool = False) -> List[Tuple[Path, str]]:
+    """(path, name) of the configured repos plus those discovered in git_base_folders."""
     # Combine hardcoded repos and discovered folders
     target_repos = list(config.git_repos)
     if config.git_base_folders:
         try:
-            discovered = discover_git_repos(config.git_base_folders, max_depth=4)
+            discovered = discover_git_repos(config.git_base_folders, max_depth=4, dry_run=dry_run)
             print(f"Discovered {len(discovered)} repos in base folders.")
             # Avoid duplicates
             existing_paths = {str(Path(r["path"])) for r in target_repos}
@@ -138,491 +704,810 @@ def get_git_activity(hours: int = 24) -> List[Dict]:
                     target_repos.append(d)
         except Exception as e:
             diagnostics.append(f"Discovery error: {e}")
-    
+
+    repos = []
     for repo_cfg in target_repos:
         repo_path = Path(repo_cfg.get("path", ""))
-        repo_name = repo_cfg.get("name", repo_path.name)
-        
-        if not repo_path.exists():
-            continue
-            
-        try:
-            cmd = [
-                "git", "log", 
-                f'--since="{since_str}"',
-                "--all",
-                "--no-merges",
-                '--format=%H|%s|%ai|%an'
-            ]
-            if config.git_author:
-                cmd.append(f'--author={config.git_author}')
-                
-            result = subprocess.run(
-                cmd, 
-                cwd=str(repo_path),
-                capture_output=True, 
-                text=True, 
-                encoding="utf-8", 
-                errors="replace"
-            )
-            
-            if result.returncode != 0:
-                # Capture stderr for diagnostics
-                err_msg = result.stderr.strip().splitlines()[0] if result.stderr else "Return code != 0"
-                diagnostics.append(f"Git error in {repo_name}: {err_msg}")
+        if repo_path.exists():
+            repos.append((repo_path, repo_cfg.get("name", repo_path.name)))
+    return repos
+
+def format_commit(full_hash: str, commit: Dict) -> Dict:
+    """A parsed commit as written to the sensor log."""
+    return {
+        "hash": full_hash[:7],
+        "message": commit["message"],
+        "timestamp": commit["timestamp"],
+        "author": commit["author"],
+        "files_changed": commit["files_changed"],
+        "insertions": commit["insertions"],
+        "deletions": commit["deletions"]
+    }
+
+def get_git_activity(hours: int = 24, dry_run: bool = False) -> Tuple[List[Dict], List[str]]:
+    """
+    Fetch git commit logs from configured and discovered repositories.
+    Repositories are queried in parallel (at most git_max_workers git processes
+    at a time); results keep the order of the repository list.
+    Returns ([{"repo", "commits"}], diagnostics); a missing git CLI yields no
+    repositories and a diagnostic. With dry_run the commit cache is not saved.
+    """
+    import subprocess
+    import shutil
+    
+    if not shutil.which("git"):
+        print("Git CLI not found, skipping git activity collection.")
+        return [], ["Git CLI not found; git activity was not collected."]
+    
+    # Calculate 'since' date
+    jst = datetime.timezone(datetime.timedelta(hours=9))
+    since_dt = datetime.datetime.now(jst) - datetime.timedelta(hours=hours)
+    # Format for git: "2024-02-23 00:00:00"
+    since_str = since_dt.strftime("%Y-%m-%d %H:%M:%S")
+    
+    all_activity = []
+    diagnostics = []
+    repos = resolve_git_repos(diagnostics, dry_run=dry_run)
+
+    if not repos:
+        return all_activity, diagnostics
+
+    commit_cache = read_json_file(GIT_COMMIT_CACHE_PATH)
+    with ThreadPoolExecutor(max_workers=max(1, config.git_max_workers)) as pool:
+        futures = [
+            (str(path), name, pool.submit(fetch_repo_commits, path, since_str, commit_cache.get(str(path), {})))
+            for path, name in repos
+        ]
+
+        # Collect in submission order so the output is deterministic
+        for repo_key, repo_name, future in futures:
+            try:
+                new_commits, reachable = future.result()
+            except subprocess.TimeoutExpired:
+                diagnostics.append(f"Git log timed out in {repo_name} after {config.git_timeout}s")
                 continue
-                
-            commits = []
-            for line in result.stdout.splitlines():
-                if not line.strip(): continue
-                parts = line.split('|')
-                if len(parts) >= 4:
-                    hash_val, msg, ts, author = parts[0], parts[1], parts[2], parts[3]
-                    commits.append({
-                        "hash": hash_val[:7],
-                        "message": sanitize_text(msg),
-                        "timestamp": ts,
-                        "author": author
-                    })
-            
+            except RuntimeError as e:
+                diagnostics.append(f"Git error in {repo_name}: {e}")
+                continue
+            except Exception as e:
+                diagnostics.append(f"Failed to fetch git log for {repo_name}: {e}")
+                continue
+
+            repo_cache = commit_cache.get(repo_key, {})
+            if "commits" not in repo_cache or repo_cache.get("author") != config.git_author:
+                repo_cache = {"author": config.git_author, "commits": {}}
+            elif reachable is not None:
+                # Amended or rebased away: no longer in the history git reports
+                repo_cache["commits"] = {h: c for h, c in repo_cache["commits"].items() if h in reachable}
+            repo_cache["since"] = min(repo_cache.get("since", since_str), since_str)
+            # New commits go first so equal timestamps keep git's newest-first order
+            repo_cache["commits"] = {**new_commits, **repo_cache["commits"]}
+            commit_cache[repo_key] = repo_cache
+
+            # Same window as `git log --since` (committer date), newest first
+            in_window = sorted(
+                ((parse_git_timestamp(c["committed"]), h, c) for h, c in repo_cache["commits"].items()),
+                key=lambda item: item[0],
+                reverse=True
+            )
+            commits = [format_commit(h, c) for committed, h, c in in_window if committed >= since_dt]
             if commits:
                 all_activity.append({
                     "repo": repo_name,
                     "commits": commits
                 })
-                
-        except Exception as e:
-            diagnostics.append(f"Failed to fetch git log for {repo_name}: {e}")
+
+    # Commits are immutable; besides unreachable ones, only entries older than the retention window are dropped
+    retention_dt = since_dt - datetime.timedelta(days=config.cache_retention_days)
+    retention_str = retention_dt.strftime("%Y-%m-%d %H:%M:%S")
+    for repo_cache in commit_cache.values():
+        commits = repo_cache.get("commits", {})
+        for h in [h for h, c in commits.items() if parse_git_timestamp(c["committed"]) < retention_dt]:
+            del commits[h]
+        repo_cache["since"] = max(repo_cache.get("since", retention_str), retention_str)
+    if not dry_run:
+        try:
+            write_json_atomic(GIT_COMMIT_CACHE_PATH, commit_cache, indent=None)
+        except OSError as e:
+            diagnostics.append(f"Failed to save git commit cache: {e}")
             
     return all_activity, diagnostics
-def get_window_activity(hours: int = 24) -> List[Dict[str, Any]]:
+
+def get_git_activity_by_day(start: datetime.datetime, end: datetime.datetime,
+                            dry_run: bool = False) -> Tuple[Dict[datetime.date, List[Dict]], List[str]]:
     """
-    Fetch window events from ActivityWatch (aw-watcher-window).
-    Filters short events (< 1.5s) and squashes consecutive duplicates.
+    Commits of [start, end) grouped by the JST day of their committer date:
+    {day: [{"repo", "commits"}]}. One `git log --since --until` per repository
+    covers the whole range; the commit cache is neither read nor updated,
+    since backfilled ranges usually lie outside its retention window. With
+    dry_run the repository discovery index is not saved either.
     """
-    end_time = datetime.datetime.now(datetime.timezone.utc)
-    start_time = end_time - datetime.timedelta(hours=hours)
-    
-    # Locate Bucket
-    try:
-        buckets = requests.get("http://localhost:5600/api/0/buckets").json()
-        window_bucket = next((b for b in buckets.keys() if "aw-watcher-window" in b), None)
-        
-        if not window_bucket:
-             print("Warning: No aw-watcher-window bucket found.")
-             return []
-            
-        url = f"http://localhost:5600/api/0/buckets/{window_bucket}/events"
-        # Fetch generous amount, then filter in python
-        response = requests.get(url, params={"start": start_time.isoformat(), "end": end_time.isoformat(), "limit": 2000})
-        
-        if response.status_code != 200:
-            return []
-            
-        events = response.json()
-        cleaned_events = []
-        last_event = None
-        
-        # AW returns newest first. Let's process valid ones then optionally squash on title+app.
-        # But simple squashing works best on time-series.
-        # Ideally we reverse to process chronologically:
-        events.reverse() 
-        
-        for e in events:
-            data = e.get("data", {})
-            app = data.get("app", "")
-            title = data.get("title", "")
-            duration = e.get("duration", 0)
-            
-            # Privacy check
-            if is_domain_blocked(title) or any(k in title for k in config.sensitive_keywords):
-                title = sanitize_text(title)
+    import subprocess
+    import shutil
 
-            # Noise Filter: Skip < 1.5s unless it's a browser tab switch (sometimes fast)
-            # Actually, ignore < 1.0s generally to remove alt-tab noise
-            if duration < 1.5:
-                continue
-                
-            current_obj = {
-                "timestamp": e["timestamp"],
-                "duration": duration,
-                "app": app,
-                "title": title
-            }
-            
-            # Squashing: If same app & title as last event, merge (sum duration)
-            if last_event and last_event["app"] == app and last_event["title"] == title:
-                last_event["duration"] += duration
-                # Should we update timestamp? Usually we keep the start time of the group.
-            else:
-                cleaned_events.append(current_obj)
-                last_event = current_obj
-                
-        # Re-reverse to Newest First if desired, or keep Chronological.
-        # Cognizer likely reads top-down. Let's return Chronological (Oldest -> Newest) as it flows better as a story.
-        return cleaned_events
-        
-    except Exception as e:
-        print(f"Failed to connect to ActivityWatch: {e}")
-        return []
+    if not shutil.which("git"):
+        print("Git CLI not found, skipping git activity collection.")
+        return {}, ["Git CLI not found; git activity was not collected."]
 
-# --- Browser History Extraction (Shadow Copy) ---
+    diagnostics = []
 
-# Removed get_chrome_history_path as it is now integrated into get_browser_history
+    since_str = start.astimezone(JST).strftime("%Y-%m-%d %H:%M:%S")
+    until_str = end.astimezone(JST).strftime("%Y-%m-%d %H:%M:%S")
+    repos = resolve_git_repos(diagnostics, dry_run=dry_run)
 
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=1, max=4),
-    retry=retry_if_exception_type(PermissionError)
-)
-def shadow_copy_history(src_path: Path, dest_path: Path):
-    """
-    Attempts to copy the locked SQLite file.
-    Retries on PermissionError (file lock) using tenacity.
-    """
-    try:
-        shutil.copy2(src_path, dest_path)
-    except PermissionError:
-        print(f"File locked: {src_path}. Retrying...")
-        raise # Triggers retry
-    except Exception as e:
-        print(f"Unexpected error copying history: {e}")
-        raise
+    by_day = {}
+    with ThreadPoolExecutor(max_workers=max(1, config.git_max_workers)) as pool:
+        futures = [(name, pool.submit(collect_repo_commits, path, since_str, (), until_str)) for path, name in repos]
+        for repo_name, future in futures:
+            try:
+                commits = future.result()
+            except subprocess.TimeoutExpired:
+                diagnostics.append(f"Git log timed out in {repo_name} after {config.git_timeout}s")
+                continue
+            except Exception as e:
+                diagnostics.append(f"Git error in {repo_name}: {e}")
+                continue
+
+            per_day = {}
+            for h, c in sorted(commits.items(), key=lambda item: parse_git_timestamp(item[1]["committed"]), reverse=True):
+                committed = parse_git_timestamp(c["committed"])
+                if start <= committed < end:
+                    per_day.setdefault(committed.astimezone(JST).date(), []).append(format_commit(h, c))
+            for day, day_commits in per_day.items():
+                by_day.setdefault(day, []).append({"repo": repo_name, "commits": day_commits})
+    return by_day, diagnostics
 
-def get_browser_history(hours: int = 24) -> List[Dict]:
+class ActivityWatchClient:
     """
-    Reads browser history from Chrome, Edge, and Firefox/Floorp.
-    Uses a shadow copy to avoid file locking.
+    Client for the ActivityWatch REST API.
+
+    All requests go through one pooled keep-alive requests.Session. Event ranges
+    are split into time slices that are fetched concurrently, so a busy day is
+    never truncated by a single request's event limit.
     """
-    history_items = []
-    home = Path.home()
-    
-    # Browser Paths
-    browsers = [
-        {"name": "Chrome", "path": home / "AppData/Local/Google/Chrome/User Data/Default/History", "type": "chromium"},
-        {"name": "Edge", "path": home / "AppData/Local/Microsoft/Edge/User Data/Default/History", "type": "chromium"},
-        {"name": "Firefox", "path": home / "AppData/Roaming/Mozilla/Firefox/Profiles", "type": "firefox"},
-        {"name": "Floorp", "path": home / "AppData/Roaming/Floorp/Profiles", "type": "firefox"}
-    ]
+    BUCKET_CACHE_TTL = 600  # seconds
+    PAGE_LIMIT = 5000
+    MIN_SLICE = datetime.timedelta(minutes=1)
 
-    # Calculate time range
-    now = datetime.datetime.now(datetime.timezone.utc)
-    # Chromium uses microseconds since 1601-01-01
-    epoch_chromium = datetime.datetime(1601, 1, 1, tzinfo=datetime.timezone.utc)
-    # Firefox uses microseconds since 1970-01-01
-    epoch_firefox = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
-    
-    cutoff_dt = now - datetime.timedelta(hours=hours)
-    
-    cutoff_micros_chromium = int((cutoff_dt - epoch_chromium).total_seconds() * 1_000_000)
-    cutoff_micros_firefox = int((cutoff_dt - epoch_firefox).total_seconds() * 1_000_000)
+    def __init__(self, base_url: str, slice_minutes: int = 60, max_workers: int = 4, timeout: int = 30,
+                 pool_size: Optional[int] = None):
+        self.base_url = base_url.rstrip("/")
+        self.slice = datetime.timedelta(minutes=slice_minutes)
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
 
-    for browser in browsers:
-        db_path = browser["path"]
-        
-        # Handle Firefox Profile Globbing
-        if browser["type"] == "firefox" and db_path.exists():
-            # Find the first profile that has places.sqlite
-            found_profiles = list(db_path.glob("*.default*"))
-            if found_profiles:
-                for profile in found_profiles:
-                    p = profile / "places.sqlite"
-                    if p.exists():
-                        db_path = p
-                        break
-        
-        if not db_path.exists():
-            continue
+        # pool_size: for callers that fetch several ranges at once
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size or self.max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
-        temp_db = DATA_DIR / f"temp_{browser['name']}.sqlite"
+        self._buckets = None
+        self._buckets_fetched_at = 0.0
 
-        try:
-            # Shadow Copy
-            shadow_copy_history(db_path, temp_db)
-            
-            conn = sqlite3.connect(str(temp_db))
-            cursor = conn.cursor()
-            
-            if browser["type"] == "chromium":
-                query = f"""
-                    SELECT url, title, last_visit_time 
-                    FROM urls 
-                    WHERE last_visit_time > {cutoff_micros_chromium}
-                    ORDER BY last_visit_time DESC
-                """
-                cursor.execute(query)
-                for row in cursor.fetchall():
-                    url, title, timestamp = row
-                    if is_domain_blocked(url) or not url: continue
-                    
-                    # Convert to ISO String
-                    # dt = epoch_chromium + timedelta(microseconds=timestamp)
-                    # We'll just store the raw string for simplicty or convert
-                    visit_dt = epoch_chromium + datetime.timedelta(microseconds=timestamp)
-                    
-                    history_items.append({
-                        "source": browser["name"],
-                        "timestamp": visit_dt.isoformat(),
-                        "title": sanitize_text(title),
-                        "url": url
-                    })
-                    
-            elif browser["type"] == "firefox":
-                query = f"""
-                    SELECT url, title, last_visit_date 
-                    FROM moz_places 
-                    WHERE last_visit_date > {cutoff_micros_firefox}
-                    ORDER BY last_visit_date DESC
-                """
-                cursor.execute(query)
-                for row in cursor.fetchall():
-                    url, title, timestamp = row
-                    if not timestamp: continue
-                    if is_domain_blocked(url) or not url: continue
-
-                    visit_dt = epoch_firefox + datetime.timedelta(microseconds=timestamp)
-
-                    history_items.append({
-                        "source": browser["name"],
-                        "timestamp": visit_dt.isoformat(),
-                        "title": sanitize_text(title or "No Title"),
-                        "url": url
-                    })
-
-            conn.close()
-            
-        except Exception as e:
-            print(f"Error reading {browser['name']} history: {e}")
-        finally:
-            if temp_db.exists():
-                try:
-                    os.remove(temp_db)
-                except:
-                    pass
+    def get_buckets(self) -> Dict[str, Any]:
+        """Bucket listing, cached for BUCKET_CACHE_TTL seconds."""
+        if self._buckets is None or time.monotonic() - self._buckets_fetched_at > self.BUCKET_CACHE_TTL:
+            response = self.session.get(f"{self.base_url}/api/0/buckets", timeout=self.timeout)
+            response.raise_for_status()
+            self._buckets = response.json()
+            self._buckets_fetched_at = time.monotonic()
+        return self._buckets
 
-    return history_items
+    def find_bucket(self, name: str) -> Optional[str]:
+        return next((b for b in self.get_buckets().keys() if name in b), None)
 
-    def fuse_streams(self, browser_history: List[Dict], window_activity: List[Dict]) -> List[Dict]:
+    def get_events(self, bucket: str, start: datetime.datetime, end: datetime.datetime) -> List[Dict]:
         """
-        [Algorithmic Optimization]
-        Merges Browser History into Window Activity stream.
-        Logic: Matches Window Event to the LATEST Preceding Browser History item 
-        that matches the Title. This handles "Tab Refocus" where the page load 
-        happened hours ago.
+        Fetches all events of a bucket overlapping [start, end), oldest first.
         """
-        def parse_ts(iso_str):
-            try:
-                if not iso_str: return datetime.datetime.min.replace(tzinfo=datetime.timezone.utc)
-                dt = datetime.datetime.fromisoformat(iso_str.replace('Z', '+00:00'))
-                if dt.tzinfo is None:
-                    dt = dt.replace(tzinfo=datetime.timezone.utc)
-                return dt
-            except:
-                return datetime.datetime.min.replace(tzinfo=datetime.timezone.utc)
-
-        # Sort: History (Old -> New), Window (Old -> New)
-        browser_history.sort(key=lambda x: parse_ts(x["timestamp"]))
-        window_activity.sort(key=lambda x: parse_ts(x["timestamp"]))
-
-        fused_timeline = []
-        
-        # We can optimize by keeping a "Cache" of active tabs?
-        # Or simple scan. N=Items. For each Window, scan history up to Window Time.
-        # Since history is sorted, we can maintain a "cursor" but we need to search *backwards* or keep a running map of "Title -> Last URL".
-        # Better: Maintain a `title_map: Dict[str, Dict]` where key is Title (normalized), value is History Item.
-        # As we iterate through TIME, we update the map with new History items.
-        # When we hit a Window event, we check the map.
-        
-        # Merge the two streams into one sorted list of "Events" to process linearly?
-        # Event types: "H" (History), "W" (Window)
-        
-        combined = []
-        for h in browser_history:
-            combined.append({"type": "H", "time": parse_ts(h["timestamp"]), "data": h})
-        for w in window_activity:
-            combined.append({"type": "W", "time": parse_ts(w["timestamp"]), "data": w})
-            
-        combined.sort(key=lambda x: x["time"])
-        
-        # Running State
-        # title_cache maps "sanitized_title" -> "history_item"
-        title_cache = {} 
-        
-        # Helper to normalize titles for fuzzy matching
-        def normalize(t):
-            return t.lower().strip() if t else ""
-
-        for event in combined:
-            if event["type"] == "H":
-                # Update Cache
-                h_item = event["data"]
-                norm_title = normalize(h_item["title"])
-                # Also cache by simple tokens? 
-                # For now, just strict normalized title. 
-                # And maybe "Title - BrowserName" handling.
-                if norm_title:
-                   title_cache[norm_title] = h_item
-                   
-            elif event["type"] == "W":
-                w_item = event["data"]
-                fused_event = w_item.copy()
-                fused_event["type"] = "app"
-                fused_event["details"] = []
-                
-                w_app = w_item["app"].lower()
-                is_browser = any(b in w_app for b in ["chrome", "edge", "firefox", "floorp", "brave"])
-                
-                if is_browser:
-                    w_title = normalize(w_item["title"])
-                    print(f"Processing Window: {w_title[:30]}...") # DEBUG
-                    
-                    # 1. Direct Cache Match
-                    best_match = None
-                    if w_title in title_cache:
-                        best_match = title_cache[w_title]
-                        print("  Exact Match!")
-                    else:
-                        for h_title, h_item in title_cache.items():
-                            if h_title and (h_title in w_title or w_title in h_title):
-                                best_match = h_item
-                                print(f"  Fuzzy Match! {h_title[:30]}...")
-                                break 
-                    
-                    if best_match:
-                        print(f"  Attached URL: {best_match['url']}")
-                        fused_event["type"] = "browse"
-                        fused_event["details"].append({
-                            "url": best_match["url"],
-                            "title": best_match["title"],
-                            "timestamp": best_match["timestamp"]
-                        })
-                    else:
-                        print(f"  NO MATCH found in cache of {len(title_cache)} items.")
-                
-                fused_timeline.append(fused_event)
+        slices = []
+        slice_start = start
+        while slice_start < end:
+            slice_end = min(slice_start + self.slice, end)
+            slices.append((slice_start, slice_end))
+            slice_start = slice_end
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            results = list(pool.map(lambda s: self._fetch_slice(bucket, s[0], s[1]), slices))
+
+        return self._stitch([e for events in results for e in events])
+
+    def _fetch_slice(self, bucket: str, start: datetime.datetime, end: datetime.datetime) -> List[Dict]:
+        response = self.session.get(
+            f"{self.base_url}/api/0/buckets/{bucket}/events",
+            params={"start": start.isoformat(), "end": end.isoformat(), "limit": self.PAGE_LIMIT},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        io_counters.add("requests")
+        io_counters.add("bytes_read", len(response.content))
+        events = response.json()
+
+        # A full page may be truncated: split the slice and fetch both halves
+        if len(events) >= self.PAGE_LIMIT and end - start > self.MIN_SLICE:
+            io_counters.add("retries")
+            mid = start + (end - start) / 2
+            return self._fetch_slice(bucket, start, mid) + self._fetch_slice(bucket, mid, end)
+        return events
+
+    def query(self, start: datetime.datetime, end: datetime.datetime, program: List[str]) -> List[Dict]:
+        """
+        Runs a query2 program server-side, one timeperiod per slice, and
+        returns the stitched result oldest first.
+        """
+        timeperiods = []
+        slice_start = start
+        while slice_start < end:
+            slice_end = min(slice_start + self.slice, end)
+            timeperiods.append(f"{slice_start.isoformat()}/{slice_end.isoformat()}")
+            slice_start = slice_end
 
-        return fused_timeline
+        response = self.session.post(
+            f"{self.base_url}/api/0/query/",
+            json={"timeperiods": timeperiods, "query": program},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        io_counters.add("requests")
+        io_counters.add("bytes_read", len(response.content))
+        # One result list per timeperiod
+        return self._stitch([e for period in response.json() for e in period])
 
-    def sessionize_events(self, timeline: List[Dict], gap_threshold: int = 300) -> List[Dict]:
+    def get_active_window_events(self, window_bucket: str, afk_bucket: str,
+                                 start: datetime.datetime, end: datetime.datetime) -> List[Dict]:
         """
-        [Algorithmic Optimization]
-        Groups consecutive events into 'Sessions' based on App similarity and time proximity.
-        gap_threshold: Seconds. If gap > threshold, break session.
+        Window events restricted to non-AFK time, computed by the AW server.
+        flood() also merges adjacent events with identical app/title, so the
+        transfer is already squashed. There is no duration filter in query2;
+        the < 1.5s noise filter still runs in clean_window_events.
         """
-        sessions = []
-        if not timeline:
+        program = [
+            f'window = flood(query_bucket("{window_bucket}"));',
+            f'afk = flood(query_bucket("{afk_bucket}"));',
+            'not_afk = filter_keyvals(afk, "status", ["not-afk"]);',
+            'events = filter_period_intersect(window, not_afk);',
+            'RETURN = sort_by_timestamp(events);'
+        ]
+        return self.query(start, end, program)
+
+    @staticmethod
+    def _stitch(events: List[Dict]) -> List[Dict]:
+        """
+        Restores chronological order across slices. An event crossing a slice
+        boundary comes back once per slice (possibly cropped to it), so pieces
+        with the same id are joined back into one event.
+        """
+        by_id = {}
+        for e in events:
+            key = e.get("id")
+            if key is None:
+                key = (e["timestamp"], e.get("duration"))
+            prev = by_id.get(key)
+            if prev is None:
+                by_id[key] = e
+                continue
+
+            prev_start = parse_timestamp(prev["timestamp"])
+            cur_start = parse_timestamp(e["timestamp"])
+            first = prev if prev_start <= cur_start else e
+            new_end = max(
+                prev_start + datetime.timedelta(seconds=prev.get("duration", 0)),
+                cur_start + datetime.timedelta(seconds=e.get("duration", 0))
+            )
+            joined = dict(first)
+            joined["duration"] = (new_end - parse_timestamp(first["timestamp"])).total_seconds()
+            by_id[key] = joined
+
+        return sorted(by_id.values(), key=lambda e: parse_timestamp(e["timestamp"]))
+
+aw_client = ActivityWatchClient(config.aw_url, config.aw_slice_minutes, config.aw_max_workers)
+
+def sanitize_window_event(e: Dict) -> Dict:
+    """
+    Applies the privacy filter to a raw AW event before it is cached on disk.
+    """
+    data = e.get("data", {})
+    title = data.get("title", "")
+    filtered = privacy.filter_title(title)
+    if filtered != title:
+        e = dict(e, data=dict(data, title=filtered))
+    return e
+
+def clean_window_events(events: List[Dict]) -> List[Dict[str, Any]]:
+    """
+    Turns chronologically sorted raw AW events into the sensor's window events.
+    Filters short events (< 1.5s) and squashes consecutive duplicates.
+    """
+    cleaned_events = []
+    last_event = None
+
+    for e in events:
+        data = e.get("data", {})
+        app = data.get("app", "")
+        title = data.get("title", "")
+        duration = e.get("duration", 0)
+
+        # Noise Filter: Skip < 1.5s unless it's a browser tab switch (sometimes fast)
+        # Actually, ignore < 1.0s generally to remove alt-tab noise
+        if duration < 1.5:
+            continue
+
+        current_obj = {
+            "timestamp": e["timestamp"],
+            "duration": duration,
+            "app": app,
+            "title": title
+        }
+
+        # Squashing: If same app & title as last event, merge (sum duration)
+        if last_event and last_event["app"] == app and last_event["title"] == title:
+            last_event["duration"] += duration
+            # Should we update timestamp? Usually we keep the start time of the group.
+        else:
+            cleaned_events.append(current_obj)
+            last_event = current_obj
+
+    # Chronological (Oldest -> Newest) as it flows better as a story.
+    return cleaned_events
+
+def sync_window_activity(hours: int = 24, full_refresh: bool = False, use_query: bool = None,
+                         dry_run: bool = False) -> Optional[EventPartitionStore]:
+    """
+    Downloads window events newer than the bucket's persisted watermark from
+    ActivityWatch (aw-watcher-window) into the per-day event cache.
+    full_refresh ignores the watermark and re-fetches the last `hours`.
+
+    use_query (default: aw_query_mode) pushes AFK removal and duplicate merging
+    down to the AW server, so only active window time is transferred.
+
+    Returns the cache the events were written to, or None without a window bucket.
+    With dry_run neither the cache nor the watermark is saved.
+    """
+    end_time = datetime.datetime.now(datetime.timezone.utc)
+    start_time = end_time - datetime.timedelta(hours=hours)
+    if use_query is None:
+        use_query = config.aw_query_mode
+
+    # Locate Bucket
+    window_bucket = aw_client.find_bucket("aw-watcher-window")
+    if not window_bucket:
+        print("Warning: No aw-watcher-window bucket found.")
+        return None
+
+    afk_bucket = aw_client.find_bucket("aw-watcher-afk") if use_query else None
+    if use_query and not afk_bucket:
+        print("Warning: No aw-watcher-afk bucket found. Falling back to raw window events.")
+        use_query = False
+
+    # Query results have no stable ids, so they are cached separately
+    stream = f"aw_query_{window_bucket}" if use_query else f"aw_{window_bucket}"
+    store = EventPartitionStore(stream, dry_run=dry_run)
+    state = load_state()
+    watermarks = state.setdefault("aw_watermarks", {})
+
+    # Resume from the watermark (inclusive): the newest event may still be
+    # growing through heartbeats, so it is fetched again and replaced by id.
+    fetch_start = start_time
+    watermark = watermarks.get(stream)
+    if watermark and not full_refresh:
+        wm_ts = parse_timestamp(watermark["timestamp"])
+        # A deleted cache invalidates the watermark
+        if wm_ts > start_time and store.has_day(wm_ts.astimezone(JST).date()):
+            fetch_start = wm_ts
+
+    # Complete and chronological, however busy the range was
+    if use_query:
+        fetched = aw_client.get_active_window_events(window_bucket, afk_bucket, fetch_start, end_time)
+    else:
+        fetched = aw_client.get_events(window_bucket, fetch_start, end_time)
+    io_counters.add("items_read", len(fetched))
+    new_events = [sanitize_window_event(e) for e in fetched]
+    print(f"Fetched {len(new_events)} new window events since {fetch_start.isoformat()}.")
+
+    if new_events:
+        # Query results are recomputed for the whole range, so they replace it
+        store.append(new_events, replace_from=fetch_start if use_query else None)
+        newest = max(new_events, key=lambda e: parse_timestamp(e["timestamp"]))
+        watermarks[stream] = {"timestamp": newest["timestamp"], "id": newest.get("id")}
+        if not dry_run:
+            save_state(state)
+    store.prune(max(config.cache_retention_days, hours // 24 + 1))
+
+    return store
+
+def fetch_window_range(client: ActivityWatchClient, start: datetime.datetime, end: datetime.datetime,
+                       use_query: bool = False) -> List[Dict]:
+    """
+    Raw window events starting in [start, end), fetched straight from
+    ActivityWatch through `client` without touching the cache or its
+    watermark (for backfills).
+    """
+    window_bucket = client.find_bucket("aw-watcher-window")
+    if not window_bucket:
+        return []
+    afk_bucket = client.find_bucket("aw-watcher-afk") if use_query else None
+    if afk_bucket:
+        fetched = client.get_active_window_events(window_bucket, afk_bucket, start, end)
+    else:
+        fetched = client.get_events(window_bucket, start, end)
+    return [sanitize_window_event(e) for e in fetched if start <= parse_timestamp(e["timestamp"]) < end]
+
+def get_raw_window_activity(hours: int = 24, full_refresh: bool = False, use_query: bool = None,
+                            dry_run: bool = False) -> List[Dict]:
+    """
+    Raw AW window events of the last `hours`, before clean_window_events.
+
+    Incremental: sync_window_activity downloads only what is new since the
+    last run (or daemon cycle), and the requested window is served from the cache.
+    """
+    try:
+        store = sync_window_activity(hours, full_refresh=full_refresh, use_query=use_query, dry_run=dry_run)
+        if store is None:
             return []
-            
-        def parse_ts(iso_str):
+        end_time = datetime.datetime.now(datetime.timezone.utc)
+        start_time = end_time - datetime.timedelta(hours=hours)
+        return store.load(start_time, end_time)
+    except Exception as e:
+        print(f"Failed to connect to ActivityWatch: {e}")
+        return []
+
+def get_window_activity(hours: int = 24, full_refresh: bool = False, use_query: bool = None) -> List[Dict[str, Any]]:
+    """
+    Fetch window events from ActivityWatch (aw-watcher-window), noise-filtered
+    and squashed (see get_raw_window_activity).
+    """
+    return clean_window_events(get_raw_window_activity(hours, full_refresh=full_refresh, use_query=use_query))
+
+# --- Browser History Extraction (Read-only, Shadow Copy fallback) ---
+
+# Removed get_chrome_history_path as it is now integrated into get_browser_history
+
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=1, max=4),
+    retry=retry_if_exception_type(PermissionError)
+)
+def shadow_copy_history(src_path: Path, dest_path: Path):
+    """
+    Attempts to copy the locked SQLite file.
+    Retries on PermissionError (file lock) using tenacity.
+    """
+    try:
+        shutil.copy2(src_path, dest_path)
+    except PermissionError:
+        io_counters.add("retries")
+        print(f"File locked: {src_path}. Retrying...")
+        raise # Triggers retry
+    except Exception as e:
+        print(f"Unexpected error copying history: {e}")
+        raise
+
+@contextmanager
+def open_history_db(db_path: Path, temp_db: Path):
+    """
+    Opens a browser history database for reading without copying it.
+    1. mode=ro: read-only and WAL-aware, so the latest visits are visible.
+    2. immutable=1: ignores the locks a running browser holds (may miss un-checkpointed WAL pages).
+    3. Shadow copy to temp_db: last resort, only if both direct opens fail.
+    Yields (connection, method).
+    """
+    conn = None
+    method = None
+    for params, name in (("mode=ro", "readonly"), ("mode=ro&immutable=1", "immutable")):
+        try:
+            conn = sqlite3.connect(f"{db_path.resolve().as_uri()}?{params}", uri=True, timeout=1)
+            # Opening is lazy: touch the schema to surface locking errors now
+            conn.execute("SELECT count(*) FROM sqlite_master").fetchone()
+            method = name
+            break
+        except sqlite3.Error as e:
+            print(f"Direct {name} open failed for {db_path}: {e}")
+            if conn is not None:
+                conn.close()
+                conn = None
+
+    if conn is None:
+        shadow_copy_history(db_path, temp_db)
+        io_counters.add("retries")
+        io_counters.add("bytes_read", temp_db.stat().st_size)
+        conn = sqlite3.connect(str(temp_db))
+        method = "copy"
+    io_counters.add("requests")
+
+    try:
+        yield conn, method
+    finally:
+        conn.close()
+        if method == "copy" and temp_db.exists():
             try:
-                return datetime.datetime.fromisoformat(iso_str.replace('Z', '+00:00'))
-            except:
-                return datetime.datetime.now(datetime.timezone.utc)
+                os.remove(temp_db)
+            except OSError:
+                pass
 
-        current_session = None
-        
-        for event in timeline:
-            ts = parse_ts(event["timestamp"])
-            duration = event.get("duration", 0)
-            app = event["app"]
-            title = event["title"]
-            details = event.get("details", [])
-            
-            if current_session is None:
-                current_session = {
-                    "start_time": ts,
-                    "end_time": ts + datetime.timedelta(seconds=duration),
-                    "app": app,
-                    "titles": [title],
-                    "urls": [d["url"] for d in details],
-                    "duration": duration,
-                    "event_count": 1
-                }
+# Chromium stores microseconds since 1601-01-01, Firefox since 1970-01-01
+EPOCH_CHROMIUM = datetime.datetime(1601, 1, 1, tzinfo=datetime.timezone.utc)
+EPOCH_FIREFOX = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+# One row per visit (not per URL), so every revisit reaches fuse_streams.
+# v.id is the rowid: "v.id > ?" is an indexed range scan from the cursor.
+# The upper time bound is only set by backfills.
+VISIT_QUERIES = {
+    "chromium": """
+        SELECT v.id, v.visit_time, u.url, u.title
+        FROM visits v JOIN urls u ON u.id = v.url
+        WHERE v.id > ? AND v.visit_time > ? AND v.visit_time <= ?
+        ORDER BY v.id
+    """,
+    "firefox": """
+        SELECT v.id, v.visit_date, p.url, p.title
+        FROM moz_historyvisits v JOIN moz_places p ON p.id = v.place_id
+        WHERE v.id > ? AND v.visit_date > ? AND v.visit_date <= ?
+        ORDER BY v.id
+    """
+}
+NO_UNTIL = 2 ** 62
+MAX_VISIT_ID_QUERIES = {
+    "chromium": "SELECT MAX(id) FROM visits",
+    "firefox": "SELECT MAX(id) FROM moz_historyvisits"
+}
+
+def read_visits(conn: sqlite3.Connection, browser_type: str, source: str, profile_key: str,
+                after_id: int, cutoff: datetime.datetime, batch_size: int = 500,
+                until: Optional[datetime.datetime] = None):
+    """
+    Streams visits newer than after_id (and cutoff, up to until) as history items.
+    Yields (visit_id, item); item is None for rows that are filtered out,
+    so the caller can still advance its cursor past them.
+    """
+    epoch = EPOCH_CHROMIUM if browser_type == "chromium" else EPOCH_FIREFOX
+    cutoff_micros = int((cutoff - epoch).total_seconds() * 1_000_000)
+    until_micros = int((until - epoch).total_seconds() * 1_000_000) if until else NO_UNTIL
+
+    cursor = conn.execute(VISIT_QUERIES[browser_type], (after_id, cutoff_micros, until_micros))
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        io_counters.add("items_read", len(rows))
+        io_counters.add("bytes_read", sum(len(url or "") + len(title or "") + 16 for _, _, url, title in rows))
+        for visit_id, timestamp, url, title in rows:
+            if not timestamp or not url or privacy.is_blocked(url):
+                yield visit_id, None
                 continue
-                
-            # Check conditions to merge
-            # 1. Same App
-            # 2. Gap < Threshold
-            gap = (ts - current_session["end_time"]).total_seconds()
-            
-            if app == current_session["app"] and gap < gap_threshold:
-                # Merge
-                current_session["end_time"] = max(current_session["end_time"], ts + datetime.timedelta(seconds=duration))
-                current_session["duration"] += duration
-                current_session["event_count"] += 1
-                if title not in current_session["titles"]:
-                    current_session["titles"].append(title)
-                for d in details:
-                    if d["url"] not in current_session["urls"]:
-                        current_session["urls"].append(d["url"])
+
+            visit_dt = epoch + datetime.timedelta(microseconds=timestamp)
+            yield visit_id, {
+                "id": f"{profile_key}:{visit_id}",
+                "source": source,
+                "timestamp": visit_dt.isoformat(),
+                "title": privacy.sanitize(title or "No Title"),
+                "url": url
+            }
+
+# History database locations relative to the user's home folder
+BROWSERS = [
+    {"name": "Chrome", "root": "AppData/Local/Google/Chrome/User Data", "type": "chromium"},
+    {"name": "Edge", "root": "AppData/Local/Microsoft/Edge/User Data", "type": "chromium"},
+    {"name": "Firefox", "root": "AppData/Roaming/Mozilla/Firefox/Profiles", "type": "firefox"},
+    {"name": "Floorp", "root": "AppData/Roaming/Floorp/Profiles", "type": "firefox"}
+]
+
+def discover_browser_profiles(home: Path) -> List[Dict]:
+    """
+    Finds every profile of every known browser:
+    Chromium 'User Data/<Default|Profile N|...>/History' and Firefox-family 'Profiles/<id>/places.sqlite'.
+    """
+    profiles = []
+    for browser in BROWSERS:
+        root = home / browser["root"]
+        if not root.is_dir():
+            continue
+        db_name = "History" if browser["type"] == "chromium" else "places.sqlite"
+        for db_path in sorted(root.glob(f"*/{db_name}")):
+            if not db_path.is_file():
+                continue
+            profiles.append({
+                "name": browser["name"],
+                "type": browser["type"],
+                "path": db_path,
+                "key": f"{browser['name']}/{db_path.parent.name}"
+            })
+    return profiles
+
+def read_profile_history(profile: Dict, saved: Optional[Dict], cutoff: datetime.datetime,
+                         store: EventPartitionStore, full_refresh: bool = False) -> Tuple[List[Dict], Optional[Dict]]:
+    """
+    Reads the visits of one browser profile added since its cursor.
+    Runs in a worker thread with its own connection (and temp file, if a copy is needed).
+    Returns (new items oldest first, updated cursor or None).
+    """
+    safe_key = re.sub(r"[^A-Za-z0-9_.-]", "_", profile["key"])
+    temp_db = DATA_DIR / f"temp_{safe_key}.sqlite"
+
+    with open_history_db(profile["path"], temp_db) as (conn, method):
+        after_id = 0
+        if saved and not full_refresh:
+            max_id = conn.execute(MAX_VISIT_ID_QUERIES[profile["type"]]).fetchone()[0] or 0
+            # History cleared (ids restarted) or cache deleted: read the window again
+            cache_ok = not saved.get("timestamp") or store.has_day(
+                parse_timestamp(saved["timestamp"]).astimezone(JST).date())
+            if saved["visit_id"] <= max_id and cache_ok:
+                after_id = saved["visit_id"]
+
+        new_items = []
+        last_id = after_id
+        for visit_id, item in read_visits(conn, profile["type"], profile["name"], profile["key"], after_id, cutoff):
+            last_id = max(last_id, visit_id)
+            if item:
+                new_items.append(item)
+        print(f"Read {len(new_items)} new visits from {profile['key']} ({method}).")
+
+    new_items.sort(key=lambda i: i["timestamp"])
+    cursor = None
+    if last_id > after_id or not saved:
+        newest = new_items[-1]["timestamp"] if new_items else (saved or {}).get("timestamp")
+        cursor = {"visit_id": last_id, "timestamp": newest}
+    return new_items, cursor
+
+def sync_browser_history(hours: int = 24, full_refresh: bool = False, dry_run: bool = False) -> EventPartitionStore:
+    """
+    Reads new visits from every Chrome, Edge, and Firefox/Floorp profile into
+    the per-day browser cache. Opens the databases read-only in place (see open_history_db).
+
+    Profiles are read concurrently in a bounded thread pool, and their new
+    visits are k-way merged by timestamp. A cursor (last visit id) is persisted
+    per profile, so each call reads only visits added since the previous one.
+    With dry_run neither the cache nor the cursors are saved.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cutoff_dt = now - datetime.timedelta(hours=hours)
+
+    store = EventPartitionStore("browser", dry_run=dry_run)
+    state = load_state()
+    cursors = state.setdefault("browser_cursors", {})
+
+    profiles = discover_browser_profiles(Path.home())
+    per_profile = []
+    if profiles:
+        with ThreadPoolExecutor(max_workers=max(1, config.browser_max_workers)) as pool:
+            futures = {
+                pool.submit(read_profile_history, p, cursors.get(p["key"]), cutoff_dt, store, full_refresh): p
+                for p in profiles
+            }
+            for future, profile in futures.items():
+                try:
+                    new_items, cursor = future.result()
+                except Exception as e:
+                    print(f"Error reading {profile['key']} history: {e}")
+                    continue
+                per_profile.append(new_items)
+                if cursor:
+                    cursors[profile["key"]] = cursor
+
+    # Each profile's list is sorted, so a k-way merge keeps the stream chronological
+    store.append(list(heapq.merge(*per_profile, key=lambda i: i["timestamp"])))
+    if not dry_run:
+        save_state(state)
+    store.prune(max(config.cache_retention_days, hours // 24 + 1))
+    return store
+
+def read_history_range(start: datetime.datetime, end: datetime.datetime) -> List[Dict]:
+    """
+    Visits of every profile in [start, end), oldest first, read without
+    cursors or cache (for backfills).
+    """
+    def read_profile(profile):
+        safe_key = re.sub(r"[^A-Za-z0-9_.-]", "_", profile["key"])
+        with open_history_db(profile["path"], DATA_DIR / f"temp_backfill_{safe_key}.sqlite") as (conn, method):
+            items = [item for _, item in read_visits(conn, profile["type"], profile["name"], profile["key"],
+                                                     0, start, until=end) if item]
+        print(f"Read {len(items)} visits from {profile['key']} ({method}).")
+        return sorted(items, key=lambda i: i["timestamp"])
+
+    per_profile = []
+    profiles = discover_browser_profiles(Path.home())
+    if profiles:
+        with ThreadPoolExecutor(max_workers=max(1, config.browser_max_workers)) as pool:
+            futures = {pool.submit(read_profile, p): p for p in profiles}
+            for future, profile in futures.items():
+                try:
+                    per_profile.append(future.result())
+                except Exception as e:
+                    print(f"Error reading {profile['key']} history: {e}")
+    return list(heapq.merge(*per_profile, key=lambda i: i["timestamp"]))
+
+def get_browser_history(hours: int = 24, full_refresh: bool = False, dry_run: bool = False) -> List[Dict]:
+    """
+    Browser visits of the last `hours`, served from the cache after
+    sync_browser_history has read whatever is new.
+    """
+    store = sync_browser_history(hours, full_refresh=full_refresh, dry_run=dry_run)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return store.load(now - datetime.timedelta(hours=hours), now)
+
+class TitleIndex:
+    """
+    Index of normalized browser history titles for fuse_streams.
+
+    A window title matches a history title when one contains the other.
+    Instead of scanning every cached title, candidates come from two indexes
+    and are then verified with a real substring check:
+      - history title inside window title: for every PREFIX_LEN-char prefix,
+        the set of title lengths starting with it. Probing each offset of the
+        window title then costs one dict lookup per distinct length instead
+        of one comparison per title (shorter titles are looked up directly
+        as window-title substrings);
+      - window title inside history title: postings of every GRAM_LEN-gram,
+        of which only the rarest gram of the window title is verified.
+    Among all matches the most recently added title (= latest preceding
+    history item, since items are added in time order) wins.
+    """
+    PREFIX_LEN = 8
+    GRAM_LEN = 4
+
+    def __init__(self):
+        self.latest: Dict[str, Dict] = {}
+        self.rank: Dict[str, int] = {}
+        self.by_prefix: Dict[str, set] = {}
+        self.by_gram: Dict[str, List[str]] = {}
+        self.short_lengths = set()
+        self._counter = 0
+
+    def add(self, title: str, item: Dict):
+        if title not in self.latest:
+            if len(title) >= self.PREFIX_LEN:
+                self.by_prefix.setdefault(title[:self.PREFIX_LEN], set()).add(len(title))
             else:
-                # Seal current session
-                current_session["start_time"] = current_session["start_time"].isoformat()
-                current_session["end_time"] = current_session["end_time"].isoformat()
-                sessions.append(current_session)
-                
-                # Start new
-                current_session = {
-                    "start_time": ts,
-                    "end_time": ts + datetime.timedelta(seconds=duration),
-                    "app": app,
-                    "titles": [title],
-                    "urls": [d["url"] for d in details],
-                    "duration": duration,
-                    "event_count": 1
-                }
-        
-        # Append last
-        if current_session:
-            current_session["start_time"] = current_session["start_time"].isoformat()
-            current_session["end_time"] = current_session["end_time"].isoformat()
-            sessions.append(current_session)
-            
-        return sessions
+                self.short_lengths.add(len(title))
+            for gram in {title[i:i + self.GRAM_LEN] for i in range(len(title) - self.GRAM_LEN + 1)}:
+                self.by_gram.setdefault(gram, []).append(title)
+        self.latest[title] = item
+        self._counter += 1
+        self.rank[title] = self._counter
 
-# --- Main Execution ---
-def main(hours=24, dry_run=False):
-    print(f"--- Starting Sensor (Last {hours} hours) ---")
-    
-    # Instance
-    sensor = GlobalSensor()
-    
-    # 1. Fetch Streams
-    history = sensor.get_browser_history(hours)
-    print(f"Extracted {len(history)} browser items.")
-    
-    events = sensor.get_window_activity(hours)
-    print(f"Extracted {len(events)} window events.")
-    
-    # 2. Algorithmic Fusion & Sessionization
-    print("Fusing streams...")
-    fused = sensor.fuse_streams(history, events)
-    
-    print("Sessionizing events...")
-    sessions = sensor.sessionize_events(fused)
-    print(f"Compressed into {len(sessions)} high-level sessions.")
-    
-    # 3. Save
-    # Use JST (Japan Standard Time, UTC+9) for logging
-    jst = datetime.timezone(datetime.timedelta(hours=9))
-    now_jst = datetime.datetime.now(jst)
-    
-    payload = {
-        "date": now_jst.isoformat(),
-        "timeline": sessions, # Optimized format
-        # "raw_window": events, # Optional: Keep raw if needed for debug, but user wants optimized
-        # "raw_browser": history 
-    }
-    
-    if dry_run:
-        print("Dry Run: Not saving files.")
-        # print(json.dumps(payload, indent=2, ensure_ascii=False))
-    else:
-        filename = f"sensor_log_{now_jst.strftime('%Y%m%d_%H%M%S')}.json"
-        filepath = LOGS_DIR / filename
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(payload, f, indent=2, ensure_ascii=False)
-        print(f"Saved to {filepath}")
+    def lookup(self, title: str) -> Optional[Dict]:
+        if not title:
+            return None
+        if title in self.latest:
+            return self.latest[title]
+
+        rank = self.rank
+        best, best_rank = None, 0
+
+        # History title contained in the window title
+        n = len(title)
+        for i in range(n - self.PREFIX_LEN + 1):
+            for length in self.by_prefix.get(title[i:i + self.PREFIX_LEN], ()):
+                if i + length <= n:
+                    h_title = title[i:i + length]
+                    h_rank = rank.get(h_title, 0)
+                    if h_rank > best_rank:
+                        best, best_rank = h_title, h_rank
+        for length in self.short_lengths:
+            for i in range(len(title) - length + 1):
+                h_title = title[i:i + length]
+                if h_title in rank and rank[h_title] > best_rank:
+                    best, best_rank = h_title, rank[h_title]
+
+        # Window title contained in a history title
+        if len(title) >= self.GRAM_LEN:
+            postings = []
+            for i in range(len(title) - self.GRAM_LEN + 1):
+                gram_postings = self.by_gram.get(title[i:i + self.GRAM_LEN])
+                if gram_postings is None:
+                    postings = []
+                    break
+                postings.append(gram_postings)
+            candidates = min(postings, key=len) if postings else ()
+        else:
+            # Too short for a gram; only very short window titles get here
+            candidates = self.latest
+        for h_title in candidates:
+            if rank[h_title] > best_rank and title in h_title:
+                best, best_rank = h_title, rank[h_title]
+
+        return self.latest[best] if best is not None else None
 
 # Helper Class Wrapper to make methods strictly static or instance
 class GlobalSensor:
@@ -630,12 +1515,8 @@ class GlobalSensor:
         self.temp_dir = DATA_DIR
         
     def _is_sensitive(self, text, app_name=""):
-        # Wrapper for existing global is_domain_blocked / sensitive_keywords check
-        if is_domain_blocked(text): return True
-        # Check global config
-        for k in config.sensitive_keywords:
-            if k and k in text: return True
-        return False
+        # Wrapper for the shared privacy filter (blocked domains / sensitive keywords)
+        return privacy.is_sensitive(text)
 
     # Attach previous methods here or refactor. 
     # For minimal diff, I will just assign the global functions to this class or call them.
@@ -659,312 +1540,726 @@ class GlobalSensor:
         return sessionize_events(t)
 
 # Redefining logic as standalone functions to match existing style
-def fuse_streams(browser_history: List[Dict], window_activity: List[Dict]) -> List[Dict]:
+BROWSER_APPS = ["chrome", "edge", "firefox", "floorp", "brave"]
+
+class HistoryMatcher:
     """
     [Algorithmic Optimization]
-    Merges Browser History into Window Activity stream.
-    Logic: Matches Window Event to the LATEST Preceding Browser History item 
-    that matches the Title. This handles "Tab Refocus" where the page load 
-    happened hours ago.
+    For each window event, finds the LATEST Preceding Browser History item
+    whose title matches the window title (exactly, or one containing the
+    other). This handles "Tab Refocus" where the page load happened hours
+    ago. Lookups go through TitleIndex, so they do not scan the whole history.
+
+    Windows are matched chunk by chunk in time order (each chunk sorted by
+    start, none earlier than the previous one); history items are indexed as
+    the windows pass them, so the state carries over from chunk to chunk.
     """
-    def parse_ts(iso_str):
-        try:
-            if not iso_str: return datetime.datetime.min.replace(tzinfo=datetime.timezone.utc)
-            dt = datetime.datetime.fromisoformat(iso_str.replace('Z', '+00:00'))
-            if dt.tzinfo is None: dt = dt.replace(tzinfo=datetime.timezone.utc)
-            return dt
-        except:
-            return datetime.datetime.min.replace(tzinfo=datetime.timezone.utc)
-
-    # Sort
-    browser_history.sort(key=lambda x: parse_ts(x["timestamp"]))
-    window_activity.sort(key=lambda x: parse_ts(x["timestamp"]))
-
-    combined = []
-    for h in browser_history:
-        combined.append({"type": "H", "time": parse_ts(h["timestamp"]), "data": h})
-    for w in window_activity:
-        combined.append({"type": "W", "time": parse_ts(w["timestamp"]), "data": w})
-        
-    combined.sort(key=lambda x: x["time"])
-    
-    title_cache = {} 
-    
+    def __init__(self, browser_history: List[Dict]):
+        def parse_us(iso_str):
+            try:
+                return event_columns.to_epoch_us(iso_str)
+            except (TypeError, ValueError, AttributeError):
+                return -2 ** 62
+
+        self.history = sorted(((parse_us(h.get("timestamp")), i, h) for i, h in enumerate(browser_history)),
+                              key=lambda x: (x[0], x[1]))
+        self.next_item = 0
+        self.title_index = TitleIndex()
+        # Per distinct string id, computed once
+        self.is_browser: Dict[int, bool] = {}
+        self.norm_titles: Dict[int, str] = {}
+
+    @staticmethod
     def normalize(t):
         return t.lower().strip() if t else ""
 
-    fused_timeline = []
+    def match(self, windows: EventColumns) -> List[Optional[Dict]]:
+        """The matched history item (or None) of each window event."""
+        strings = windows.strings.values
+        history = self.history
+        is_browser, norm_titles = self.is_browser, self.norm_titles
+        matches = []
+        j = self.next_item
+        for start, app_id, title_id in zip(windows.start.tolist(), windows.app.tolist(), windows.title.tolist()):
+            # History items at the same instant come first
+            while j < len(history) and history[j][0] <= start:
+                h_item = history[j][2]
+                norm_title = self.normalize(h_item["title"])
+                if norm_title:
+                    self.title_index.add(norm_title, h_item)
+                j += 1
 
-    for event in combined:
-        if event["type"] == "H":
-            h_item = event["data"]
-            norm_title = normalize(h_item["title"])
-            if norm_title:
-               title_cache[norm_title] = h_item
-               
-        elif event["type"] == "W":
-            w_item = event["data"]
-            fused_event = w_item.copy()
-            fused_event["type"] = "app"
-            fused_event["details"] = []
-            
-            w_app = w_item["app"].lower()
-            is_browser = any(b in w_app for b in ["chrome", "edge", "firefox", "floorp", "brave"])
-            
-            if is_browser:
-                w_title = normalize(w_item["title"])
-                # print(f"Processing Window: {w_title[:30]}...") 
-                
-                best_match = None
-                if w_title in title_cache:
-                    best_match = title_cache[w_title]
-                    # print("  Exact Match!")
-                else:
-                    for h_title, h_item in title_cache.items():
-                        if h_title and (h_title in w_title or w_title in h_title):
-                            best_match = h_item
-                            # print(f"  Fuzzy Match! {h_title[:30]}...")
-                            break 
-                
-                if best_match:
-                    # print(f"  Attached URL: {best_match['url']}")
-                    fused_event["type"] = "browse"
-                    fused_event["details"].append({
-                        "url": best_match["url"],
-                        "title": best_match["title"],
-                        "timestamp": best_match["timestamp"]
-                    })
-            
-            fused_timeline.append(fused_event)
+            if app_id not in is_browser:
+                w_app = strings[app_id].lower()
+                is_browser[app_id] = any(b in w_app for b in BROWSER_APPS)
+            if not is_browser[app_id]:
+                matches.append(None)
+                continue
+
+            if title_id not in norm_titles:
+                norm_titles[title_id] = self.normalize(strings[title_id])
+            matches.append(self.title_index.lookup(norm_titles[title_id]))
+        self.next_item = j
+        return matches
+
+def match_browser_history(browser_history: List[Dict], windows: EventColumns) -> List[Optional[Dict]]:
+    """Matches of windows (sorted by start) against browser_history; see HistoryMatcher."""
+    return HistoryMatcher(browser_history).match(windows)
+
+def iter_fused(browser_history: List[Dict], chunks: Iterable[EventColumns]) -> Iterator[EventColumns]:
+    """
+    Streaming fuse: sets each window event's url to the matched browser
+    history item. The chunks must be in time order (see HistoryMatcher).
+    """
+    matcher = HistoryMatcher(browser_history)
+    for chunk in chunks:
+        chunk.url = np.fromiter(
+            (chunk.strings.intern(m["url"]) if m else event_columns.NO_ID for m in matcher.match(chunk)),
+            dtype=np.int32, count=len(chunk)
+        )
+        yield chunk
+
+def fuse_streams(browser_history: List[Dict], window_activity: List[Dict]) -> List[Dict]:
+    """
+    Merges Browser History into Window Activity stream (dict interface).
+    Each window event gets type "browse" with the matched history item in
+    "details", or type "app".
+    """
+    windows = EventColumns.from_events(window_activity)
+    order = np.argsort(windows.start, kind="stable")
+    matches = match_browser_history(browser_history, windows.take(order))
+
+    fused_timeline = []
+    for idx, best_match in zip(order.tolist(), matches):
+        fused_event = window_activity[idx].copy()
+        fused_event["type"] = "app"
+        fused_event["details"] = []
+        if best_match:
+            fused_event["type"] = "browse"
+            fused_event["details"].append({
+                "url": best_match["url"],
+                "title": best_match["title"],
+                "timestamp": best_match["timestamp"]
+            })
+        fused_timeline.append(fused_event)
 
     return fused_timeline
 
-def sessionize_events(timeline: List[Dict], gap_threshold: int = 300) -> List[Dict]:
-    sessions = []
-    if not timeline: return []
-        
-    def parse_ts(iso_str):
-        try:
-            return datetime.datetime.fromisoformat(iso_str.replace('Z', '+00:00'))
-        except:
-            return datetime.datetime.now(datetime.timezone.utc)
+def _stream_ts(iso_str) -> datetime.datetime:
+    try:
+        return parse_timestamp(iso_str)
+    except (TypeError, ValueError, AttributeError):
+        return datetime.datetime.min.replace(tzinfo=datetime.timezone.utc)
 
-    current_session = None
-    
-    for event in timeline:
-        ts = parse_ts(event["timestamp"])
-        duration = event.get("duration", 0)
-        app = event["app"]
-        title = event["title"]
-        details = event.get("details", [])
-        
-        if current_session is None:
-            current_session = {
-                "start_time": ts,
-                "end_time": ts + datetime.timedelta(seconds=duration),
-                "app": app,
-                "titles": [title],
-                "urls": [d["url"] for d in details],
-                "duration": duration,
-                "event_count": 1
-            }
+def iter_canonical_visits(browser_history: Iterable[Dict], window_seconds: Optional[float] = None) -> Iterator[Dict]:
+    """
+    Streaming canonicalization of time-sorted history items: each item's url
+    is canonicalized (canonicalize_url), and visits of a canonical URL with
+    the same title within window_seconds (default: visit_dedupe_seconds) of
+    the one that opened their group are folded into it. Titles stay apart so
+    hash-routed / single-page apps keep every page title for matching. The
+    kept item carries "visit_count"; it is yielded when its group opens and
+    counted up afterwards.
+    """
+    if window_seconds is None:
+        window_seconds = config.visit_dedupe_seconds
+    window = datetime.timedelta(seconds=window_seconds)
+    open_groups: Dict[Tuple[str, str], Tuple[datetime.datetime, Dict]] = {}
+    purge_at = 4096
+
+    for item in browser_history:
+        url = canonicalize_url(item.get("url"))
+        key = (url, item.get("title") or "")
+        ts = _stream_ts(item.get("timestamp"))
+        group = open_groups.get(key)
+        if group is not None and ts - group[0] < window:
+            group[1]["visit_count"] += 1
             continue
-            
-        gap = (ts - current_session["end_time"]).total_seconds()
-        
-        if app == current_session["app"] and gap < gap_threshold:
-            current_session["end_time"] = max(current_session["end_time"], ts + datetime.timedelta(seconds=duration))
-            current_session["duration"] += duration
-            current_session["event_count"] += 1
-            if title not in current_session["titles"]:
-                current_session["titles"].append(title)
-            for d in details:
-                if d["url"] not in current_session["urls"]:
-                    current_session["urls"].append(d["url"])
-        else:
-            current_session["start_time"] = current_session["start_time"].isoformat()
-            current_session["end_time"] = current_session["end_time"].isoformat()
-            sessions.append(current_session)
-            current_session = {
-                "start_time": ts,
-                "end_time": ts + datetime.timedelta(seconds=duration),
-                "app": app,
-                "titles": [title],
-                "urls": [d["url"] for d in details],
-                "duration": duration,
-                "event_count": 1
-            }
-    
-    if current_session:
-        current_session["start_time"] = current_session["start_time"].isoformat()
-        current_session["end_time"] = current_session["end_time"].isoformat()
-        sessions.append(current_session)
-        
-    return sessions
 
-def compress_sessions(sessions: List[Dict], interruption_threshold: int = 60, noise_threshold: int = 2) -> List[Dict]:
+        # Drop groups that can no longer absorb anything, so memory stays bounded
+        if len(open_groups) >= purge_at:
+            open_groups = {k: g for k, g in open_groups.items() if ts - g[0] < window}
+            purge_at = max(4096, 2 * len(open_groups))
+        kept = dict(item, url=url, visit_count=1)
+        if window_seconds > 0:
+            open_groups[key] = (ts, kept)
+        yield kept
+
+def sessionize_events(timeline: List[Dict], gap_threshold: int = 300, top_k: int = TOP_K) -> List[Dict]:
+    """
+    Groups consecutive events of the same app (gap < gap_threshold seconds)
+    into sessions. Dict interface over event_columns.iter_sessions.
+    """
+    chunks = event_columns.iter_chunks(EventColumns.from_events(timeline))
+    return [s.to_dict(top_k) for s in event_columns.iter_sessions(chunks, gap_threshold, top_k)]
+
+def compress_sessions(sessions: List[Dict], interruption_threshold: int = 60, noise_threshold: int = 2,
+                      top_k: int = TOP_K) -> List[Dict]:
     """
     [Optimization]
     Further compresses sessions by:
     1. Filtering short 'noise' sessions (< noise_threshold seconds)
     2. Merging A-B-A patterns (Interruption Merging) where B < interruption_threshold seconds.
+    Dict interface over event_columns.iter_without_noise / iter_merged_interruptions.
     """
-    if not sessions: return []
+    strings = StringTable()
+    records = (Session.from_dict(s, strings, top_k) for s in sessions)
+    merged = event_columns.iter_merged_interruptions(
+        event_columns.iter_without_noise(records, noise_threshold), interruption_threshold)
+    return [s.to_dict(top_k) for s in merged]
 
-    # Pass 1: Filter Noise
-    # Be careful: if we remove too much we might lose context. 
-    # Only remove if it's very short and "not meaningful"? for now just duration.
-    cleaned = [s for s in sessions if s["duration"] >= noise_threshold]
-    
-    # If everything was noise, return empty or keep original?
-    # Let's keep at least something if it's all empty? No, noise is noise.
-    if not cleaned and sessions: 
-        # Fallback: if we aggressively removed everything, maybe just keep original
-        pass 
-
-    sessions = cleaned
-    if not sessions: return []
-
-    # Pass 2: Merge A-B-A
-    # Traverse and build a new list.
-    # Since merging might cascade (A-B-A-B-A -> A), we might need a while loop or multi-pass.
-    # Single pass A-B-A merge:
-    
-    merged_sessions = []
-    
-    i = 0
-    while i < len(sessions):
-        current = sessions[i]
-        
-        # Look ahead for A-B-A pattern
-        # We need at least 3 items: i, i+1, i+2
-        if i + 2 < len(sessions):
-            next_s = sessions[i+1]
-            next_next_s = sessions[i+2]
-            
-            # Check pattern: App A -> App B -> App A
-            if (current["app"] == next_next_s["app"] and 
-                next_s["duration"] < interruption_threshold):
-                
-                # Merge current + next + next_next
-                # "current" becomes the master.
-                
-                # Update End Time
-                current["end_time"] = next_next_s["end_time"]
-                
-                # Update Duration (include the gap/interruption duration? Yes, distinct from active duration)
-                # Actually, simple sum of durations?
-                # Total span = (End of A2 - Start of A1). 
-                # Active duration = A1.dur + B.dur + A2.dur
-                current["duration"] += next_s["duration"] + next_next_s["duration"]
-                
-                # Merge Titles & URLs
-                for t in next_s["titles"] + next_next_s["titles"]:
-                    if t not in current["titles"]: current["titles"].append(t)
-                    
-                for u in next_s["urls"] + next_next_s["urls"]:
-                    if u not in current["urls"]: current["urls"].append(u)
-                    
-                current["event_count"] += next_s["event_count"] + next_next_s["event_count"]
-                
-                # Note: We consume i+1 and i+2. 
-                # But wait, what if we have A-B-A-B-A?
-                # After merging, we are at 'new A'. We should re-evaluate starting from this 'new A' 
-                # because it might be followed by another B-A.
-                # So we do NOT advance i yet, instead we update sessions[i] and remove i+1, i+2
-                sessions[i] = current
-                sessions.pop(i+1)
-                sessions.pop(i+1) # Original i+2 is now i+1
-                continue # Retry checks on the new merged session
-                
-        merged_sessions.append(current)
-        i += 1
-        
-    return merged_sessions
+def build_timeline(browser_history: List[Dict], window_events: List[Dict], **kwargs) -> List[Dict]:
+    """
+    fuse -> sessionize -> compress on the columnar representation.
+    Timestamps are parsed once here; dicts are only built for the result.
+    """
+    return build_timeline_columns(browser_history, EventColumns.from_events(window_events), **kwargs)
+
+def build_timeline_columns(browser_history: List[Dict], windows: EventColumns, gap_threshold: int = 300,
+                           interruption_threshold: int = 60, noise_threshold: int = 2, top_k: int = TOP_K,
+                           recorder: Optional[sensor_metrics.StageRecorder] = None) -> List[Dict]:
+    """
+    canonicalize -> iter_fused -> iter_sessions -> iter_without_noise ->
+    iter_merged_interruptions over chunks of the sorted windows. Each stage's
+    output is collected before the next one runs, so recorder (if given)
+    times the canonicalize / fuse / sessionize / compress stages one by one;
+    the fused chunks are views of windows and the sessions are far fewer
+    than the events.
+    """
+    recorder = recorder or sensor_metrics.StageRecorder(io_counters)
+    with recorder.stage("canonicalize", items_in=len(browser_history)) as stage:
+        ordered = sorted(browser_history, key=lambda h: _stream_ts(h.get("timestamp")))
+        browser_history = list(iter_canonical_visits(ordered))
+        stage["items_out"] = len(browser_history)
+    with recorder.stage("fuse", items_in=len(windows)) as stage:
+        fused = list(iter_fused(browser_history, event_columns.iter_chunks(windows.sorted())))
+        stage["items_out"] = sum(len(chunk) for chunk in fused)
+        stage["matched"] = sum(int(np.count_nonzero(chunk.url != event_columns.NO_ID)) for chunk in fused)
+    with recorder.stage("sessionize", items_in=len(windows)) as stage:
+        sessions = list(event_columns.iter_sessions(fused, gap_threshold=gap_threshold, top_k=top_k))
+        stage["items_out"] = len(sessions)
+    print(f"Initial Sessions: {len(sessions)}")
+    with recorder.stage("compress", items_in=len(sessions)) as stage:
+        merged = event_columns.iter_merged_interruptions(
+            event_columns.iter_without_noise(sessions, noise_threshold=noise_threshold),
+            interruption_threshold=interruption_threshold)
+        timeline = [s.to_dict(top_k) for s in merged]
+        stage["items_out"] = len(timeline)
+    return timeline
+
+def replay_day(day: datetime.date, archive: Optional[EventArchive] = None, **thresholds) -> Optional[List[Dict]]:
+    """
+    Rebuilds a day's timeline from data/archive (None if the day was never
+    archived). The archived raw window events go through clean_window_events
+    again, and the previous day's browser history is included, so tabs
+    refocused after midnight still match the page they were opened on.
+    """
+    archive = archive or EventArchive(ARCHIVE_DIR)
+    archived = archive.load_day(day)
+    if archived is None:
+        return None
+    history = archived.history_items()
+    previous = archive.load_day(day - datetime.timedelta(days=1))
+    if previous is not None:
+        history = previous.history_items() + history
+    return build_timeline(history, clean_window_events(archived.window_events()), **thresholds)
+
+def parse_replay_days(specs: List[str], archive: EventArchive) -> List[datetime.date]:
+    """YYYYMMDD, YYYYMMDD:YYYYMMDD (inclusive) or 'all' -> archived days."""
+    available = archive.days()
+    days = set()
+    for spec in specs:
+        if spec == "all":
+            days.update(available)
+            continue
+        first, _, last = spec.partition(":")
+        start = datetime.datetime.strptime(first, "%Y%m%d").date()
+        end = datetime.datetime.strptime(last, "%Y%m%d").date() if last else start
+        days.update(d for d in available if start <= d <= end)
+    return sorted(days)
+
+def run_replay(specs: List[str], dry_run: bool = False, **thresholds):
+    """Re-sessionizes archived days and writes one sensor log per day."""
+    archive = EventArchive(ARCHIVE_DIR)
+    days = parse_replay_days(specs, archive)
+    print(f"--- Replaying {len(days)} archived day(s) ---")
+    for day in days:
+        started = time.perf_counter()
+        sessions = replay_day(day, archive, **thresholds)
+        print(f"{day.isoformat()}: {len(sessions)} sessions in {time.perf_counter() - started:.2f}s")
+        if dry_run:
+            continue
+        # Stamped at the end of the day, so a replay replaces an earlier replay of it
+        stamp = f"{day.strftime('%Y%m%d')}_235959"
+        date = datetime.datetime.combine(day, datetime.time(23, 59, 59), tzinfo=JST).isoformat()
+        status = {"browser": "archived", "window": "archived", "git": "skipped",
+                  "diagnostics": [], "replay": thresholds}
+        with SensorLogWriter(LOGS_DIR / sensor_log.log_filename(stamp, config.machine_id), date,
+                             {"machine": config.machine_id}) as writer:
+            writer.write_sessions(sessions)
+            writer.write_status(status)
+
+def backfill_day(client: ActivityWatchClient, day: datetime.date, history: List[Dict], git_activity: List[Dict],
+                 status: Dict[str, Any], now: datetime.datetime, dry_run: bool = False, aw_query: bool = False) -> int:
+    """
+    Collects one day of a backfill from ActivityWatch (through `client`) and
+    writes its log, stamped like a replay (YYYYMMDD_235959) so a rerun
+    replaces it. `history` covers the day and the one before (for refocused
+    tabs); `status` comes with the browser/git results.
+    Returns the number of sessions.
+    """
+    start = datetime.datetime.combine(day, datetime.time(), tzinfo=JST)
+    end = min(start + datetime.timedelta(days=1), now)
+    # Timeline stages only: the collectors' counters are shared by all days
+    recorder = sensor_metrics.StageRecorder(sensor_metrics.Counters())
 
-def main(hours=24, dry_run=False):
-    print(f"--- Starting Sensor (Last {hours} hours) ---")
-    
-    status = {
-        "browser": "pending",
-        "window": "pending",
-        "git": "pending",
-        "diagnostics": []
-    }
-    
-    # 1. Fetch Streams
-    history = []
-    try:
-        history = get_browser_history(hours)
-        print(f"Extracted {len(history)} browser items.")
-        status["browser"] = "ok"
-    except Exception as e:
-        status["browser"] = "failed"
-        status["diagnostics"].append(f"Browser extraction failed: {e}")
-        print(f"Error: {e}")
-    
     events = []
     try:
-        events = get_window_activity(hours)
-        print(f"Extracted {len(events)} window events.")
+        raw = fetch_window_range(client, start, end, use_query=aw_query)
+        events = clean_window_events(raw)
         status["window"] = "ok"
     except Exception as e:
+        raw = []
         status["window"] = "failed"
         status["diagnostics"].append(f"Window activity extraction failed: {e}")
-        print(f"Error: {e}")
-    
-    # 2. Algorithmic Fusion & Sessionization
+
+    day_history = [h for h in history if parse_timestamp(h["timestamp"]) >= start]
+    if not dry_run and (raw or day_history):
+        try:
+            EventArchive(ARCHIVE_DIR).update(raw, day_history, start, end)
+        except Exception as e:
+            status["diagnostics"].append(f"Archiving raw events failed: {e}")
+
     sessions = []
     if events:
         try:
-            print("Fusing streams...")
-            fused = fuse_streams(history, events)
-            
-            print("Sessionizing events...")
-            sessions = sessionize_events(fused)
-            print(f"Initial Sessions: {len(sessions)}")
-            
-            print("Compressing timeline (A-B-A merge & Noise filter)...")
-            sessions = compress_sessions(sessions)
-            print(f"Compressed into {len(sessions)} high-level sessions.")
+            sessions = build_timeline(history, events, recorder=recorder)
         except Exception as e:
             status["diagnostics"].append(f"Processing failed: {e}")
-            print(f"Error: {e}")
-    
-    # 3. Fetch Git Activity
-    git_activity = []
+    status["stages"] = recorder.to_dict()
+
+    if not dry_run:
+        stamp = f"{day.strftime('%Y%m%d')}_235959"
+        date = datetime.datetime.combine(day, datetime.time(23, 59, 59), tzinfo=JST).isoformat()
+        with SensorLogWriter(LOGS_DIR / sensor_log.log_filename(stamp, config.machine_id), date,
+                             {"machine": config.machine_id}) as writer:
+            writer.write_sessions(sessions)
+            for repo_activity in git_activity:
+                writer.write_git(repo_activity)
+            writer.write_status(status)
+    return len(sessions)
+
+def run_backfill(since: datetime.date, until: datetime.date, dry_run: bool = False, aw_query: bool = False):
+    """
+    Collects the days since..until (inclusive) straight from the sources and
+    writes one log per day. Browser history and git are read once for the
+    whole range; the days are then fetched from ActivityWatch and sessionized
+    concurrently (backfill_max_workers).
+    """
+    now = datetime.datetime.now(JST)
+    until = min(until, now.date())
+    days = [since + datetime.timedelta(days=i) for i in range((until - since).days + 1)]
+    if not days:
+        print("Nothing to backfill.")
+        return
+    range_start = datetime.datetime.combine(since, datetime.time(), tzinfo=JST)
+    range_end = min(datetime.datetime.combine(until, datetime.time(), tzinfo=JST) + datetime.timedelta(days=1), now)
+    backfill = {"since": since.isoformat(), "until": until.isoformat()}
+    print(f"--- Backfilling {len(days)} day(s): {backfill['since']} .. {backfill['until']} ---")
+
+    with sensor_lock(wait=300) as locked:
+        if not locked:
+            print("Warning: sensor lock is busy; backfilling anyway.")
+
+        history, browser_status, browser_diagnostics = [], "ok", []
+        try:
+            # One extra day, so tabs refocused after midnight still match
+            history = read_history_range(range_start - datetime.timedelta(days=1), range_end)
+        except Exception as e:
+            browser_status = "failed"
+            browser_diagnostics.append(f"Browser extraction failed: {e}")
+
+        git_status = "ok"
+        try:
+            git_by_day, git_diagnostics = get_git_activity_by_day(range_start, range_end, dry_run=dry_run)
+        except Exception as e:
+            git_by_day, git_status = {}, "failed"
+            git_diagnostics = [f"Git activity extraction failed: {e}"]
+
+        workers = max(1, config.backfill_max_workers)
+        # Each day fetches its own slices: size the connection pool for all of them
+        client = ActivityWatchClient(config.aw_url, config.aw_slice_minutes, config.aw_max_workers,
+                                     pool_size=workers * max(1, config.aw_max_workers))
+        # Parsed once: ISO strings only sort correctly when their offsets agree
+        stamped = [(parse_timestamp(h["timestamp"]), h) for h in history]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = []
+            for day in days:
+                day_start = datetime.datetime.combine(day, datetime.time(), tzinfo=JST)
+                lo, hi = day_start - datetime.timedelta(days=1), day_start + datetime.timedelta(days=1)
+                status = {"browser": browser_status, "window": "pending", "git": git_status,
+                          "diagnostics": browser_diagnostics + git_diagnostics, "backfill": backfill}
+                day_history = [h for ts, h in stamped if lo <= ts < hi]
+                futures.append((day, pool.submit(backfill_day, client, day, day_history, git_by_day.get(day, []),
+                                                 status, now, dry_run, aw_query)))
+            for day, future in futures:
+                try:
+                    print(f"{day.isoformat()}: {future.result()} sessions")
+                except Exception as e:
+                    print(f"{day.isoformat()}: failed: {e}")
+
+# A session that ended this long ago is final: well past the 300s session gap,
+# so no event still to come can extend it
+DAEMON_SETTLE_SECONDS = 900
+
+class DaemonLog:
+    """
+    The daemon's sensor log of the current JST day, written incrementally:
+    every cycle appends the sessions that have settled since the last one, so
+    the log grows over the day under its .partial name. When the day ends (or
+    the daemon stops) the rest of the day's sessions, its git activity and the
+    collection status are written and the log is published.
+
+    Each log is built from the caches starting at midnight, so the day's last
+    log is always complete. A daemon restarted during the day resumes the
+    .partial its predecessor left behind.
+    """
+    def __init__(self, now: Optional[datetime.datetime] = None):
+        # Caches of the last successful sync (a failed source keeps its previous one)
+        self.window_store: Optional[EventPartitionStore] = None
+        self.browser_store: Optional[EventPartitionStore] = None
+        self._open((now or datetime.datetime.now(JST)).astimezone(JST))
+
+    def _open(self, now: datetime.datetime):
+        self.day = now.date()
+        self.start = datetime.datetime.combine(self.day, datetime.time(), tzinfo=JST)
+        self.end = self.start + datetime.timedelta(days=1)
+        self.status = {"browser": "pending", "window": "pending", "git": "pending"}
+        self.diagnostics: List[str] = []
+        self.cycles = 0
+
+        recovered = []
+        pattern = sensor_log.log_filename(f"{self.day.strftime('%Y%m%d')}_*", config.machine_id) + ".partial"
+        partials = sorted(LOGS_DIR.glob(pattern))
+        if partials:
+            # Read back what survived (a killed daemon may leave a truncated tail)
+            recovered = list(sensor_log.SensorLogReader(partials[-1]).sessions())
+            path = partials[-1].with_name(partials[-1].name[:-len(".partial")])
+        else:
+            path = LOGS_DIR / sensor_log.log_filename(now.strftime('%Y%m%d_%H%M%S'), config.machine_id)
+
+        # Dated at the end of the day like replays and backfills: the log covers all of it
+        date = datetime.datetime.combine(self.day, datetime.time(23, 59, 59), tzinfo=JST).isoformat()
+        self.writer = SensorLogWriter(path, date, {"machine": config.machine_id})
+        self.writer.write_sessions(recovered)
+        self.writer.flush()
+        self.written_until = parse_timestamp(recovered[-1]["end_time"]) if recovered else self.start
+
+    def _write_sessions(self, until: datetime.datetime, settled_before: Optional[datetime.datetime] = None) -> int:
+        """
+        Builds the sessions of the window events starting in [written_until, until)
+        and appends them, up to the first one ending after settled_before (all
+        of them without it). Events already written are left out, so nothing
+        is written twice.
+        """
+        if self.window_store is None or self.browser_store is None:
+            return 0
+        raw = [e for e in self.window_store.load(self.written_until, until)
+               if parse_timestamp(e["timestamp"]) >= self.written_until]
+        events = clean_window_events(raw)
+        if not events:
+            return 0
+        # The previous day's visits match tabs refocused after midnight
+        history = self.browser_store.load(self.start - datetime.timedelta(days=1), until)
+        sessions = build_timeline(history, events)
+        if settled_before is not None:
+            settled = 0
+            while settled < len(sessions) and parse_timestamp(sessions[settled]["end_time"]) <= settled_before:
+                settled += 1
+            sessions = sessions[:settled]
+        if sessions:
+            self.writer.write_sessions(sessions)
+            self.writer.flush()
+            self.written_until = parse_timestamp(sessions[-1]["end_time"])
+        return len(sessions)
+
+    def update(self, window_store: Optional[EventPartitionStore], browser_store: Optional[EventPartitionStore],
+               status: Dict[str, Any], now: Optional[datetime.datetime] = None) -> int:
+        """
+        Called after each cycle's sync with the caches it filled (None for a
+        source that failed). Publishes the log once its day is over and opens
+        the next one. Returns the number of sessions written.
+        """
+        now = (now or datetime.datetime.now(JST)).astimezone(JST)
+        self.window_store = window_store or self.window_store
+        self.browser_store = browser_store or self.browser_store
+        self.status = {source: status[source] for source in ("browser", "window", "git")}
+        self.diagnostics.extend(m for m in status["diagnostics"] if m not in self.diagnostics)
+        self.cycles += 1
+        if now < self.end:
+            return self._write_sessions(now, now - datetime.timedelta(seconds=DAEMON_SETTLE_SECONDS))
+        try:
+            return self.close(now)
+        finally:
+            self._open(now)
+
+    def close(self, now: Optional[datetime.datetime] = None) -> int:
+        """
+        Finishes the day up to `now`: writes the remaining sessions (settled or
+        not), archives the day's raw events, adds its git activity and the
+        status, and publishes the log. Returns the number of sessions written.
+        """
+        until = min((now or datetime.datetime.now(JST)).astimezone(JST), self.end)
+        status = dict(self.status)
+        diagnostics = list(self.diagnostics)
+        written = 0
+        try:
+            written = self._write_sessions(until)
+
+            # Raw inputs are kept per day, so the timeline can be rebuilt later (--replay)
+            if self.window_store is not None and self.browser_store is not None:
+                try:
+                    raw = [e for e in self.window_store.load(self.start, until)
+                           if parse_timestamp(e["timestamp"]) >= self.start]
+                    history = self.browser_store.load(self.start, until)
+                    if raw or history:
+                        EventArchive(ARCHIVE_DIR).update(raw, history, self.start, until)
+                except Exception as e:
+                    diagnostics.append(f"Archiving raw events failed: {e}")
+
+            try:
+                by_day, git_diagnostics = get_git_activity_by_day(self.start, until)
+                diagnostics.extend(git_diagnostics)
+                for repo_activity in by_day.get(self.day, []):
+                    self.writer.write_git(repo_activity)
+            except Exception as e:
+                status["git"] = "failed"
+                diagnostics.append(f"Git activity extraction failed: {e}")
+
+            status.update(diagnostics=diagnostics, daemon={"cycles": self.cycles})
+            self.writer.write_status(status)
+        finally:
+            self.writer.close()
+            print(f"Saved to {self.writer.path}")
+        return written
+
+def wait_for_stop(seconds: float, poll: float = 1.0) -> bool:
+    """
+    Sleeps up to `seconds`, returning True as soon as a stop was requested
+    through DAEMON_STOP_PATH (see run_nightly_batch.ps1).
+    """
+    deadline = time.monotonic() + seconds
+    while not DAEMON_STOP_PATH.exists():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(poll, remaining))
+    return True
+
+def collect_incremental(hours: int = 24, aw_query: bool = False,
+                        daemon_log: Optional[DaemonLog] = None) -> Dict[str, Any]:
+    """
+    One daemon cycle: pulls whatever is new from every source into the local
+    caches (window/browser day partitions, git commit cache), then appends
+    the newly settled sessions to daemon_log, if given.
+    """
+    status = {"browser": "pending", "window": "pending", "git": "pending", "diagnostics": []}
+    with sensor_lock() as locked:
+        if not locked:
+            status["diagnostics"].append("Another sensor run holds the lock; cycle skipped.")
+            return status
+
+        window_store = browser_store = None
+        try:
+            browser_store = sync_browser_history(hours)
+            status["browser"] = "ok"
+        except Exception as e:
+            status["browser"] = "failed"
+            status["diagnostics"].append(f"Browser extraction failed: {e}")
+
+        try:
+            window_store = sync_window_activity(hours, use_query=aw_query or None)
+            status["window"] = "ok"
+        except Exception as e:
+            status["window"] = "failed"
+            status["diagnostics"].append(f"Window activity extraction failed: {e}")
+
+        try:
+            _, git_diagnostics = get_git_activity(hours)
+            status["diagnostics"].extend(git_diagnostics)
+            status["git"] = "ok"
+        except Exception as e:
+            status["git"] = "failed"
+            status["diagnostics"].append(f"Git activity extraction failed: {e}")
+
+        if daemon_log is not None:
+            try:
+                status["sessions_written"] = daemon_log.update(window_store, browser_store, status)
+            except Exception as e:
+                status["diagnostics"].append(f"Writing the day's log failed: {e}")
+    return status
+
+def run_daemon(interval_minutes: Optional[float] = None, hours: int = 24, aw_query: bool = False,
+               max_cycles: Optional[int] = None):
+    """
+    Collects incrementally every interval_minutes (default: daemon_interval_minutes)
+    and writes the day's log as it goes (DaemonLog), until interrupted or asked
+    to stop through DAEMON_STOP_PATH; the log is then published.
+    `hours` bounds the first fetch when there is no watermark yet.
+
+    The process id is kept in DAEMON_PID_PATH while running, so the nightly
+    batch can tell the daemon apart from other Python processes.
+    """
+    interval = interval_minutes if interval_minutes is not None else config.daemon_interval_minutes
+    print(f"--- Starting Sensor Daemon (every {interval} min) ---")
+    DAEMON_PID_PATH.parent.mkdir(parents=True, exist_ok=True)
+    if DAEMON_STOP_PATH.exists():
+        DAEMON_STOP_PATH.unlink()
+    DAEMON_PID_PATH.write_text(str(os.getpid()))
+    daemon_log = None
+    cycle = 0
     try:
-        print(f"Fetching Git activity from {len(config.git_repos)} repos + base folders...")
-        git_activity, git_diagnostics = get_git_activity(hours)
-        print(f"Extracted activity from {len(git_activity)} repositories.")
-        status["git"] = "ok"
-        status["diagnostics"].extend(git_diagnostics)
-    except Exception as e:
-        status["git"] = "failed"
-        status["diagnostics"].append(f"Git activity extraction failed: {e}")
-        print(f"Error: {e}")
-    
-    # 4. Save
-    # Use JST (Japan Standard Time, UTC+9) for logging
-    jst = datetime.timezone(datetime.timedelta(hours=9))
-    now_jst = datetime.datetime.now(jst)
+        daemon_log = DaemonLog()
+        while max_cycles is None or cycle < max_cycles:
+            started = time.monotonic()
+            status = collect_incremental(hours, aw_query=aw_query, daemon_log=daemon_log)
+            cycle += 1
+            elapsed = time.monotonic() - started
+            stamp = datetime.datetime.now(JST).strftime("%Y-%m-%d %H:%M:%S")
+            print(f"[{stamp}] Cycle {cycle} done in {elapsed:.1f}s "
+                  f"(browser={status['browser']}, window={status['window']}, git={status['git']}, "
+                  f"sessions={status.get('sessions_written', 0)})")
+            for message in status["diagnostics"]:
+                print(f"  {message}")
+            if max_cycles is not None and cycle >= max_cycles:
+                break
+            if wait_for_stop(max(0.0, interval * 60 - elapsed)):
+                print("Stop requested.")
+                break
+    except KeyboardInterrupt:
+        print("Sensor daemon stopped.")
+    finally:
+        try:
+            if daemon_log is not None:
+                # A one-shot run in progress finishes with the caches first
+                with sensor_lock(wait=300) as locked:
+                    if not locked:
+                        print("Warning: sensor lock is busy; publishing the day's log anyway.")
+                    daemon_log.close()
+        finally:
+            if DAEMON_STOP_PATH.exists():
+                DAEMON_STOP_PATH.unlink()
+            if DAEMON_PID_PATH.exists():
+                DAEMON_PID_PATH.unlink()
+
+def main(hours=24, dry_run=False, full_refresh=False, aw_query=False):
+    print(f"--- Starting Sensor (Last {hours} hours) ---")
     
-    payload = {
-        "date": now_jst.isoformat(),
-        "status": status,
-        "timeline": sessions,
-        "git_activity": git_activity
+    status = {
+        "browser": "pending",
+        "window": "pending",
+        "git": "pending",
+        "diagnostics": []
     }
+    # Wall time, volumes, bytes and retries per stage (see sensor_metrics)
+    recorder = sensor_metrics.StageRecorder(io_counters)
     
+    # Records are streamed to the log as each stage produces them
+    now_jst = datetime.datetime.now(JST)
+    writer = None
     if dry_run:
         print("Dry Run: Not saving files.")
-        # print(json.dumps(payload, indent=2, ensure_ascii=False))
     else:
-        filename = f"sensor_log_{now_jst.strftime('%Y%m%d_%H%M%S')}.json"
-        filepath = LOGS_DIR / filename
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(payload, f, indent=2, ensure_ascii=False)
-        print(f"Saved to {filepath}")
+        filepath = LOGS_DIR / sensor_log.log_filename(now_jst.strftime('%Y%m%d_%H%M%S'), config.machine_id)
+        writer = SensorLogWriter(filepath, now_jst.isoformat(), {"machine": config.machine_id})
+    
+    try:
+        # A daemon cycle in progress finishes first (it takes seconds, not minutes)
+        with sensor_lock(wait=300) as locked:
+            if not locked:
+                print("Warning: sensor lock is busy; collecting anyway.")
+            # 1. Fetch Streams
+            history = []
+            try:
+                with recorder.stage("browser") as stage:
+                    history = get_browser_history(hours, full_refresh=full_refresh, dry_run=dry_run)
+                    stage["items_out"] = len(history)
+                print(f"Extracted {len(history)} browser items.")
+                status["browser"] = "ok"
+            except Exception as e:
+                status["browser"] = "failed"
+                status["diagnostics"].append(f"Browser extraction failed: {e}")
+                print(f"Error: {e}")
+        
+            raw_events, events = [], []
+            try:
+                with recorder.stage("aw_fetch") as stage:
+                    raw_events = get_raw_window_activity(hours, full_refresh=full_refresh, use_query=aw_query or None,
+                                                         dry_run=dry_run)
+                    events = clean_window_events(raw_events)
+                    stage["items_out"] = len(events)
+                print(f"Extracted {len(events)} window events.")
+                status["window"] = "ok"
+            except Exception as e:
+                status["window"] = "failed"
+                status["diagnostics"].append(f"Window activity extraction failed: {e}")
+                print(f"Error: {e}")
+        
+            # Raw inputs are kept per day, so the timeline can be rebuilt later (--replay)
+            if not dry_run and (raw_events or history):
+                try:
+                    with recorder.stage("archive", items_in=len(raw_events) + len(history)):
+                        end_time = datetime.datetime.now(datetime.timezone.utc)
+                        EventArchive(ARCHIVE_DIR).update(raw_events, history, end_time - datetime.timedelta(hours=hours), end_time)
+                except Exception as e:
+                    status["diagnostics"].append(f"Archiving raw events failed: {e}")
+                    print(f"Error: {e}")
+        
+            # 2. Algorithmic Fusion & Sessionization
+            if events:
+                try:
+                    print("Fusing streams, sessionizing and compressing timeline (A-B-A merge & Noise filter)...")
+                    sessions = build_timeline(history, events, recorder=recorder)
+                    print(f"Compressed into {len(sessions)} high-level sessions.")
+                    if writer:
+                        writer.write_sessions(sessions)
+                except Exception as e:
+                    status["diagnostics"].append(f"Processing failed: {e}")
+                    print(f"Error: {e}")
+        
+            # 3. Fetch Git Activity
+            try:
+                print(f"Fetching Git activity from {len(config.git_repos)} repos + base folders...")
+                with recorder.stage("git") as stage:
+                    git_activity, git_diagnostics = get_git_activity(hours, dry_run=dry_run)
+                    stage["items_out"] = sum(len(r["commits"]) for r in git_activity)
+                print(f"Extracted activity from {len(git_activity)} repositories.")
+                status["git"] = "ok"
+                status["diagnostics"].extend(git_diagnostics)
+                if writer:
+                    for repo_activity in git_activity:
+                        writer.write_git(repo_activity)
+            except Exception as e:
+                status["git"] = "failed"
+                status["diagnostics"].append(f"Git activity extraction failed: {e}")
+                print(f"Error: {e}")
+        
+            status["stages"] = recorder.to_dict()
+            for name, stage in status["stages"].items():
+                print(f"  {name:<11} {stage['seconds']:>8.2f}s  in={stage['items_in']} out={stage['items_out']} "
+                      f"bytes={stage['bytes_read']} retries={stage['retries']}")
+            if writer:
+                writer.write_status(status)
+                try:
+                    sensor_metrics.append_metrics(LOGS_DIR, {"date": now_jst.isoformat(), "hours": hours,
+                                                             "stages": status["stages"]})
+                except OSError as e:
+                    print(f"Failed to append sensor metrics: {e}")
+    finally:
+        # 4. Save
+        if writer:
+            writer.close()
+            print(f"Saved to {filepath}")
 
 
 if __name__ == "__main__":
@@ -972,6 +2267,25 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--dry-run", action="store_true", help="Do not save output to disk")
     parser.add_argument("--hours", type=int, default=24, help="Hours of history to fetch")
+    parser.add_argument("--full-refresh", action="store_true", help="Ignore watermarks and re-fetch the whole window")
+    parser.add_argument("--aw-query", action="store_true", help="Filter AFK time on the ActivityWatch server (query2 API)")
+    parser.add_argument("--daemon", action="store_true", help="Keep running and collect new activity every --interval minutes")
+    parser.add_argument("--interval", type=float, default=None, help="Daemon interval in minutes (default: daemon_interval_minutes)")
+    parser.add_argument("--replay", nargs="+", metavar="DAY",
+                        help="Rebuild archived days (YYYYMMDD, YYYYMMDD:YYYYMMDD or 'all') without collecting")
+    parser.add_argument("--gap-threshold", type=int, default=300, help="Replay: seconds of inactivity that split a session")
+    parser.add_argument("--since", type=datetime.date.fromisoformat, metavar="YYYY-MM-DD",
+                        help="Backfill: collect every day from this date and write one log per day")
+    parser.add_argument("--until", type=datetime.date.fromisoformat, metavar="YYYY-MM-DD",
+                        help="Backfill: last day, inclusive (default: yesterday)")
     args = parser.parse_args()
     
-    main(hours=args.hours, dry_run=args.dry_run)
+    if args.since:
+        until = args.until or datetime.datetime.now(JST).date() - datetime.timedelta(days=1)
+        run_backfill(args.since, until, dry_run=args.dry_run, aw_query=args.aw_query)
+    elif args.replay:
+        run_replay(args.replay, dry_run=args.dry_run, gap_threshold=args.gap_threshold)
+    elif args.daemon:
+        run_daemon(interval_minutes=args.interval, hours=args.hours, aw_query=args.aw_query)
+    else:
+        main(hours=args.hours, dry_run=args.dry_run, full_refresh=args.full_refresh, aw_query=args.aw_query)
@@ -0,0 +1,190 @@
+"""
+Sensor log format (shared by sensor.py on the host and cognizer.py in Docker).
+
+v2: data/logs/sensor_log_YYYYMMDD_HHMMSS[_<machine>].ndjson.gz
+    gzip-compressed, one JSON record per line, written as produced:
+        {"type": "header", "version": 2, "date": "<ISO, JST>", "machine": "<machine_id>"}
+        {"type": "session", ...}      one per timeline session
+        {"type": "git", "repo": ..., "commits": [...]}   one per repository
+        {"type": "status", ...}       collection status & diagnostics
+
+v1 (legacy): data/logs/sensor_log_YYYYMMDD_HHMMSS.json
+    one indented JSON document {"date", "status", "timeline", "git_activity"}.
+
+SensorLogReader reads both; v2 files are streamed record by record.
+"""
+import os
+import re
+import gzip
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+LOG_VERSION = 2
+LOG_SUFFIX = ".ndjson.gz"
+LEGACY_SUFFIX = ".json"
+LOG_GLOBS = ["sensor_log_*" + LOG_SUFFIX, "sensor_log_*" + LEGACY_SUFFIX]
+GZIP_MAGIC = b"\x1f\x8b"
+
+def log_filename(stamp: str, machine: Optional[str] = None) -> str:
+    """stamp: 'YYYYMMDD_HHMMSS' (JST). The machine keeps logs of several machines apart in a shared folder."""
+    if machine:
+        return f"sensor_log_{stamp}_{re.sub(r'[^A-Za-z0-9-]', '-', machine)}{LOG_SUFFIX}"
+    return f"sensor_log_{stamp}{LOG_SUFFIX}"
+
+def find_logs(logs_dir: Path) -> List[Path]:
+    """Unprocessed sensor logs of either format, oldest first."""
+    found = set()
+    for pattern in LOG_GLOBS:
+        found.update(logs_dir.glob(pattern))
+    return sorted(found, key=lambda p: p.name)
+
+class SensorLogWriter:
+    """
+    Writes a v2 log incrementally. The file is written under a .partial name
+    and renamed on close, so a reader never picks up a log that is still
+    being written.
+    """
+    def __init__(self, path: Path, date: str, extra_header: Optional[Dict[str, Any]] = None):
+        self.path = Path(path)
+        self.tmp_path = self.path.with_name(self.path.name + ".partial")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = gzip.open(self.tmp_path, "wt", encoding="utf-8")
+        self.counts = {"session": 0, "git": 0}
+        header = {"type": "header", "version": LOG_VERSION, "date": date}
+        header.update(extra_header or {})
+        self._write(header)
+
+    def _write(self, record: Dict[str, Any]):
+        self._f.write(json.dumps(record, ensure_ascii=False))
+        self._f.write("\n")
+
+    def write_session(self, session: Dict[str, Any]):
+        self._write(dict(session, type="session"))
+        self.counts["session"] += 1
+
+    def write_sessions(self, sessions: Iterable[Dict[str, Any]]) -> int:
+        before = self.counts["session"]
+        for session in sessions:
+            self.write_session(session)
+        return self.counts["session"] - before
+
+    def write_git(self, repo_activity: Dict[str, Any]):
+        self._write(dict(repo_activity, type="git"))
+        self.counts["git"] += 1
+
+    def write_status(self, status: Dict[str, Any]):
+        self._write(dict(status, type="status"))
+
+    def flush(self):
+        """Makes everything written so far readable from the .partial file."""
+        if self._f is not None:
+            self._f.flush()
+
+    def close(self):
+        if self._f is None:
+            return
+        self._f.close()
+        self._f = None
+        os.replace(self.tmp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Whatever was written so far is still a valid (shorter) log
+        self.close()
+
+def _strip_type(record: Dict[str, Any]) -> Dict[str, Any]:
+    record = dict(record)
+    record.pop("type", None)
+    return record
+
+class SensorLogReader:
+    """
+    Reads a sensor log of either format.
+
+        reader = SensorLogReader(path)
+        reader.date                        # from the header
+        for session in reader.sessions():  # streamed (v2)
+            ...
+        reader.git_activity, reader.status # complete once sessions() is exhausted
+
+    sessions() makes a single pass over the file; git and status records met on
+    the way are collected, whatever their position.
+    """
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.git_activity: List[Dict[str, Any]] = []
+        self.status: Dict[str, Any] = {}
+        self.header: Dict[str, Any] = {}
+        self._legacy: Optional[Dict[str, Any]] = None
+        self._consumed = False
+
+        with open(self.path, "rb") as f:
+            self._gzip = f.read(2) == GZIP_MAGIC
+        if self._gzip:
+            self.version = LOG_VERSION
+        else:
+            with open(self.path, "r", encoding="utf-8") as f:
+                first_line = f.readline()
+            try:
+                first = json.loads(first_line)
+            except ValueError:
+                first = None
+            # Uncompressed NDJSON starts with a complete header record
+            self.version = LOG_VERSION if isinstance(first, dict) and first.get("type") == "header" else 1
+
+        if self.version == 1:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._legacy = json.load(f)
+            self.header = {"date": self._legacy.get("date")}
+            self.git_activity = self._legacy.get("git_activity", [])
+            self.status = self._legacy.get("status", {})
+        else:
+            for record in self._records():
+                if record.get("type") == "header":
+                    self.header = _strip_type(record)
+                break
+
+    @property
+    def date(self) -> Optional[str]:
+        return self.header.get("date")
+
+    def _open(self):
+        if self._gzip:
+            return gzip.open(self.path, "rt", encoding="utf-8")
+        return open(self.path, "r", encoding="utf-8")
+
+    def _records(self) -> Iterator[Dict[str, Any]]:
+        with self._open() as f:
+            try:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+            except (EOFError, ValueError):
+                # Truncated stream (writer killed): keep the records that were complete
+                return
+
+    def sessions(self) -> Iterator[Dict[str, Any]]:
+        if self._legacy is not None:
+            yield from self._legacy.get("timeline", [])
+            return
+        if self._consumed:
+            raise RuntimeError("sessions() can only be iterated once for v2 logs")
+        self._consumed = True
+        git_activity, status = [], {}
+        for record in self._records():
+            kind = record.get("type")
+            if kind == "session":
+                yield _strip_type(record)
+            elif kind == "git":
+                git_activity.append(_strip_type(record))
+            elif kind == "status":
+                status = _strip_type(record)
+        self.git_activity, self.status = git_activity, status
+
+    def load(self) -> Dict[str, Any]:
+        """Whole log as a legacy-shaped document (holds everything in memory)."""
+        timeline = list(self.sessions())
+        return dict(self.header, timeline=timeline, git_activity=self.git_activity, status=self.status)
@@ -0,0 +1,121 @@
+"""
+Per-stage instrumentation of a sensor run (shared by sensor.py and cognizer.py).
+
+Each stage records:
+    seconds     wall time
+    items_in    records read from the source (or handed to the stage)
+    items_out   records the stage produced
+    bytes_read  payload received: HTTP bodies, history rows, git output, shadow copies
+    requests    HTTP requests / git processes / databases opened
+    retries     repeated work: split AW pages, shadow-copy fallbacks, git re-runs
+    status      ok | failed
+
+They end up in the log's status["stages"], and one line per run is appended
+to data/logs/sensor_metrics.ndjson so cost can be charted over time and
+find_regressions can compare a run against the recent ones.
+"""
+import json
+import time
+import threading
+import statistics
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+METRICS_FILENAME = "sensor_metrics.ndjson"
+# Stages that always produce something on a day the PC was used (unlike git)
+EXPECT_OUTPUT = ("aw_fetch", "browser")
+COUNTERS = ("items_read", "bytes_read", "requests", "retries")
+
+class Counters:
+    """Thread-safe totals that the collectors bump from worker threads."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = dict.fromkeys(COUNTERS, 0)
+
+    def add(self, name: str, n: int = 1):
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + n
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._values)
+
+class StageRecorder:
+    """
+    Times stages and attributes the counters' growth during each one to it.
+    Stages run one after another, so the attribution is exact.
+
+        with recorder.stage("fuse", items_in=len(events)) as stage:
+            fused = ...
+            stage["items_out"] = len(fused)
+    """
+    def __init__(self, counters: Counters):
+        self.counters = counters
+        self.stages: Dict[str, Dict[str, Any]] = {}
+
+    @contextmanager
+    def stage(self, name: str, items_in: Optional[int] = None):
+        record = {"seconds": 0.0, "items_in": items_in, "items_out": None,
+                  "bytes_read": 0, "requests": 0, "retries": 0, "status": "ok"}
+        self.stages[name] = record
+        before = self.counters.snapshot()
+        started = time.perf_counter()
+        try:
+            yield record
+        except BaseException:
+            record["status"] = "failed"
+            raise
+        finally:
+            record["seconds"] = round(time.perf_counter() - started, 4)
+            after = self.counters.snapshot()
+            delta = {k: after.get(k, 0) - before.get(k, 0) for k in COUNTERS}
+            if record["items_in"] is None:
+                record["items_in"] = delta["items_read"]
+            for key in ("bytes_read", "requests", "retries"):
+                record[key] += delta[key]
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        return {name: dict(record) for name, record in self.stages.items()}
+
+def append_metrics(logs_dir: Path, record: Dict[str, Any]):
+    logs_dir.mkdir(parents=True, exist_ok=True)
+    with open(logs_dir / METRICS_FILENAME, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+def load_metrics(logs_dir: Path, before: Optional[str] = None, limit: int = 30) -> List[Dict[str, Any]]:
+    """The last `limit` runs (optionally only those dated before `before`), oldest first."""
+    path = logs_dir / METRICS_FILENAME
+    if not path.exists():
+        return []
+    runs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                run = json.loads(line)
+            except ValueError:
+                continue
+            if before is None or run.get("date", "") < before:
+                runs.append(run)
+    return runs[-limit:]
+
+def find_regressions(stages: Dict[str, Dict[str, Any]], history: List[Dict[str, Any]],
+                     factor: float = 2.0, min_seconds: float = 1.0, min_runs: int = 3) -> List[str]:
+    """
+    Compares a run's stages with the median of earlier runs. Flags stages that
+    took factor times longer (and at least min_seconds more), and EXPECT_OUTPUT
+    stages that produced nothing where they usually do.
+    """
+    findings = []
+    for name, stage in stages.items():
+        past = [run["stages"][name] for run in history if name in run.get("stages", {})]
+        if len(past) < min_runs:
+            continue
+        typical = statistics.median(p.get("seconds", 0) for p in past)
+        seconds = stage.get("seconds", 0)
+        if seconds > typical * factor and seconds - typical >= min_seconds:
+            findings.append(f"{name}: {seconds:.1f}s (usually {typical:.1f}s)")
+        typical_out = statistics.median(p.get("items_out") or 0 for p in past)
+        if name in EXPECT_OUTPUT and stage.get("items_out") == 0 and typical_out > 0:
+            findings.append(f"{name}: produced nothing (usually {typical_out:.0f})")
+    return findings
@@ -127,14 +127,44 @@ try {
     }
 
     # 1. Perception Phase (Host)
+    # The sensor daemon (sensor.py --daemon) has been writing today's log all day;
+    # it is asked to publish it and exit. Without a daemon, a one-shot run collects the day.
     Write-Log "Step 1: Running Sensor (Host)..."
     
-    # 1.a Stop Audio Sensor if running
+    # 1.a Stop Audio Sensor if running (that process only, not every python)
     Write-Log "Stopping Audio Sensor..."
-    Stop-Process -Name "python" -PassThru -ErrorAction SilentlyContinue | Where-Object { $_.CommandLine -match "audio_sensor\.py" } | Stop-Process -Force -ErrorAction SilentlyContinue
-    
-    & $PythonExe -u "$ProjectRoot\modules\sensor.py"
-    if ($LASTEXITCODE -ne 0) { throw "Sensor failed with exit code $LASTEXITCODE" }
+    Get-CimInstance Win32_Process -Filter "Name LIKE 'python%'" -ErrorAction SilentlyContinue |
+        Where-Object { $_.CommandLine -match "audio_sensor\.py" } |
+        ForEach-Object { Stop-Process -Id $_.ProcessId -Force -ErrorAction SilentlyContinue }
+
+    # 1.b Stop the Sensor Daemon through its PID and stop files (see run_daemon in sensor.py)
+    $DaemonPidFile = "$ProjectRoot\data\sensor_daemon.pid"
+    $DaemonStopFile = "$ProjectRoot\data\sensor_daemon.stop"
+    $DaemonStopped = $false
+    if (Test-Path $DaemonPidFile) {
+        $DaemonPid = [int](Get-Content -Raw $DaemonPidFile).Trim()
+        # A stale PID file may name an unrelated process by now
+        $DaemonProcess = Get-CimInstance Win32_Process -Filter "ProcessId = $DaemonPid" -ErrorAction SilentlyContinue |
+            Where-Object { $_.CommandLine -match "sensor\.py.*--daemon" }
+        if ($DaemonProcess) {
+            Write-Log "Stopping Sensor Daemon (PID $DaemonPid)..."
+            New-Item -ItemType File -Path $DaemonStopFile -Force | Out-Null
+            Wait-Process -Id $DaemonPid -Timeout 600 -ErrorAction SilentlyContinue
+            if (Get-Process -Id $DaemonPid -ErrorAction SilentlyContinue) {
+                Write-Log "Sensor Daemon did not stop in time; terminating PID $DaemonPid."
+                Stop-Process -Id $DaemonPid -Force -ErrorAction SilentlyContinue
+            } else {
+                $DaemonStopped = $true
+            }
+        }
+    }
+
+    if ($DaemonStopped) {
+        Write-Log "Sensor Daemon published today's log."
+    } else {
+        & $PythonExe -u "$ProjectRoot\modules\sensor.py"
+        if ($LASTEXITCODE -ne 0) { throw "Sensor failed with exit code $LASTEXITCODE" }
+    }
 
     # 2. Cognition Phase (Docker)
     Write-Log "Step 2: Start Cognition (Docker)..."
@@ -175,6 +205,13 @@ try {
     # 5. Restart Audio Sensor (Host)
     Write-Log "Step 5: Restarting Audio Sensor (Host)..."
     Start-Process -FilePath $PythonExe -ArgumentList "-u", "$ProjectRoot\modules\audio_sensor.py" -WindowStyle Hidden
+
+    # 5.1 Restart the Sensor Daemon (Host); it starts the next log
+    $SensorDaemon = Get-CimInstance Win32_Process -Filter "Name LIKE 'python%'" -ErrorAction SilentlyContinue | Where-Object { $_.CommandLine -match "sensor\.py.*--daemon" }
+    if (-not $SensorDaemon) {
+        Write-Log "Starting Sensor Daemon (Host)..."
+        Start-Process -FilePath $PythonExe -ArgumentList "-u", "$ProjectRoot\modules\sensor.py", "--daemon" -WindowStyle Hidden
+    }
     
     # 6. Sleep Logic
     if (-not $NoSleep) {
@@ -0,0 +1,123 @@
+"""
+Benchmark for sensor.fuse_streams (browser history x window events).
+
+    python scripts/bench/bench_fuse_streams.py --history 50000 --windows 20000
+
+The legacy linear-scan matcher is O(windows x history), so it is only timed
+on a sample of the window events (--legacy-sample) and extrapolated.
+"""
+import sys
+import time
+import random
+import argparse
+import datetime
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR / "modules"))
+
+import sensor
+
+WORDS = [
+    "python", "rust", "docker", "kubernetes", "release", "notes", "issue", "pull", "request",
+    "api", "reference", "guide", "tutorial", "error", "stack", "overflow", "github", "review",
+    "design", "memory", "index", "query", "cache", "server", "client", "timeline", "sensor",
+    "vector", "search", "model", "train", "deploy", "config", "build", "test", "bench", "log",
+]
+
+def make_streams(n_history: int, n_windows: int, seed: int = 0):
+    rng = random.Random(seed)
+    start = datetime.datetime(2026, 2, 23, tzinfo=datetime.timezone.utc)
+    day = 86400
+
+    titles = [f"{' '.join(rng.choices(WORDS, k=rng.randint(3, 7)))} #{i}" for i in range(n_history)]
+    history = []
+    for i, title in enumerate(titles):
+        ts = start + datetime.timedelta(seconds=day * i / n_history)
+        history.append({"url": f"https://example.com/{i}", "title": title,
+                        "timestamp": ts.isoformat(), "source": "Chrome"})
+
+    windows = []
+    for j in range(n_windows):
+        ts_sec = day * j / n_windows
+        kind = rng.random()
+        if kind < 0.6:
+            # Tab showing an already visited page
+            seen = max(1, int(n_history * ts_sec / day))
+            title = f"{titles[rng.randrange(seen)]} - Google Chrome"
+            app = "chrome.exe"
+        elif kind < 0.8:
+            title = f"{' '.join(rng.choices(WORDS, k=3))} - Google Chrome"
+            app = "chrome.exe"
+        else:
+            title = "main.py - sensor - Visual Studio Code"
+            app = "Code.exe"
+        ts = start + datetime.timedelta(seconds=ts_sec)
+        windows.append({"app": app, "title": title, "timestamp": ts.isoformat(), "duration": 5})
+    return history, windows
+
+def legacy_fuse_streams(browser_history, window_activity):
+    """The original fuse_streams matcher: exact dict hit, else a scan of every cached title."""
+    def parse_ts(iso_str):
+        return datetime.datetime.fromisoformat(iso_str)
+
+    combined = [("H", parse_ts(h["timestamp"]), h) for h in browser_history]
+    combined += [("W", parse_ts(w["timestamp"]), w) for w in window_activity]
+    combined.sort(key=lambda x: x[1])
+
+    title_cache = {}
+    fused = []
+    for kind, _, item in combined:
+        if kind == "H":
+            norm = item["title"].lower().strip()
+            if norm:
+                title_cache[norm] = item
+            continue
+        event = dict(item, type="app", details=[])
+        if any(b in item["app"].lower() for b in ["chrome", "edge", "firefox", "floorp", "brave"]):
+            w_title = item["title"].lower().strip()
+            best = title_cache.get(w_title)
+            if best is None:
+                for h_title, h_item in title_cache.items():
+                    if h_title and (h_title in w_title or w_title in h_title):
+                        best = h_item
+                        break
+            if best:
+                event["type"] = "browse"
+                event["details"].append({"url": best["url"], "title": best["title"], "timestamp": best["timestamp"]})
+        fused.append(event)
+    return fused
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - t0
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fuse_streams title matching")
+    parser.add_argument("--history", type=int, default=50000)
+    parser.add_argument("--windows", type=int, default=20000)
+    parser.add_argument("--legacy-sample", type=int, default=500,
+                        help="Window events timed with the legacy scan (0 to skip)")
+    args = parser.parse_args()
+
+    history, windows = make_streams(args.history, args.windows)
+    print(f"{len(history)} history items x {len(windows)} window events")
+
+    fused, elapsed = timed(sensor.fuse_streams, list(history), list(windows))
+    matched = sum(1 for e in fused if e["type"] == "browse")
+    print(f"indexed: {elapsed:.2f}s ({elapsed / len(windows) * 1e6:.1f} us/window), {matched} matched")
+
+    if args.legacy_sample:
+        # Spread the sample over the day so the cache size is representative
+        step = max(1, len(windows) // args.legacy_sample)
+        sample = windows[::step][:args.legacy_sample]
+        _, legacy_elapsed = timed(legacy_fuse_streams, list(history), sample)
+        per_window = legacy_elapsed / len(sample)
+        projected = per_window * len(windows)
+        print(f"legacy:  {legacy_elapsed:.2f}s for {len(sample)} windows "
+              f"({per_window * 1e6:.1f} us/window, ~{projected:.0f}s projected for all)")
+        print(f"speedup: ~{projected / elapsed:.0f}x")
+
+if __name__ == "__main__":
+    main()
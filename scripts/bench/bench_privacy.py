@@ -0,0 +1,82 @@
+"""
+Benchmark for the sensor privacy filter.
+
+    python scripts/bench/bench_privacy.py --events 200000
+
+Compares the original per-call loops (keyword str.replace, email regex and
+one re.search per blocked domain) with the compiled, cached PrivacyFilter on
+a day-like stream where titles and URLs repeat.
+"""
+import re
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR / "modules"))
+
+import sensor
+
+def legacy_sanitize_text(text, keywords):
+    if not text:
+        return ""
+    for keyword in keywords:
+        if keyword:
+            text = text.replace(keyword, "[REDACTED]")
+    email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
+    return re.sub(email_pattern, "[EMAIL_REDACTED]", text)
+
+def legacy_is_domain_blocked(url, patterns):
+    if not url:
+        return False
+    for pattern in patterns:
+        if re.search(pattern, url):
+            return True
+    return False
+
+def make_workload(n_events, n_distinct, seed=0):
+    rng = random.Random(seed)
+    words = ["review", "design", "sprint", "notes", "budget", "invoice", "roadmap", "deploy", "incident"]
+    titles = [f"{' '.join(rng.choices(words, k=5))} {i} - Google Chrome" for i in range(n_distinct)]
+    urls = [f"https://site{i % 300}.example.com/path/{i}?q={rng.random():.6f}" for i in range(n_distinct)]
+    picks = [rng.randrange(n_distinct) for _ in range(n_events)]
+    return [titles[i] for i in picks], [urls[i] for i in picks]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark privacy filtering")
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--distinct", type=int, default=5000)
+    parser.add_argument("--keywords", type=int, default=50)
+    parser.add_argument("--domains", type=int, default=100)
+    args = parser.parse_args()
+
+    keywords = [f"confidential-{i}" for i in range(args.keywords)]
+    domains = [rf"blocked{i}\.example\.org" for i in range(args.domains)]
+    titles, urls = make_workload(args.events, args.distinct)
+    print(f"{args.events} events ({args.distinct} distinct), {len(keywords)} keywords, {len(domains)} domains")
+
+    t0 = time.perf_counter()
+    legacy = [(legacy_is_domain_blocked(u, domains), legacy_sanitize_text(t, keywords)) for t, u in zip(titles, urls)]
+    legacy_elapsed = time.perf_counter() - t0
+
+    privacy = sensor.PrivacyFilter(keywords, domains)
+    t0 = time.perf_counter()
+    compiled = [(privacy.is_blocked(u), privacy.sanitize(t)) for t, u in zip(titles, urls)]
+    elapsed = time.perf_counter() - t0
+
+    # Compiled matchers alone, without the LRU cache
+    uncached = sensor.PrivacyFilter(keywords, domains, cache_size=0)
+    t0 = time.perf_counter()
+    [(uncached.is_blocked(u), uncached.sanitize(t)) for t, u in zip(titles, urls)]
+    uncached_elapsed = time.perf_counter() - t0
+
+    assert compiled == legacy, "PrivacyFilter disagrees with the legacy implementation"
+    print(f"legacy:             {legacy_elapsed:.2f}s")
+    print(f"compiled, no cache: {uncached_elapsed:.2f}s  (speedup ~{legacy_elapsed / uncached_elapsed:.0f}x)")
+    print(f"PrivacyFilter:      {elapsed:.2f}s  (speedup ~{legacy_elapsed / elapsed:.0f}x, "
+          f"hit rate {privacy.sanitize.cache_info().hits / args.events:.0%})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Benchmark of the sensor's hot paths on synthetic data -- no ActivityWatch or
+real browser profiles needed:
+
+    python scripts/bench/bench_sensor.py --events 1000 10000 100000
+
+For every scale synthetic activity is generated (synthetic_data.make_activity; one
+event per ~6s of awake time, so large scales span several days) and served
+by a local fake ActivityWatch (fake_aw_server.py); its browser visits are
+written to a Chrome and a Firefox profile under a temporary home folder. Then
+each stage is timed separately:
+
+    get_window_activity       cold: empty cache, everything over HTTP
+    get_window_activity+      warm: incremental run right after
+    get_browser_history       cold: both profiles read from scratch
+    fuse_streams / sessionize_events / compress_sessions
+
+Peak memory is measured with tracemalloc in a second, separate run of
+each stage (tracing slows Python down, so it is not part of the timings).
+"""
+import io
+import sys
+import json
+import time
+import argparse
+import datetime
+import tempfile
+import tracemalloc
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest.mock import patch
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR / "modules"))
+sys.path.append(str(Path(__file__).resolve().parent))
+
+import sensor
+from fake_aw_server import FakeActivityWatch
+from synthetic_data import make_activity, write_browser_profiles
+
+class SensorSandbox:
+    """Points the sensor's data directories and home folder at a temporary tree."""
+    def __init__(self, root: Path):
+        self.root = root
+        self.home = root / "home"
+        self._runs = 0
+        self._patches = []
+
+    def fresh_data_dir(self):
+        """A new, empty data/ (no cache, no watermarks or cursors)."""
+        self._runs += 1
+        data = self.root / f"data_{self._runs}"
+        data.mkdir()
+        sensor.DATA_DIR = data
+        sensor.CACHE_DIR = data / "cache"
+        sensor.STATE_PATH = data / "sensor_state.json"
+
+    def __enter__(self):
+        self._saved = (sensor.DATA_DIR, sensor.CACHE_DIR, sensor.STATE_PATH, sensor.aw_client)
+        self._patches = [patch("pathlib.Path.home", return_value=self.home)]
+        for p in self._patches:
+            p.start()
+        self.fresh_data_dir()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        for p in self._patches:
+            p.stop()
+        sensor.DATA_DIR, sensor.CACHE_DIR, sensor.STATE_PATH, sensor.aw_client = self._saved
+
+def measure(fn, setup=None, memory=True):
+    """(result, seconds, peak bytes or None); the sensor's progress output is swallowed."""
+    if setup:
+        setup()
+    with redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - t0
+
+    peak = None
+    if memory:
+        if setup:
+            setup()
+        with redirect_stdout(io.StringIO()):
+            tracemalloc.start()
+            try:
+                fn()
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    return result, elapsed, peak
+
+def bench_scale(n_events: int, seconds_per_event: float, visit_ratio: float, memory: bool):
+    end = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(minutes=1)
+    windows, visits = make_activity(n_events, end, seconds_per_event, visit_ratio)
+    # Whole hours covering everything generated
+    first = datetime.datetime.fromisoformat(windows[0]["timestamp"])
+    hours = int((end - first).total_seconds() // 3600) + 2
+    rows = []
+
+    def record(stage, items, elapsed, peak):
+        rows.append({"events": n_events, "stage": stage, "items": items, "seconds": elapsed,
+                     "per_second": items / elapsed if elapsed > 0 else float("inf"), "peak_bytes": peak})
+
+    with tempfile.TemporaryDirectory() as tmp, SensorSandbox(Path(tmp)) as box, FakeActivityWatch(windows) as aw:
+        write_browser_profiles(box.home, visits)
+        sensor.aw_client = sensor.ActivityWatchClient(aw.url, sensor.config.aw_slice_minutes,
+                                                      sensor.config.aw_max_workers)
+
+        events, elapsed, peak = measure(lambda: sensor.get_window_activity(hours, use_query=False),
+                                        box.fresh_data_dir, memory)
+        record("get_window_activity", len(windows), elapsed, peak)
+
+        # Incremental: the cache from the cold run above is still in place
+        _, elapsed, peak = measure(lambda: sensor.get_window_activity(hours, use_query=False), None, memory)
+        record("get_window_activity+", len(windows), elapsed, peak)
+
+        history, elapsed, peak = measure(lambda: sensor.get_browser_history(hours), box.fresh_data_dir, memory)
+        record("get_browser_history", len(visits), elapsed, peak)
+
+    fused, elapsed, peak = measure(lambda: sensor.fuse_streams(list(history), list(events)), None, memory)
+    record("fuse_streams", len(events), elapsed, peak)
+
+    sessions, elapsed, peak = measure(lambda: sensor.sessionize_events(fused), None, memory)
+    record("sessionize_events", len(fused), elapsed, peak)
+
+    compressed, elapsed, peak = measure(lambda: sensor.compress_sessions(sessions), None, memory)
+    record("compress_sessions", len(sessions), elapsed, peak)
+
+    print(f"\n{n_events} window events over {hours}h, {len(visits)} visits -> "
+          f"{len(events)} cleaned, {len(sessions)} sessions, {len(compressed)} compressed")
+    print(f"  {'stage':<22}{'items':>9}{'seconds':>10}{'items/s':>12}{'peak MB':>10}")
+    for r in rows:
+        peak_mb = f"{r['peak_bytes'] / 2**20:.1f}" if r["peak_bytes"] is not None else "-"
+        print(f"  {r['stage']:<22}{r['items']:>9}{r['seconds']:>10.3f}{r['per_second']:>12,.0f}{peak_mb:>10}")
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sensor stages on synthetic data")
+    parser.add_argument("--events", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Window events generated per run (one run per value)")
+    parser.add_argument("--seconds-per-event", type=float, default=6.0,
+                        help="Average awake time per window event (sets how many days a scale spans)")
+    parser.add_argument("--visit-ratio", type=float, default=0.25, help="Browser visits per window event")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc runs")
+    parser.add_argument("--json", type=Path, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for n in args.events:
+        results.extend(bench_scale(n, args.seconds_per_event, args.visit_ratio, memory=not args.no_memory))
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"\nSaved to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Local stand-in for the ActivityWatch REST API, enough for sensor.ActivityWatchClient:
+
+    GET  /api/0/buckets
+    GET  /api/0/buckets/<bucket>/events?start=&end=&limit=
+    POST /api/0/query/          (returns the window events of each timeperiod;
+                                 AFK filtering is not emulated)
+
+Events are served like aw-server does: those overlapping [start, end),
+newest first, at most `limit`.
+
+    with FakeActivityWatch(window_events) as aw:
+        client = sensor.ActivityWatchClient(aw.url)
+
+    python scripts/bench/fake_aw_server.py --events 50000 --port 5600
+"""
+import sys
+import json
+import bisect
+import argparse
+import datetime
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, unquote, urlparse
+
+WINDOW_BUCKET = "aw-watcher-window_benchhost"
+AFK_BUCKET = "aw-watcher-afk_benchhost"
+
+def _parse(iso_ts: str) -> float:
+    dt = datetime.datetime.fromisoformat(iso_ts.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return dt.timestamp()
+
+class EventIndex:
+    """Window events sorted by start, queried by overlap."""
+    def __init__(self, events: List[Dict]):
+        self.events = sorted(events, key=lambda e: _parse(e["timestamp"]))
+        self.starts = [_parse(e["timestamp"]) for e in self.events]
+        self.max_duration = max((e.get("duration", 0) for e in self.events), default=0)
+
+    def overlapping(self, start: float, end: float) -> List[Dict]:
+        lo = bisect.bisect_left(self.starts, start - self.max_duration)
+        hi = bisect.bisect_left(self.starts, end)
+        return [e for s, e in zip(self.starts[lo:hi], self.events[lo:hi])
+                if s + e.get("duration", 0) > start]
+
+class FakeActivityWatch:
+    def __init__(self, window_events: List[Dict], host: str = "127.0.0.1", port: int = 0):
+        self.index = EventIndex(window_events)
+        self.requests = 0
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like aw-server
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, payload, status=200):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                fake.requests += 1
+                url = urlparse(self.path)
+                parts = [unquote(p) for p in url.path.strip("/").split("/")]
+                if parts == ["api", "0", "buckets"]:
+                    self._send({b: {"id": b, "type": "currentwindow" if "window" in b else "afkstatus"}
+                                for b in (WINDOW_BUCKET, AFK_BUCKET)})
+                elif len(parts) == 5 and parts[:3] == ["api", "0", "buckets"] and parts[4] == "events":
+                    if parts[3] != WINDOW_BUCKET:
+                        self._send([])
+                        return
+                    params = parse_qs(url.query)
+                    start = _parse(params["start"][0]) if "start" in params else float("-inf")
+                    end = _parse(params["end"][0]) if "end" in params else float("inf")
+                    limit = int(params.get("limit", ["-1"])[0])
+                    events = fake.index.overlapping(start, end)[::-1]
+                    self._send(events[:limit] if limit >= 0 else events)
+                else:
+                    self._send({"message": "not found"}, status=404)
+
+            def do_POST(self):
+                fake.requests += 1
+                if urlparse(self.path).path.rstrip("/") != "/api/0/query":
+                    self._send({"message": "not found"}, status=404)
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                results = []
+                for period in body.get("timeperiods", []):
+                    start, end = period.split("/")
+                    events = fake.index.overlapping(_parse(start), _parse(end))
+                    # Query results carry no ids
+                    results.append([{k: v for k, v in e.items() if k != "id"} for e in events])
+                self._send(results)
+
+        return Handler
+
+    def start(self) -> "FakeActivityWatch":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+def main():
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    from synthetic_data import make_activity
+
+    parser = argparse.ArgumentParser(description="Serve synthetic activity over the ActivityWatch API")
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--port", type=int, default=5600)
+    args = parser.parse_args()
+
+    windows, _ = make_activity(args.events, datetime.datetime.now(datetime.timezone.utc))
+    aw = FakeActivityWatch(windows, port=args.port)
+    print(f"Serving {len(windows)} window events at {aw.url} (Ctrl+C to stop)")
+    try:
+        aw.server.serve_forever()
+    except KeyboardInterrupt:
+        aw.server.server_close()
+
+if __name__ == "__main__":
+    main()
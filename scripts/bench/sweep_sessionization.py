@@ -0,0 +1,189 @@
+"""
+Parameter sweep of the sessionization thresholds: replays archived (or
+synthetic) days through the sensor's timeline stages and the cognizer's
+block smoothing for every combination of
+
+    --gap            sensor gap_threshold: same-app events further apart start a new session
+    --interruption   sensor interruption_threshold: A-B-A is merged when B is shorter
+    --noise          sensor noise_threshold: shorter sessions are dropped
+    --block-noise    TimelineVisualizer noise_seconds: shorter blocks are absorbed into work
+    --block-gap      TimelineVisualizer max_merge_gap_seconds: blocks further apart never merge
+
+(all in seconds), and reports what each costs and keeps:
+
+    python scripts/bench/sweep_sessionization.py --replay 20260301:20260331
+    python scripts/bench/sweep_sessionization.py --synthetic-days 7 --gap 120 300 600 --block-noise 15 30 60
+
+    sessions       sessions written to the sensor log
+    blocks         timeline blocks after the cognizer's smoothing
+    prompt_chars   size of the timeline text sent to the LLM (get_text_for_llm)
+    categorized    share of active time with a category (not "❓ Uncategorized")
+    in_prompt      share of active time in blocks long enough to reach the prompt
+
+All figures are totals (shares: time-weighted) over the days. The sensor
+combinations are spread over a process pool; each worker loads the days
+once and scores every block combination on the sessions it built.
+"""
+import io
+import sys
+import json
+import time
+import argparse
+import datetime
+import itertools
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR / "modules"))
+sys.path.append(str(Path(__file__).resolve().parent))
+
+import sensor
+import cognizer
+from event_archive import EventArchive
+from event_columns import EventColumns
+from synthetic_data import make_activity
+
+SENSOR_KEYS = ("gap_threshold", "interruption_threshold", "noise_threshold")
+BLOCK_KEYS = ("noise_seconds", "max_merge_gap_seconds")
+DEFAULTS = {"gap_threshold": 300, "interruption_threshold": 60, "noise_threshold": 2,
+            "noise_seconds": cognizer.TimelineVisualizer.NOISE_SECONDS,
+            "max_merge_gap_seconds": cognizer.TimelineVisualizer.MAX_MERGE_GAP_SECONDS}
+# One synthetic window event per ~6s of awake time (15h a day), as in bench_sensor
+SYNTHETIC_EVENTS_PER_DAY = 9000
+
+class SilentCategorizer(cognizer.Categorizer):
+    """Categorizer that does not append to uncategorized_activities.log for every combination."""
+    def log_uncategorized(self, app: str, title: str):
+        pass
+
+def synthetic_days(n_days: int) -> List[Tuple[str, List[Dict], EventColumns]]:
+    end = datetime.datetime(2026, 3, 1, tzinfo=sensor.JST)
+    windows, visits = make_activity(n_days * SYNTHETIC_EVENTS_PER_DAY, end)
+    by_day: Dict[datetime.date, List[Dict]] = {}
+    for event in windows:
+        day = datetime.datetime.fromisoformat(event["timestamp"]).astimezone(sensor.JST).date()
+        by_day.setdefault(day, []).append(event)
+
+    days = []
+    for day, raw in sorted(by_day.items()):
+        day_end = datetime.datetime.combine(day + datetime.timedelta(days=1), datetime.time(), tzinfo=sensor.JST)
+        # The day and the one before, like replay_day
+        history = [v for v in visits
+                   if day_end - datetime.timedelta(days=2) <= datetime.datetime.fromisoformat(v["timestamp"]) < day_end]
+        days.append((day.isoformat(), history, EventColumns.from_events(sensor.clean_window_events(raw))))
+    return days
+
+def archived_days(specs: List[str]) -> List[Tuple[str, List[Dict], EventColumns]]:
+    archive = EventArchive(sensor.ARCHIVE_DIR)
+    days = []
+    for day in sensor.parse_replay_days(specs, archive):
+        archived = archive.load_day(day)
+        history = archived.history_items()
+        previous = archive.load_day(day - datetime.timedelta(days=1))
+        if previous is not None:
+            history = previous.history_items() + history
+        days.append((day.isoformat(), history, EventColumns.from_events(sensor.clean_window_events(archived.window_events()))))
+    return days
+
+def load_days(source: Dict) -> List[Tuple[str, List[Dict], EventColumns]]:
+    return archived_days(source["replay"]) if source.get("replay") else synthetic_days(source["synthetic_days"])
+
+# Per worker process: the days, loaded once by init_worker
+_days: List[Tuple[str, List[Dict], EventColumns]] = []
+_categorizer = None
+
+def init_worker(source: Dict):
+    global _days, _categorizer
+    _days = load_days(source)
+    _categorizer = SilentCategorizer()
+
+def evaluate(sensor_params: Dict, block_grid: List[Dict]) -> List[Dict]:
+    """One row per block combination, for one combination of sensor thresholds."""
+    started = time.perf_counter()
+    timelines = []
+    with redirect_stdout(io.StringIO()):
+        for _, history, windows in _days:
+            timelines.append(sensor.build_timeline_columns(history, windows, **sensor_params))
+    sensor_seconds = time.perf_counter() - started
+
+    rows = []
+    for block_params in block_grid:
+        row = dict(sensor_params, **block_params, days=len(timelines),
+                   sessions=sum(len(t) for t in timelines), blocks=0, prompt_chars=0)
+        total = categorized = in_prompt = 0.0
+        for timeline in timelines:
+            viz = cognizer.TimelineVisualizer(timeline, categorizer=_categorizer, **block_params)
+            row["blocks"] += len(viz.processed_blocks)
+            row["prompt_chars"] += len(viz.get_text_for_llm())
+            for block in viz.processed_blocks:
+                total += block["duration"]
+                if block["category"] != "❓ Uncategorized":
+                    categorized += block["duration"]
+                # Same cut-off as get_text_for_llm
+                if int(block["duration"] / 60) >= 5:
+                    in_prompt += block["duration"]
+        row["categorized"] = categorized / total if total else 0.0
+        row["in_prompt"] = in_prompt / total if total else 0.0
+        row["sensor_seconds"] = sensor_seconds
+        rows.append(row)
+    return rows
+
+def grid(values: Dict[str, List[float]], keys: Tuple[str, ...]) -> List[Dict]:
+    return [dict(zip(keys, combo)) for combo in itertools.product(*(values[k] for k in keys))]
+
+def print_table(rows: List[Dict]):
+    print(f"  {'gap':>5}{'intr':>6}{'noise':>6}{'b.noise':>8}{'b.gap':>7}"
+          f"{'sessions':>10}{'blocks':>8}{'prompt_chars':>14}{'categorized':>13}{'in_prompt':>11}")
+    for r in rows:
+        mark = "*" if all(r[k] == DEFAULTS[k] for k in DEFAULTS) else " "
+        print(f"{mark} {r['gap_threshold']:>5g}{r['interruption_threshold']:>6g}{r['noise_threshold']:>6g}"
+              f"{r['noise_seconds']:>8g}{r['max_merge_gap_seconds']:>7g}"
+              f"{r['sessions']:>10}{r['blocks']:>8}{r['prompt_chars']:>14,}"
+              f"{r['categorized']:>12.1%}{r['in_prompt']:>11.1%}")
+    print("  (* = current defaults)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep sessionization thresholds over archived or synthetic days")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--replay", nargs="+", metavar="SPEC",
+                        help="Archived days: YYYYMMDD, YYYYMMDD:YYYYMMDD or all (as sensor.py --replay)")
+    source.add_argument("--synthetic-days", type=int, default=3, help="Days of synthetic activity (default)")
+    parser.add_argument("--gap", type=float, nargs="+", default=[120, 300, 600])
+    parser.add_argument("--interruption", type=float, nargs="+", default=[30, 60, 120])
+    parser.add_argument("--noise", type=float, nargs="+", default=[2, 5])
+    parser.add_argument("--block-noise", type=float, nargs="+", default=[15, 30, 60])
+    parser.add_argument("--block-gap", type=float, nargs="+", default=[900, 1800])
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--sort", default="prompt_chars",
+                        choices=["prompt_chars", "sessions", "blocks", "categorized", "in_prompt"])
+    parser.add_argument("--json", type=Path, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    source_spec = {"replay": args.replay, "synthetic_days": args.synthetic_days}
+    sensor_grid = grid({"gap_threshold": args.gap, "interruption_threshold": args.interruption,
+                        "noise_threshold": args.noise}, SENSOR_KEYS)
+    block_grid = grid({"noise_seconds": args.block_noise, "max_merge_gap_seconds": args.block_gap}, BLOCK_KEYS)
+    print(f"--- {len(sensor_grid) * len(block_grid)} combinations over "
+          f"{' '.join(args.replay) if args.replay else f'{args.synthetic_days} synthetic day(s)'} ---")
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=(source_spec,)) as pool:
+        futures = [pool.submit(evaluate, params, block_grid) for params in sensor_grid]
+        rows = [row for future in futures for row in future.result()]
+    if not rows or rows[0]["days"] == 0:
+        print("No days to replay.")
+        return
+
+    rows.sort(key=lambda r: r[args.sort], reverse=args.sort in ("categorized", "in_prompt"))
+    print(f"{rows[0]['days']} day(s), {time.perf_counter() - started:.1f}s\n")
+    print_table(rows)
+
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2), encoding="utf-8")
+        print(f"\nSaved to {args.json}")
+
+if __name__ == "__main__":
+    main()
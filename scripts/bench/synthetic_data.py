@@ -0,0 +1,184 @@
+"""
+Synthetic sensor inputs for the benchmarks: days of ActivityWatch window
+events and the browser visits behind them, plus writers for Chromium
+`History` and Firefox `places.sqlite` databases with the tables the sensor
+reads.
+
+    windows, visits = make_activity(n_events=10000, end=now)
+    write_chromium_history(home / CHROME_HISTORY, visits[::2])
+    write_firefox_places(home / FIREFOX_PLACES, visits[1::2])
+"""
+import bisect
+import random
+import sqlite3
+import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Relative to the (fake) home folder, as sensor.BROWSERS expects
+CHROME_HISTORY = Path("AppData/Local/Google/Chrome/User Data/Default/History")
+FIREFOX_PLACES = Path("AppData/Roaming/Mozilla/Firefox/Profiles/bench.default-release/places.sqlite")
+
+EPOCH_CHROMIUM = datetime.datetime(1601, 1, 1, tzinfo=datetime.timezone.utc)
+EPOCH_FIREFOX = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+WORDS = [
+    "python", "rust", "docker", "kubernetes", "release", "notes", "issue", "pull", "request",
+    "api", "reference", "guide", "tutorial", "error", "stack", "overflow", "github", "review",
+    "design", "memory", "index", "query", "cache", "server", "client", "timeline", "sensor",
+    "vector", "search", "model", "train", "deploy", "config", "build", "test", "bench", "log",
+]
+SITES = ["github.com", "docs.python.org", "stackoverflow.com", "qiita.com", "zenn.dev",
+         "developer.mozilla.org", "news.ycombinator.com", "youtube.com", "arxiv.org"]
+BROWSER_SUFFIX = {"chrome.exe": " - Google Chrome", "firefox.exe": " — Mozilla Firefox"}
+# (app, weight, titles) -- weights roughly follow a developer's day
+APPS = [
+    ("chrome.exe", 30, None),
+    ("firefox.exe", 8, None),
+    ("Code.exe", 30, ["main.py - sensor - Visual Studio Code", "cognizer.py - my-local-llm - Visual Studio Code",
+                      "README.md - my-local-llm - Visual Studio Code", "test_sensor.py - Visual Studio Code"]),
+    ("WindowsTerminal.exe", 12, ["PowerShell", "Ubuntu", "python modules/sensor.py"]),
+    ("Slack.exe", 8, ["general | Slack", "random | Slack", "dev | Slack"]),
+    ("explorer.exe", 4, ["Downloads", "Documents", ""]),
+    ("obsidian.exe", 5, ["Daily Note - Obsidian", "Ideas - Obsidian"]),
+    ("LockApp.exe", 1, [""]),
+]
+
+def active_intervals(span_hours: float) -> List[Tuple[float, float]]:
+    """
+    Awake time within span_hours (seconds from the start): 16 hours a day
+    with a one hour lunch break, nights idle.
+    """
+    intervals = []
+    day_start = 0.0
+    span = span_hours * 3600
+    while day_start < span:
+        for lo, hi in ((0, 4), (5, 16)):
+            a, b = day_start + lo * 3600, min(day_start + hi * 3600, span)
+            if a < b:
+                intervals.append((a, b))
+        day_start += 86400
+    return intervals
+
+def make_activity(n_events: int, end: datetime.datetime, seconds_per_event: float = 6.0,
+                  visit_ratio: float = 0.25, seed: int = 0) -> Tuple[List[Dict], List[Dict]]:
+    """
+    n_events AW window events (raw bucket format, oldest first) ending at end.
+    Events fill awake hours at about one per seconds_per_event, so large
+    scales span several days rather than one impossibly busy one. About
+    visit_ratio * n_events browser visits come with them; browser windows
+    usually show a page visited shortly before, sometimes one opened hours
+    earlier (tab refocus).
+
+    Returns (window_events, visits); visits are {"url", "title", "timestamp"}.
+    """
+    rng = random.Random(seed)
+    awake_per_day = 15 * 3600
+    span_hours = max(1.0, n_events * seconds_per_event / awake_per_day * 24)
+    start = end - datetime.timedelta(hours=span_hours)
+    span = span_hours * 3600
+
+    intervals = active_intervals(span_hours)
+    cumulative = []
+    total = 0.0
+    for a, b in intervals:
+        total += b - a
+        cumulative.append(total)
+
+    def awake_offset(u: float) -> float:
+        i = bisect.bisect_right(cumulative, u)
+        i = min(i, len(intervals) - 1)
+        a, b = intervals[i]
+        return min(b, a + u - (cumulative[i] - (b - a)))
+
+    starts = sorted(awake_offset(rng.uniform(0, total)) for _ in range(n_events))
+
+    apps, weights = [a[0] for a in APPS], [a[1] for a in APPS]
+    titles_by_app = {a[0]: a[2] for a in APPS}
+
+    browser_share = sum(w for a, w, _ in APPS if a in BROWSER_SUFFIX) / sum(weights)
+    new_page_p = min(1.0, visit_ratio / browser_share)
+
+    windows, visits, pages = [], [], []
+    for i, offset in enumerate(starts):
+        next_offset = starts[i + 1] if i + 1 < len(starts) else span
+        # Long gaps are idle time (night, lunch), not one long window
+        duration = max(0.5, min(next_offset - offset, 1800) * rng.uniform(0.7, 1.0))
+        ts = start + datetime.timedelta(seconds=offset)
+        app = rng.choices(apps, weights)[0]
+
+        if app in BROWSER_SUFFIX:
+            if pages and rng.random() >= new_page_p:
+                # Back to an open tab: recent page most of the time, sometimes an old one
+                idx = len(pages) - 1 - min(int(rng.expovariate(0.3)), len(pages) - 1)
+                page_title = pages[idx][1]
+            else:
+                page_title = f"{' '.join(rng.choices(WORDS, k=rng.randint(2, 6)))} #{len(pages)}"
+                url = f"https://{rng.choice(SITES)}/{'/'.join(rng.choices(WORDS, k=2))}/{len(pages)}"
+                pages.append((url, page_title))
+                visits.append({"url": url, "title": page_title,
+                               "timestamp": (ts - datetime.timedelta(seconds=rng.uniform(0.2, 3))).isoformat()})
+            title = page_title + BROWSER_SUFFIX[app]
+        else:
+            title = rng.choice(titles_by_app[app])
+
+        windows.append({
+            "id": i + 1,
+            "timestamp": ts.isoformat(),
+            "duration": round(duration, 3),
+            "data": {"app": app, "title": title}
+        })
+
+    visits.sort(key=lambda v: v["timestamp"])
+    return windows, visits
+
+def _micros(iso_ts: str, epoch: datetime.datetime) -> int:
+    delta = datetime.datetime.fromisoformat(iso_ts) - epoch
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+def write_chromium_history(path: Path, visits: List[Dict]):
+    """Chromium History database with the urls/visits tables the sensor queries."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE urls (id INTEGER PRIMARY KEY, url TEXT, title TEXT, last_visit_time INTEGER)")
+    conn.execute("CREATE TABLE visits (id INTEGER PRIMARY KEY, url INTEGER, visit_time INTEGER)")
+    conn.execute("CREATE INDEX visits_time_index ON visits (visit_time)")
+    url_ids, url_rows, visit_rows = {}, [], []
+    for v in visits:
+        ts = _micros(v["timestamp"], EPOCH_CHROMIUM)
+        url_id = url_ids.get(v["url"])
+        if url_id is None:
+            url_id = url_ids[v["url"]] = len(url_ids) + 1
+            url_rows.append([url_id, v["url"], v["title"], ts])
+        url_rows[url_id - 1][3] = ts
+        visit_rows.append((url_id, ts))
+    conn.executemany("INSERT INTO urls VALUES (?, ?, ?, ?)", url_rows)
+    conn.executemany("INSERT INTO visits (url, visit_time) VALUES (?, ?)", visit_rows)
+    conn.commit()
+    conn.close()
+
+def write_firefox_places(path: Path, visits: List[Dict]):
+    """Firefox places.sqlite with the moz_places/moz_historyvisits tables the sensor queries."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE moz_places (id INTEGER PRIMARY KEY, url TEXT, title TEXT, last_visit_date INTEGER)")
+    conn.execute("CREATE TABLE moz_historyvisits (id INTEGER PRIMARY KEY, place_id INTEGER, visit_date INTEGER)")
+    conn.execute("CREATE INDEX moz_historyvisits_dateindex ON moz_historyvisits (visit_date)")
+    place_ids, place_rows, visit_rows = {}, [], []
+    for v in visits:
+        ts = _micros(v["timestamp"], EPOCH_FIREFOX)
+        place_id = place_ids.get(v["url"])
+        if place_id is None:
+            place_id = place_ids[v["url"]] = len(place_ids) + 1
+            place_rows.append([place_id, v["url"], v["title"], ts])
+        place_rows[place_id - 1][3] = ts
+        visit_rows.append((place_id, ts))
+    conn.executemany("INSERT INTO moz_places VALUES (?, ?, ?, ?)", place_rows)
+    conn.executemany("INSERT INTO moz_historyvisits (place_id, visit_date) VALUES (?, ?)", visit_rows)
+    conn.commit()
+    conn.close()
+
+def write_browser_profiles(home: Path, visits: List[Dict]):
+    """Splits the visits between a Chrome and a Firefox profile under home."""
+    write_chromium_history(home / CHROME_HISTORY, visits[::2])
+    write_firefox_places(home / FIREFOX_PLACES, visits[1::2])
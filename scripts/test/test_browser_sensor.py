@@ -0,0 +1,196 @@
+import sys
+import sqlite3
+import datetime
+import tempfile
+import unittest
+from unittest.mock import patch
+from pathlib import Path
+
+# Add modules directory to path
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR / "modules"))
+
+try:
+    import sensor
+except ImportError as e:
+    print(f"Could not import sensor: {e}")
+    sys.exit(1)
+
+EPOCH_CHROMIUM = datetime.datetime(1601, 1, 1, tzinfo=datetime.timezone.utc)
+EPOCH_FIREFOX = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+def micros_since(epoch, minutes_ago):
+    dt = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(minutes=minutes_ago)
+    return int((dt - epoch).total_seconds() * 1_000_000)
+
+def create_chromium_history(path: Path, visits):
+    """visits: list of (url, title, minutes_ago)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE urls (id INTEGER PRIMARY KEY, url TEXT, title TEXT, last_visit_time INTEGER)")
+    conn.execute("CREATE TABLE visits (id INTEGER PRIMARY KEY, url INTEGER, visit_time INTEGER)")
+    conn.execute("CREATE INDEX visits_time_index ON visits (visit_time)")
+    url_ids = {}
+    for url, title, minutes_ago in visits:
+        ts = micros_since(EPOCH_CHROMIUM, minutes_ago)
+        if url not in url_ids:
+            url_ids[url] = conn.execute(
+                "INSERT INTO urls (url, title, last_visit_time) VALUES (?, ?, ?)", (url, title, ts)
+            ).lastrowid
+        conn.execute("UPDATE urls SET last_visit_time = MAX(last_visit_time, ?) WHERE id = ?", (ts, url_ids[url]))
+        conn.execute("INSERT INTO visits (url, visit_time) VALUES (?, ?)", (url_ids[url], ts))
+    conn.commit()
+    conn.close()
+
+def create_firefox_places(path: Path, visits):
+    """visits: list of (url, title, minutes_ago)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE moz_places (id INTEGER PRIMARY KEY, url TEXT, title TEXT, last_visit_date INTEGER)")
+    conn.execute("CREATE TABLE moz_historyvisits (id INTEGER PRIMARY KEY, place_id INTEGER, visit_date INTEGER)")
+    conn.execute("CREATE INDEX moz_historyvisits_dateindex ON moz_historyvisits (visit_date)")
+    place_ids = {}
+    for url, title, minutes_ago in visits:
+        ts = micros_since(EPOCH_FIREFOX, minutes_ago)
+        if url not in place_ids:
+            place_ids[url] = conn.execute(
+                "INSERT INTO moz_places (url, title, last_visit_date) VALUES (?, ?, ?)", (url, title, ts)
+            ).lastrowid
+        conn.execute("UPDATE moz_places SET last_visit_date = MAX(last_visit_date, ?) WHERE id = ?", (ts, place_ids[url]))
+        conn.execute("INSERT INTO moz_historyvisits (place_id, visit_date) VALUES (?, ?)", (place_ids[url], ts))
+    conn.commit()
+    conn.close()
+
+class BrowserTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.home = Path(self.tmp.name) / "home"
+        self.data = Path(self.tmp.name) / "data"
+        self.data.mkdir()
+        self.patches = [
+            patch("pathlib.Path.home", return_value=self.home),
+            patch.object(sensor, "DATA_DIR", self.data),
+            patch.object(sensor, "CACHE_DIR", self.data / "cache"),
+            patch.object(sensor, "STATE_PATH", self.data / "sensor_state.json"),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.tmp.cleanup()
+
+    @property
+    def chrome_history(self) -> Path:
+        return self.home / "AppData/Local/Google/Chrome/User Data/Default/History"
+
+class TestCopyFreeReads(BrowserTestCase):
+    def test_reads_in_place_without_copy(self):
+        create_chromium_history(self.chrome_history, [("https://example.com/a", "Example A", 30)])
+        with patch.object(sensor, "shadow_copy_history") as mock_copy:
+            items = sensor.get_browser_history(hours=24)
+        mock_copy.assert_not_called()
+        self.assertEqual([i["url"] for i in items], ["https://example.com/a"])
+
+    def test_falls_back_to_shadow_copy(self):
+        create_chromium_history(self.chrome_history, [("https://example.com/a", "Example A", 30)])
+        real_connect = sqlite3.connect
+
+        def locked_connect(database, *args, **kwargs):
+            if kwargs.get("uri"):
+                raise sqlite3.OperationalError("database is locked")
+            return real_connect(database, *args, **kwargs)
+
+        with patch("sensor.sqlite3.connect", side_effect=locked_connect), \
+             patch.object(sensor, "shadow_copy_history", wraps=sensor.shadow_copy_history) as mock_copy:
+            items = sensor.get_browser_history(hours=24)
+        mock_copy.assert_called_once()
+        self.assertEqual(len(items), 1)
+        # The temporary copy is cleaned up
+        self.assertEqual(list(self.data.glob("temp_*")), [])
+
+def add_chromium_visit(path: Path, url, title, minutes_ago):
+    conn = sqlite3.connect(str(path))
+    ts = micros_since(EPOCH_CHROMIUM, minutes_ago)
+    row = conn.execute("SELECT id FROM urls WHERE url = ?", (url,)).fetchone()
+    url_id = row[0] if row else conn.execute(
+        "INSERT INTO urls (url, title, last_visit_time) VALUES (?, ?, ?)", (url, title, ts)).lastrowid
+    conn.execute("INSERT INTO visits (url, visit_time) VALUES (?, ?)", (url_id, ts))
+    conn.commit()
+    conn.close()
+
+class TestVisitCursor(BrowserTestCase):
+    def test_every_revisit_is_reported(self):
+        create_chromium_history(self.chrome_history, [
+            ("https://example.com/a", "Example A", 90),
+            ("https://example.com/b", "Example B", 60),
+            ("https://example.com/a", "Example A", 30),
+        ])
+        items = sensor.get_browser_history(hours=24)
+        self.assertEqual([i["url"] for i in items],
+                         ["https://example.com/a", "https://example.com/b", "https://example.com/a"])
+
+    def test_second_run_reads_only_new_visits(self):
+        create_chromium_history(self.chrome_history, [
+            ("https://example.com/a", "Example A", 90),
+            ("https://example.com/b", "Example B", 60),
+        ])
+        sensor.get_browser_history(hours=24)
+        self.assertEqual(sensor.load_state()["browser_cursors"]["Chrome/Default"]["visit_id"], 2)
+
+        add_chromium_visit(self.chrome_history, "https://example.com/c", "Example C", 5)
+        with patch.object(sensor, "read_visits", wraps=sensor.read_visits) as mock_read:
+            items = sensor.get_browser_history(hours=24)
+
+        # The query resumed after the cursor...
+        self.assertEqual(mock_read.call_args[0][4], 2)
+        # ...and the cached visits are still part of the window
+        self.assertEqual([i["url"] for i in items],
+                         ["https://example.com/a", "https://example.com/b", "https://example.com/c"])
+
+    def test_dry_run_saves_neither_cache_nor_cursor(self):
+        create_chromium_history(self.chrome_history, [("https://example.com/a", "Example A", 30)])
+        items = sensor.get_browser_history(hours=24, dry_run=True)
+        self.assertEqual([i["url"] for i in items], ["https://example.com/a"])
+        self.assertFalse(sensor.STATE_PATH.exists())
+        self.assertFalse((self.data / "cache").exists())
+
+    def test_firefox_visits(self):
+        places = self.home / "AppData/Roaming/Mozilla/Firefox/Profiles/abcd.default-release/places.sqlite"
+        create_firefox_places(places, [
+            ("https://developer.mozilla.org/", "MDN", 40),
+            ("https://developer.mozilla.org/", "MDN", 20),
+        ])
+        items = sensor.get_browser_history(hours=24)
+        self.assertEqual(len(items), 2)
+        self.assertTrue(all(i["source"] == "Firefox" for i in items))
+
+class TestMultiProfile(BrowserTestCase):
+    def test_all_profiles_are_merged_chronologically(self):
+        user_data = self.home / "AppData/Local/Google/Chrome/User Data"
+        create_chromium_history(user_data / "Default/History", [("https://a.example/", "A", 50)])
+        create_chromium_history(user_data / "Profile 1/History", [("https://b.example/", "B", 40)])
+        profiles = self.home / "AppData/Roaming/Floorp/Profiles"
+        create_firefox_places(profiles / "x1.default/places.sqlite", [("https://c.example/", "C", 30)])
+        create_firefox_places(profiles / "x2.work/places.sqlite", [("https://d.example/", "D", 60)])
+
+        items = sensor.get_browser_history(hours=24)
+
+        self.assertEqual([i["url"] for i in items],
+                         ["https://d.example/", "https://a.example/", "https://b.example/", "https://c.example/"])
+        cursors = sensor.load_state()["browser_cursors"]
+        self.assertEqual(sorted(cursors), ["Chrome/Default", "Chrome/Profile 1", "Floorp/x1.default", "Floorp/x2.work"])
+
+    def test_one_broken_profile_does_not_stop_the_others(self):
+        user_data = self.home / "AppData/Local/Google/Chrome/User Data"
+        create_chromium_history(user_data / "Default/History", [("https://a.example/", "A", 50)])
+        broken = user_data / "Profile 2/History"
+        broken.parent.mkdir(parents=True)
+        broken.write_bytes(b"not a database")
+
+        items = sensor.get_browser_history(hours=24)
+        self.assertEqual([i["url"] for i in items], ["https://a.example/"])
+
+if __name__ == "__main__":
+    unittest.main()
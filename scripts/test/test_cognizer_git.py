@@ -1,5 +1,6 @@
 import sys
 import json
+import tempfile
 import unittest
 from unittest.mock import MagicMock, patch
 from pathlib import Path
@@ -23,11 +24,12 @@ except ImportError as e:
 
 class TestCognizerGit(unittest.TestCase):
     def setUp(self):
-        self.test_log = BASE_DIR / "data" / "logs" / "test_git_activity.json"
+        self.tmp = tempfile.TemporaryDirectory()
+        self.test_log = Path(self.tmp.name) / "test_git_activity.json"
         
         # Mock journals dir
-        self.test_journals = BASE_DIR / "data" / "journals_test"
-        self.test_journals.mkdir(parents=True, exist_ok=True)
+        self.test_journals = Path(self.tmp.name) / "journals"
+        self.test_journals.mkdir()
         cognizer.JOURNALS_DIR = self.test_journals
         
         # Mock ollama client
@@ -36,6 +38,9 @@ class TestCognizerGit(unittest.TestCase):
             'message': {'content': '### 要約\nテスト要約'}
         }
 
+    def tearDown(self):
+        self.tmp.cleanup()
+
     @patch("memory.MemoryManager")
     def test_git_section_generation(self, mock_memory):
         # Ensure the test log exists
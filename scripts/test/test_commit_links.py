@@ -0,0 +1,195 @@
+import sys
+import unittest
+from pathlib import Path
+
+# Add modules directory to path
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR / "modules"))
+
+try:
+    import commit_links
+    from commit_links import SessionIndex
+except ImportError as e:
+    print(f"Could not import commit_links: {e}")
+    sys.exit(1)
+
+def block(start, end, app, title, category="💻 Work"):
+    """start/end: HH:MM on 2026-02-23 (JST)."""
+    return {"start": f"2026-02-23T{start}:00+09:00", "end": f"2026-02-23T{end}:00+09:00",
+            "app": app, "title": title, "category": category, "activity": "Coding"}
+
+def at(hhmm):
+    return commit_links.parse_time(f"2026-02-23 {hhmm}:00 +0900")
+
+def is_browsing(b):
+    return b["app"] == "chrome.exe"
+
+def is_editing(b):
+    return b["category"] == "💻 Work" and not is_browsing(b)
+
+def project_of(b):
+    return b["title"].split(" - ")[0]
+
+DAY = [
+    block("09:00", "09:20", "chrome.exe", "asyncio docs", "🌐 Browse"),
+    block("09:20", "09:50", "Code.exe", "my-llm - main.py"),
+    block("09:25", "09:30", "chrome.exe", "stack overflow", "🌐 Browse"),
+    block("10:00", "12:00", "Code.exe", "other - app.py"),
+    block("10:05", "10:10", "Slack.exe", "chat"),
+]
+
+class TestSessionIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = SessionIndex.from_blocks(DAY)
+
+    def test_latest_started_session_spanning_the_time_is_active(self):
+        self.assertEqual(self.index.active_at(at("09:10")), 0)
+        self.assertEqual(self.index.active_at(at("09:27")), 2)
+        # After the nested session, the enclosing one again
+        self.assertEqual(self.index.active_at(at("09:40")), 1)
+        self.assertEqual(self.index.active_at(at("11:00")), 3)
+        self.assertEqual(self.index.active_at(at("10:07")), 4)
+
+    def test_gaps_fall_back_to_the_session_that_just_ended(self):
+        self.assertIsNone(self.index.active_at(at("09:55")))
+        self.assertEqual(self.index.active_at(at("09:55"), tolerance=600), 1)
+        self.assertIsNone(self.index.active_at(at("08:00"), tolerance=600))
+        self.assertIsNone(self.index.active_at(at("13:00"), tolerance=600))
+
+    def test_overlapping_range(self):
+        self.assertEqual(self.index.overlapping(at("09:26"), at("10:01")), [1, 2, 3])
+        self.assertEqual(self.index.overlapping(at("09:50"), at("10:00")), [])
+        self.assertEqual(self.index.overlapping(at("12:00"), at("13:00")), [])
+
+    def test_long_overlapping_session(self):
+        # A whole-day session from a second machine spans every other one
+        blocks = [block("00:00", "23:59", "Code.exe", "desk - notes.md")] + [
+            block(f"{h:02d}:{m:02d}", f"{h:02d}:{m + 5:02d}", "chrome.exe", f"page {h} {m}", "🌐 Browse")
+            for h in range(9, 18) for m in range(0, 60, 10)]
+        index = SessionIndex.from_blocks(blocks)
+        self.assertEqual(index.active_at(at("09:02")), 1)
+        # Between the short ones (and at a boundary shared by none) the long one is active
+        self.assertEqual(index.active_at(at("09:07")), 0)
+        self.assertEqual(index.active_at(at("09:05")), 1)
+        self.assertEqual(index.active_at(at("17:53")), len(blocks) - 1)
+        self.assertEqual(index.active_at(at("20:00")), 0)
+        self.assertEqual(index.overlapping(at("12:02"), at("12:12")), [0, 19, 20])
+        # Lookups go through the precomputed segments
+        self.assertEqual(len(index.points), 2 * len(blocks))
+
+    def test_unsorted_and_unparseable_blocks(self):
+        index = SessionIndex.from_blocks([DAY[3], {"start": "", "end": ""}, DAY[0]])
+        self.assertEqual(index.sessions, [DAY[0], DAY[3]])
+
+class TestAttributeCommits(unittest.TestCase):
+    def test_commit_links_session_project_and_research(self):
+        blocks = [dict(b) for b in DAY]
+        git = [
+            {"repo": "other", "commits": [{"hash": "bbb2222", "message": "fix app", "timestamp": "2026-02-23 11:30:00 +0900"}]},
+            {"repo": "my-llm", "commits": [{"hash": "aaa1111", "message": "use asyncio", "timestamp": "2026-02-23 09:45:00 +0900",
+                                            "files_changed": 2}]},
+        ]
+        links = commit_links.attribute_commits(SessionIndex.from_blocks(blocks), git, project_of, is_browsing)
+
+        self.assertEqual([link["hash"] for link in links], ["aaa1111", "bbb2222"])
+        first = links[0]
+        self.assertIs(first["session"], blocks[1])
+        self.assertEqual(first["project"], "my-llm")
+        self.assertEqual(first["repo"], "my-llm")
+        self.assertEqual(first["files_changed"], 2)
+        # 09:15-09:45: 5 min of docs, 5 min of stack overflow
+        self.assertEqual(first["research"], [{"title": "asyncio docs", "seconds": 300},
+                                             {"title": "stack overflow", "seconds": 300}])
+        self.assertEqual(blocks[1]["commits"], [first])
+        self.assertEqual(links[1]["research"], [])
+        self.assertEqual(blocks[3]["commits"], [links[1]])
+
+    def test_commit_outside_every_session(self):
+        git = [{"repo": "r", "commits": [{"hash": "c", "message": "late", "timestamp": "2026-02-23 23:00:00 +0900"},
+                                          {"hash": "d", "message": "no time"}]}]
+        links = commit_links.attribute_commits(SessionIndex.from_blocks(DAY), git, project_of, is_browsing)
+        self.assertEqual([(link["hash"], link["session"], link["project"]) for link in links],
+                         [("c", None, None), ("d", None, None)])
+
+class TestExtractChains(unittest.TestCase):
+    def chains(self, blocks, commits):
+        git = [{"repo": "my-llm", "commits": commits}]
+        links = commit_links.attribute_commits(SessionIndex.from_blocks(blocks), git, project_of, is_browsing)
+        return commit_links.extract_chains(blocks, links, project_of, is_browsing, is_editing)
+
+    def test_keywords(self):
+        self.assertEqual(commit_links.keywords("fix: asyncio_loop in Main.py - Google Chrome"),
+                         {"asyncio", "loop", "main"})
+        self.assertEqual(commit_links.keywords("非同期処理 の例"), {"非同期処理", "の例"})
+
+    def test_topic_sharing_keywords_beats_longer_unrelated_browsing(self):
+        blocks = [
+            block("09:00", "09:25", "chrome.exe", "cooking recipes", "🌐 Browse"),
+            block("09:25", "09:30", "chrome.exe", "asyncio event loop docs", "🌐 Browse"),
+            block("09:30", "10:00", "Code.exe", "my-llm - main.py"),
+        ]
+        chains = self.chains(blocks, [{"hash": "aaa1111", "message": "run the event loop with asyncio",
+                                       "timestamp": "2026-02-23 09:55:00 +0900"}])
+        self.assertEqual(len(chains), 1)
+        chain = chains[0]
+        self.assertIs(chain["topic"], blocks[1])
+        self.assertIs(chain["session"], blocks[2])
+        self.assertEqual(chain["project"], "my-llm")
+        self.assertEqual(chain["shared"], ["asyncio", "event", "loop"])
+        self.assertEqual(chain["score"], 3)
+
+    def test_commit_during_browsing_uses_the_matching_editor_session(self):
+        blocks = [
+            block("09:00", "09:10", "chrome.exe", "pytest fixtures", "🌐 Browse"),
+            block("09:10", "09:25", "Code.exe", "my-llm - conftest.py"),
+            block("09:25", "09:32", "Slack.exe", "random"),
+            block("09:32", "09:40", "chrome.exe", "pull request", "🌐 Browse"),
+        ]
+        chains = self.chains(blocks, [{"hash": "b", "message": "pytest fixtures for conftest",
+                                       "timestamp": "2026-02-23 09:38:00 +0900"}])
+        self.assertEqual([(c["topic"]["title"], c["session"]["title"]) for c in chains],
+                         [("pytest fixtures", "my-llm - conftest.py")])
+
+    def test_non_editor_block_is_not_the_session(self):
+        blocks = [
+            block("09:00", "09:20", "chrome.exe", "asyncio event loop tutorial", "🌐 Browse"),
+            block("09:20", "09:40", "Spotify.exe", "Spotify - playlist", "🎮 Break"),
+        ]
+        commits = [{"hash": "e", "message": "fix asyncio event loop leak", "timestamp": "2026-02-23 09:35:00 +0900"}]
+        self.assertEqual(self.chains(blocks, commits), [])
+
+        # An editor block on the same project before it is used instead
+        blocks.insert(1, block("09:20", "09:30", "Code.exe", "my-llm - loop.py"))
+        blocks[2] = block("09:30", "09:40", "Spotify.exe", "Spotify - playlist", "🎮 Break")
+        chains = self.chains(blocks, commits)
+        self.assertEqual([(c["session"]["title"], c["project"]) for c in chains], [("my-llm - loop.py", "my-llm")])
+
+    def test_editor_session_of_another_project_is_skipped(self):
+        blocks = [
+            block("09:00", "09:20", "chrome.exe", "asyncio event loop tutorial", "🌐 Browse"),
+            block("09:20", "09:30", "Code.exe", "other - asyncio_loop.py"),
+            block("09:30", "09:40", "chrome.exe", "pull request", "🌐 Browse"),
+        ]
+        commits = [{"hash": "f", "message": "fix asyncio event loop leak", "timestamp": "2026-02-23 09:38:00 +0900"}]
+        self.assertEqual(self.chains(blocks, commits), [])
+
+    def test_no_chain_without_shared_keywords_or_prior_research(self):
+        blocks = [
+            block("09:00", "09:20", "chrome.exe", "weather tomorrow", "🌐 Browse"),
+            block("09:20", "10:00", "Code.exe", "my-llm - main.py"),
+            # Browsing after the editor session is not its research
+            block("10:00", "10:10", "chrome.exe", "tokenizer benchmark", "🌐 Browse"),
+        ]
+        commits = [{"hash": "c", "message": "speed up tokenizer", "timestamp": "2026-02-23 09:50:00 +0900"}]
+        self.assertEqual(self.chains(blocks, commits), [])
+
+    def test_research_older_than_the_lookback_is_ignored(self):
+        blocks = [
+            block("07:00", "07:10", "chrome.exe", "tokenizer benchmark", "🌐 Browse"),
+            block("07:10", "10:00", "Code.exe", "my-llm - main.py"),
+        ]
+        commits = [{"hash": "d", "message": "speed up tokenizer", "timestamp": "2026-02-23 09:50:00 +0900"}]
+        self.assertEqual(self.chains(blocks, commits), [])
+
+if __name__ == "__main__":
+    unittest.main()
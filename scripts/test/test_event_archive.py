@@ -0,0 +1,132 @@
+import sys
+import datetime
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+# Add modules directory to path
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR / "modules"))
+
+try:
+    import sensor
+    import event_archive
+    from event_archive import EventArchive
+except ImportError as e:
+    print(f"Could not import event_archive: {e}")
+    sys.exit(1)
+
+JST = datetime.timezone(datetime.timedelta(hours=9))
+DAY = datetime.date(2026, 3, 2)
+
+def at(hour, minute=0, day=DAY):
+    return datetime.datetime.combine(day, datetime.time(hour, minute), tzinfo=JST).astimezone(datetime.timezone.utc)
+
+def window(hour, minute, app, title, duration=120.0, day=DAY):
+    """A raw AW window event."""
+    return {"timestamp": at(hour, minute, day).isoformat(), "duration": duration,
+            "data": {"app": app, "title": title}}
+
+def visit(hour, minute, url, title, day=DAY):
+    return {"timestamp": at(hour, minute, day).isoformat(), "url": url, "title": title, "source": "Chrome"}
+
+WINDOWS = [
+    window(9, 0, "chrome.exe", "Docs - Google Chrome"),
+    window(9, 2, "Code.exe", "main.py - Visual Studio Code"),
+    window(9, 30, "Code.exe", "main.py - Visual Studio Code ✓"),
+    window(10, 0, "chrome.exe", "Issue #1 - Google Chrome"),
+]
+HISTORY = [
+    visit(8, 59, "https://docs.example/", "Docs"),
+    visit(9, 59, "https://github.com/x/y/issues/1", "Issue #1"),
+]
+
+class TestEventArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.archive = EventArchive(Path(self.tmp.name) / "archive")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_is_memory_mapped(self):
+        self.archive.write_day(DAY, list(reversed(WINDOWS)), HISTORY)
+        day = self.archive.load_day(DAY)
+        self.assertIsInstance(day.windows, np.memmap)
+        self.assertEqual(day.windows.dtype, event_archive.WINDOW_DTYPE)
+        self.assertEqual(day.window_events(), WINDOWS)
+        self.assertEqual(day.history_items(), HISTORY)
+        self.assertEqual(self.archive.days(), [DAY])
+        self.assertIsNone(self.archive.load_day(DAY + datetime.timedelta(days=1)))
+
+    def test_update_replaces_only_the_collected_range(self):
+        self.archive.write_day(DAY, WINDOWS, HISTORY)
+        recollected = [window(9, 30, "Code.exe", "tests.py - Visual Studio Code"),
+                       window(11, 0, "Slack.exe", "general - Slack")]
+        self.archive.update(recollected, [], at(9, 15), at(12, 0))
+
+        day = self.archive.load_day(DAY)
+        self.assertEqual([e["data"]["title"] for e in day.window_events()], [
+            "Docs - Google Chrome", "main.py - Visual Studio Code",
+            "tests.py - Visual Studio Code", "general - Slack",
+        ])
+        # Visits outside the range are kept; the one inside was not seen again
+        self.assertEqual([h["url"] for h in day.history_items()], ["https://docs.example/"])
+
+    def test_update_splits_by_jst_day(self):
+        next_day = DAY + datetime.timedelta(days=1)
+        events = [window(23, 0, "Code.exe", "late"), window(1, 0, "Code.exe", "early", day=next_day)]
+        self.archive.update(events, [], at(22, 0), at(2, 0, next_day))
+        self.assertEqual(self.archive.days(), [DAY, next_day])
+        self.assertEqual([e["data"]["title"] for e in self.archive.load_day(next_day).window_events()], ["early"])
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.archive = EventArchive(Path(self.tmp.name) / "archive")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_replay_matches_the_original_timeline(self):
+        self.archive.write_day(DAY, WINDOWS, HISTORY)
+        expected = sensor.build_timeline(HISTORY, sensor.clean_window_events(WINDOWS))
+        self.assertEqual(sensor.replay_day(DAY, self.archive), expected)
+        self.assertIn("https://github.com/x/y/issues/1", expected[-1]["urls"])
+
+    def test_replay_with_other_thresholds(self):
+        self.archive.write_day(DAY, WINDOWS, HISTORY)
+        # 9:04 -> 9:30 is a 26 minute gap
+        self.assertEqual(len(sensor.replay_day(DAY, self.archive, gap_threshold=3600)), 3)
+        self.assertEqual(len(sensor.replay_day(DAY, self.archive, gap_threshold=600)), 4)
+
+    def test_replay_cleans_the_raw_events(self):
+        # Alt-tab blips and duplicate heartbeats are archived as collected
+        raw = WINDOWS[:2] + [window(9, 4, "explorer.exe", "", duration=0.5),
+                             window(9, 4, "Code.exe", "main.py - Visual Studio Code")]
+        self.archive.write_day(DAY, raw, HISTORY)
+        self.assertEqual(len(self.archive.load_day(DAY).window_events()), 4)
+        sessions = sensor.replay_day(DAY, self.archive)
+        self.assertEqual(sessions, sensor.build_timeline(HISTORY, sensor.clean_window_events(raw)))
+        self.assertNotIn("explorer.exe", [s["app"] for s in sessions])
+        self.assertEqual(sessions[-1]["event_count"], 1)
+
+    def test_previous_day_history_is_matched(self):
+        previous = DAY - datetime.timedelta(days=1)
+        self.archive.write_day(previous, [], [visit(23, 50, "https://late.example/", "Late Read", day=previous)])
+        self.archive.write_day(DAY, [window(0, 10, "chrome.exe", "Late Read - Google Chrome")], [])
+        sessions = sensor.replay_day(DAY, self.archive)
+        self.assertEqual(sessions[0]["urls"], ["https://late.example/"])
+
+    def test_parse_replay_days(self):
+        for offset in range(3):
+            self.archive.write_day(DAY + datetime.timedelta(days=offset), WINDOWS[:1], [])
+        self.assertEqual(len(sensor.parse_replay_days(["all"], self.archive)), 3)
+        self.assertEqual(sensor.parse_replay_days(["20260303:20260310"], self.archive),
+                         [datetime.date(2026, 3, 3), datetime.date(2026, 3, 4)])
+        self.assertEqual(sensor.parse_replay_days(["20260302", "20260302"], self.archive), [DAY])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import sys
+import unittest
+import numpy as np
+from pathlib import Path
+
+# Add modules directory to path
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR / "modules"))
+
+try:
+    import sensor
+    import event_columns
+except ImportError as e:
+    print(f"Could not import sensor: {e}")
+    sys.exit(1)
+
+def event(ts, duration, app="Code.exe", title="main.py", url=None):
+    e = {"timestamp": f"2026-02-23T{ts}+00:00", "duration": duration, "app": app, "title": title}
+    if url:
+        e["details"] = [{"url": url}]
+    return e
+
+def session(app, duration, title="t", start="10:00:00", end="10:01:00"):
+    return {"start_time": f"2026-02-23T{start}+00:00", "end_time": f"2026-02-23T{end}+00:00",
+            "app": app, "titles": [title], "urls": [], "duration": duration, "event_count": 1}
+
+class TestSessionize(unittest.TestCase):
+    def test_breaks_on_app_change_and_gap(self):
+        sessions = sensor.sessionize_events([
+            event("10:00:00", 60),
+            event("10:02:00", 30, title="util.py"),          # gap 60s: same session
+            event("10:10:00", 10),                            # gap > 300s: new session
+            event("10:10:10", 10, app="chrome.exe", title="Docs", url="https://a/"),
+        ])
+        self.assertEqual([(s["app"], s["event_count"]) for s in sessions],
+                         [("Code.exe", 2), ("Code.exe", 1), ("chrome.exe", 1)])
+        self.assertEqual(sessions[0]["titles"], ["main.py", "util.py"])
+        self.assertEqual(sessions[0]["end_time"], "2026-02-23T10:02:30+00:00")
+        self.assertEqual(sessions[2]["urls"], ["https://a/"])
+
+    def test_gap_is_measured_from_latest_end(self):
+        # A long first event still covers the third one even though the second ended early
+        sessions = sensor.sessionize_events([
+            event("10:00:00", 1200),
+            event("10:01:00", 5),
+            event("10:15:00", 5),
+        ])
+        self.assertEqual(len(sessions), 1)
+        self.assertEqual(sessions[0]["event_count"], 3)
+
+class TestCompress(unittest.TestCase):
+    def test_cascading_aba_merge_and_noise(self):
+        compressed = sensor.compress_sessions([
+            session("A", 100, "a1", "10:00:00", "10:01:40"),
+            session("B", 20, "b", "10:01:40", "10:02:00"),
+            session("A", 50, "a2", "10:02:00", "10:02:50"),
+            session("N", 1, "noise", "10:02:50", "10:02:51"),
+            session("B", 10, "b", "10:02:51", "10:03:01"),
+            session("A", 30, "a1", "10:03:01", "10:03:31"),
+            session("C", 500, "c", "10:03:31", "10:11:51"),
+        ])
+        self.assertEqual([s["app"] for s in compressed], ["A", "C"])
+        merged = compressed[0]
+        self.assertEqual(merged["duration"], 210)
+        self.assertEqual(merged["event_count"], 5)
+        # Ranked by summed dwell time: a1 100+30, a2 50, b 20+10
+        self.assertEqual(merged["titles"], ["a1", "a2", "b"])
+        self.assertEqual(merged["title_seconds"], [130, 50, 30])
+        self.assertEqual(merged["titles_other"], 0)
+        self.assertEqual(merged["end_time"], "2026-02-23T10:03:31+00:00")
+
+    def test_long_interruption_is_kept(self):
+        compressed = sensor.compress_sessions([session("A", 100), session("B", 60), session("A", 100)])
+        self.assertEqual([s["app"] for s in compressed], ["A", "B", "A"])
+
+class TestColumns(unittest.TestCase):
+    def test_iso_round_trip(self):
+        values = ["2026-02-23T10:00:00+00:00", "2026-02-23T10:00:00.250000+00:00"]
+        us = event_columns.parse_iso_column(values)
+        self.assertEqual(event_columns.format_iso_column(us), values)
+        # Non-UTC offsets take the per-value path
+        self.assertEqual(event_columns.parse_iso_column(["2026-02-23T19:00:00+09:00"])[0], us[0])
+
+    def test_segmented_cummax_without_lift(self):
+        values = np.array([5, 1, 9, 2, 3, 1], dtype=np.int64)
+        segments = np.array([0, 0, 0, 1, 1, 1])
+        expected = [5, 5, 9, 2, 3, 3]
+        self.assertEqual(event_columns.segmented_cummax(values, segments).tolist(), expected)
+        # Too wide to lift segments within int64: per-segment fallback
+        scale = 2 ** 59
+        self.assertEqual(event_columns.segmented_cummax(values * scale, segments).tolist(),
+                         [v * scale for v in expected])
+
+    def test_build_timeline_matches_dict_pipeline(self):
+        history = [{"url": "https://a/", "title": "Docs", "timestamp": "2026-02-23T09:59:00+00:00"}]
+        events = [event("10:00:00", 60, app="chrome.exe", title="Docs - Google Chrome"),
+                  event("10:01:00", 30), event("10:01:30", 20, app="chrome.exe", title="Docs - Google Chrome")]
+        expected = sensor.compress_sessions(sensor.sessionize_events(sensor.fuse_streams(history, events)))
+        self.assertEqual(sensor.build_timeline(history, events), expected)
+        self.assertEqual(expected[0]["urls"], ["https://a/"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import sys
+import unittest
+from pathlib import Path
+
+# Add modules directory to path
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR / "modules"))
+
+try:
+    import sensor
+except ImportError as e:
+    print(f"Could not import sensor: {e}")
+    sys.exit(1)
+
+def history(url, title, ts):
+    return {"url": url, "title": title, "timestamp": f"2026-02-23T{ts}+00:00", "source": "Chrome"}
+
+def window(title, ts, app="chrome.exe"):
+    return {"app": app, "title": title, "timestamp": f"2026-02-23T{ts}+00:00", "duration": 10}
+
+class TestFuseStreams(unittest.TestCase):
+    def fuse_one(self, hist, win):
+        fused = sensor.fuse_streams(hist, [win])
+        details = fused[0]["details"]
+        return details[0]["url"] if details else None
+
+    def test_exact_title(self):
+        url = self.fuse_one([history("https://a/", "Docs", "10:00:00")], window("docs", "10:05:00"))
+        self.assertEqual(url, "https://a/")
+
+    def test_history_title_inside_window_title(self):
+        url = self.fuse_one([history("https://a/", "Pull request #12", "10:00:00")],
+                            window("Pull request #12 - Google Chrome", "10:05:00"))
+        self.assertEqual(url, "https://a/")
+
+    def test_short_history_title_inside_window_title(self):
+        url = self.fuse_one([history("https://x/", "X", "10:00:00")],
+                            window("Home / X - Google Chrome", "10:05:00"))
+        self.assertEqual(url, "https://x/")
+
+    def test_window_title_inside_history_title(self):
+        url = self.fuse_one([history("https://a/", "A very long article title | Site", "10:00:00")],
+                            window("A very long article", "10:05:00"))
+        self.assertEqual(url, "https://a/")
+
+    def test_latest_preceding_match_wins(self):
+        hist = [
+            history("https://old/", "Issue 1", "09:00:00"),
+            history("https://new/", "Issue 1 comments", "09:30:00"),
+            history("https://future/", "Issue 1 - later", "11:00:00"),
+        ]
+        url = self.fuse_one(hist, window("Issue 1 comments - Google Chrome", "10:00:00"))
+        self.assertEqual(url, "https://new/")
+
+    def test_no_match_and_non_browser(self):
+        hist = [history("https://a/", "Docs", "10:00:00")]
+        self.assertIsNone(self.fuse_one(hist, window("New Tab - Google Chrome", "10:05:00")))
+        fused = sensor.fuse_streams(hist, [window("Docs", "10:05:00", app="Code.exe")])
+        self.assertEqual(fused[0]["type"], "app")
+
+if __name__ == "__main__":
+    unittest.main()
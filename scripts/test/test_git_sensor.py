@@ -1,4 +1,9 @@
+import os
 import sys
+import shutil
+import datetime
+import subprocess
+import tempfile
 import unittest
 from unittest.mock import MagicMock, patch
 from pathlib import Path
@@ -13,97 +18,51 @@ except ImportError as e:
     print(f"Could not import sensor: {e}")
     sys.exit(1)
 
+def git_log_record(hash_val, subject, numstat=""):
+    """One commit as printed by `git log GIT_LOG_FORMAT --numstat`, dated now."""
+    ts = datetime.datetime.now(sensor.JST).strftime("%Y-%m-%d %H:%M:%S +0900")
+    return f"\0{hash_val}\x1f{ts}\x1f{ts}\x1fauthor\x1f{subject}\n\n{numstat}"
+
 class TestGitSensor(unittest.TestCase):
     def setUp(self):
         # Mock config
         sensor.config.git_repos = []
         sensor.config.git_base_folders = ["C:/fake/base"]
         sensor.config.git_author = "yamadarikuto"
+        self.tmp = tempfile.TemporaryDirectory()
+        self.patches = [
+            patch.object(sensor, "GIT_DISCOVERY_PATH", Path(self.tmp.name) / "git_discovery.json"),
+            patch.object(sensor, "GIT_COMMIT_CACHE_PATH", Path(self.tmp.name) / "git_commit_cache.json"),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.tmp.cleanup()
 
     @patch("shutil.which")
-    @patch("sensor.Path")
     @patch("subprocess.run")
-    def test_get_git_activity_discovery(self, mock_run, mock_path_class, mock_which):
+    def test_get_git_activity_discovery(self, mock_run, mock_which):
         # Mock git existence
         mock_which.return_value = "/usr/bin/git"
         
-        # Setup mock paths for C:/fake/base/repo_a and C:/fake/base/folder_1/repo_b
-        base_mock = MagicMock()
-        repo_a_mock = MagicMock()
-        repo_a_git_mock = MagicMock()
-        folder_1_mock = MagicMock()
-        repo_b_mock = MagicMock()
-        repo_b_git_mock = MagicMock()
-        
-        # Configure name and existence
-        base_mock.name = "base"
-        repo_a_mock.name = "repo_a"
-        folder_1_mock.name = "folder_1"
-        repo_b_mock.name = "repo_b"
-        
-        # Set exists() to False by default for all mocks
-        for m in [base_mock, repo_a_mock, repo_a_git_mock, folder_1_mock, repo_b_mock, repo_b_git_mock]:
-            m.exists.return_value = False
-            
-        base_mock.exists.return_value = True
-        repo_a_mock.exists.return_value = True
-        folder_1_mock.exists.return_value = True
-        repo_b_mock.exists.return_value = True
-        
-        # Mocking Path(base)
-        mock_path_class.side_effect = lambda p: base_mock if p == "C:/fake/base" else MagicMock()
-        
-        # Mocking / operator
-        def base_div(x):
-            if x == "repo_a": return repo_a_mock
-            if x == "folder_1": return folder_1_mock
-            res = MagicMock()
-            res.exists.return_value = False
-            return res
-        base_mock.__truediv__.side_effect = base_div
-        
-        def repo_a_div(x):
-            if x == ".git": return repo_a_git_mock
-            res = MagicMock()
-            res.exists.return_value = False
-            return res
-        repo_a_mock.__truediv__.side_effect = repo_a_div
-        repo_a_git_mock.exists.return_value = True
-        
-        def folder_1_div(x):
-            if x == "repo_b": return repo_b_mock
-            res = MagicMock()
-            res.exists.return_value = False
-            return res
-        folder_1_mock.__truediv__.side_effect = folder_1_div
-        
-        def repo_b_div(x):
-            if x == ".git": return repo_b_git_mock
-            res = MagicMock()
-            res.exists.return_value = False
-            return res
-        repo_b_mock.__truediv__.side_effect = repo_b_div
-        repo_b_git_mock.exists.return_value = True
-        
-        # Mock iterdir
-        base_mock.iterdir.return_value = [repo_a_mock, folder_1_mock]
-        folder_1_mock.iterdir.return_value = [repo_b_mock]
-        repo_a_mock.iterdir.return_value = []
-        repo_b_mock.iterdir.return_value = []
-        
-        # Mock is_dir
-        repo_a_mock.is_dir.return_value = True
-        folder_1_mock.is_dir.return_value = True
-        repo_b_mock.is_dir.return_value = True
+        # base/repo_a and base/folder_1/repo_b are repos; node_modules is pruned
+        base = Path(self.tmp.name) / "base"
+        (base / "repo_a" / ".git").mkdir(parents=True)
+        (base / "folder_1" / "repo_b" / ".git").mkdir(parents=True)
+        (base / "node_modules" / "pkg" / ".git").mkdir(parents=True)
+        sensor.config.git_base_folders = [str(base)]
         
         # Mock git log output
         mock_run.return_value = MagicMock(
             returncode=0,
-            stdout="hash1|msg|2026-02-23 10:00:00 +0900|author",
+            stdout=git_log_record("hash1", "msg"),
             stderr=""
         )
         
-        activity = sensor.get_git_activity(hours=24)
+        activity, diagnostics = sensor.get_git_activity(hours=24)
         
         # Should discover repo_a and repo_b
         repos_found = [a["repo"] for a in activity]
@@ -111,6 +70,35 @@ class TestGitSensor(unittest.TestCase):
         self.assertIn("repo_b", repos_found)
         self.assertEqual(len(activity), 2)
 
+    def test_discovery_index_skips_unchanged_directories(self):
+        base = Path(self.tmp.name) / "base"
+        (base / "repo_a" / ".git").mkdir(parents=True)
+        (base / "folder_1" / "deep").mkdir(parents=True)
+
+        first = sensor.discover_git_repos([str(base)])
+        self.assertEqual([r["name"] for r in first], ["repo_a"])
+
+        # Nothing changed: no directory is listed again
+        with patch("sensor.os.scandir", wraps=os.scandir) as mock_scandir:
+            second = sensor.discover_git_repos([str(base)])
+        self.assertEqual(second, first)
+        mock_scandir.assert_not_called()
+
+        # A new repo only rescans the directory that changed (and the new subtree)
+        (base / "folder_1" / "repo_b" / ".git").mkdir(parents=True)
+        with patch("sensor.os.scandir", wraps=os.scandir) as mock_scandir:
+            third = sensor.discover_git_repos([str(base)])
+        self.assertEqual(sorted(r["name"] for r in third), ["repo_a", "repo_b"])
+        scanned = {Path(c.args[0]).name for c in mock_scandir.call_args_list}
+        self.assertEqual(scanned, {"folder_1", "repo_b"})
+
+    def test_discovery_dry_run_does_not_save_the_index(self):
+        base = Path(self.tmp.name) / "base"
+        (base / "repo_a" / ".git").mkdir(parents=True)
+        found = sensor.discover_git_repos([str(base)], dry_run=True)
+        self.assertEqual([r["name"] for r in found], ["repo_a"])
+        self.assertFalse(sensor.GIT_DISCOVERY_PATH.exists())
+
     @patch("shutil.which")
     @patch("pathlib.Path.exists")
     @patch("subprocess.run")
@@ -144,14 +132,144 @@ class TestGitSensor(unittest.TestCase):
         author_flags = [arg for arg in cmd if arg.startswith("--author=")]
         self.assertEqual(len(author_flags), 0)
 
+    @patch("shutil.which")
+    @patch("pathlib.Path.exists")
+    @patch("subprocess.run")
+    def test_slow_repo_times_out_without_blocking_others(self, mock_run, mock_exists, mock_which):
+        import subprocess
+        mock_which.return_value = "/usr/bin/git"
+        mock_exists.return_value = True
+        sensor.config.git_repos = [
+            {"path": "C:/slow", "name": "slow"},
+            {"path": "C:/fast", "name": "fast"},
+        ]
+        sensor.config.git_base_folders = []
+
+        def run(cmd, cwd=None, **kwargs):
+            if cwd.endswith("slow"):
+                raise subprocess.TimeoutExpired(cmd, kwargs.get("timeout"))
+            return MagicMock(returncode=0, stdout=git_log_record("h", "m"), stderr="")
+        mock_run.side_effect = run
+
+        activity, diagnostics = sensor.get_git_activity(hours=24)
+
+        self.assertEqual([a["repo"] for a in activity], ["fast"])
+        self.assertEqual(len(diagnostics), 1)
+        self.assertIn("timed out in slow", diagnostics[0])
+        # Every call carries the configured timeout
+        self.assertTrue(all(c.kwargs["timeout"] == sensor.config.git_timeout for c in mock_run.call_args_list))
+
     @patch("shutil.which")
     @patch("pathlib.Path.exists")
     @patch("subprocess.run")
     def test_git_not_found(self, mock_run, mock_exists, mock_which):
         mock_which.return_value = None
-        activity = sensor.get_git_activity(hours=24)
+        activity, diagnostics = sensor.get_git_activity(hours=24)
         self.assertEqual(activity, [])
+        self.assertEqual(len(diagnostics), 1)
+        self.assertIn("Git CLI not found", diagnostics[0])
         mock_run.assert_not_called()
 
+@unittest.skipUnless(shutil.which("git"), "git CLI not available")
+class TestCommitCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo = Path(self.tmp.name) / "repo"
+        self.repo.mkdir()
+        self.git("init", "-q")
+        sensor.config.git_repos = [{"path": str(self.repo), "name": "repo"}]
+        sensor.config.git_base_folders = []
+        sensor.config.git_author = None
+        self.patches = [
+            patch.object(sensor, "GIT_COMMIT_CACHE_PATH", Path(self.tmp.name) / "git_commit_cache.json"),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.tmp.cleanup()
+
+    def git(self, *args):
+        env = dict(os.environ, GIT_AUTHOR_NAME="tester", GIT_AUTHOR_EMAIL="t@example.com",
+                   GIT_COMMITTER_NAME="tester", GIT_COMMITTER_EMAIL="t@example.com")
+        subprocess.run(["git", *args], cwd=self.repo, check=True, capture_output=True, env=env)
+
+    def commit(self, filename, lines, subject):
+        (self.repo / filename).write_text("".join(f"{i}\n" for i in range(lines)), encoding="utf-8")
+        self.git("add", filename)
+        self.git("commit", "-q", "-m", subject)
+
+    def test_numstat_and_pipe_in_subject(self):
+        self.commit("a.py", 3, "feat: a | b")
+        activity, diagnostics = sensor.get_git_activity(hours=24)
+
+        self.assertEqual(diagnostics, [])
+        commit = activity[0]["commits"][0]
+        self.assertEqual(commit["message"], "feat: a | b")
+        self.assertEqual(commit["author"], "tester")
+        self.assertEqual((commit["files_changed"], commit["insertions"], commit["deletions"]), (1, 3, 0))
+
+    def test_second_run_only_lists_new_commits(self):
+        self.commit("a.py", 3, "first")
+        sensor.get_git_activity(hours=24)
+
+        self.commit("b.py", 2, "second")
+        with patch("subprocess.run", wraps=subprocess.run) as mock_run:
+            activity, _ = sensor.get_git_activity(hours=24)
+
+        # The cached commit was excluded from the single numstat pass...
+        self.assertEqual([c[0][0][1] for c in mock_run.call_args_list], ["rev-list", "log"])
+        self.assertIn("--stdin", mock_run.call_args[0][0])
+        self.assertEqual(mock_run.call_args.kwargs["input"].count("^"), 1)
+        # ...but is still reported from the cache
+        self.assertEqual([c["message"] for c in activity[0]["commits"]], ["second", "first"])
+
+    def test_dry_run_does_not_save_the_cache(self):
+        self.commit("a.py", 3, "first")
+        activity, _ = sensor.get_git_activity(hours=24, dry_run=True)
+        self.assertEqual([c["message"] for c in activity[0]["commits"]], ["first"])
+        self.assertFalse(sensor.GIT_COMMIT_CACHE_PATH.exists())
+
+    def test_amended_commit_is_evicted(self):
+        self.commit("a.py", 1, "first")
+        sensor.get_git_activity(hours=24)
+
+        (self.repo / "a.py").write_text("changed\n", encoding="utf-8")
+        self.git("commit", "-q", "-a", "--amend", "-m", "first amended")
+        activity, diagnostics = sensor.get_git_activity(hours=24)
+        self.assertEqual(diagnostics, [])
+        self.assertEqual([c["message"] for c in activity[0]["commits"]], ["first amended"])
+        cached = sensor.read_json_file(sensor.GIT_COMMIT_CACHE_PATH)[str(self.repo)]["commits"]
+        self.assertEqual([c["message"] for c in cached.values()], ["first amended"])
+
+    def test_rebased_commits_are_evicted(self):
+        self.commit("a.py", 1, "base")
+        self.git("checkout", "-q", "-b", "topic")
+        self.commit("b.py", 1, "topic work")
+        self.git("checkout", "-q", "-")
+        self.commit("c.py", 1, "main work")
+        sensor.get_git_activity(hours=24)
+
+        self.git("checkout", "-q", "topic")
+        self.git("rebase", "-q", "-")
+        activity, _ = sensor.get_git_activity(hours=24)
+        # The pre-rebase "topic work" is gone; its replacement is reported once
+        self.assertEqual(sorted(c["message"] for c in activity[0]["commits"]),
+                         ["base", "main work", "topic work"])
+
+    def test_unknown_cached_hash_falls_back_to_full_log(self):
+        self.commit("a.py", 1, "first")
+        sensor.write_json_atomic(sensor.GIT_COMMIT_CACHE_PATH, {str(self.repo): {
+            "author": None, "since": "2000-01-01 00:00:00",
+            "commits": {"0" * 40: {"message": "gone", "timestamp": "2000-01-01 00:00:00 +0900",
+                                   "committed": "2000-01-01 00:00:00 +0900", "author": "x",
+                                   "files_changed": 0, "insertions": 0, "deletions": 0}}
+        }})
+        activity, diagnostics = sensor.get_git_activity(hours=24)
+        self.assertEqual(diagnostics, [])
+        self.assertEqual([c["message"] for c in activity[0]["commits"]], ["first"])
+
 if __name__ == "__main__":
     unittest.main()
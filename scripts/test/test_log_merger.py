@@ -0,0 +1,145 @@
+import sys
+import tempfile
+import subprocess
+import unittest
+from pathlib import Path
+
+# Add modules directory to path
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR / "modules"))
+
+try:
+    import log_merger
+    import sensor_log
+    from sensor_log import SensorLogReader, SensorLogWriter
+except ImportError as e:
+    print(f"Could not import log_merger: {e}")
+    sys.exit(1)
+
+def session(start, end, app, title, duration=None):
+    """start/end: HH:MM on 2026-02-23 (UTC)."""
+    s = {"start_time": f"2026-02-23T{start}:00+00:00", "end_time": f"2026-02-23T{end}:00+00:00",
+         "app": app, "titles": [title], "urls": [], "event_count": 2}
+    h0, m0 = map(int, start.split(":"))
+    h1, m1 = map(int, end.split(":"))
+    s["duration"] = duration if duration is not None else float((h1 * 60 + m1 - h0 * 60 - m0) * 60)
+    s["title_seconds"] = [s["duration"]]
+    return s
+
+def commit(h, ts="2026-02-23 10:00:00 +0900"):
+    return {"hash": h, "message": f"commit {h}", "timestamp": ts}
+
+class TestMergeSessions(unittest.TestCase):
+    def sources(self, *lists):
+        loaded = []
+        for machine, sessions in lists:
+            for s in sessions:
+                s["_start"] = log_merger.to_epoch_us(s["start_time"])
+                s["_end"] = log_merger.to_epoch_us(s["end_time"])
+                s["machine"] = machine
+            loaded.append(sessions)
+        return loaded
+
+    def test_later_focus_cuts_and_resumes_the_other_machine(self):
+        merged = list(log_merger.merge_sessions(self.sources(
+            ("desk", [session("10:00", "11:00", "Code.exe", "main.py"),
+                      session("11:00", "11:10", "Slack.exe", "dev")]),
+            ("laptop", [session("10:20", "10:30", "chrome.exe", "Docs")]),
+        )))
+        self.assertEqual([(s["machine"], s["app"], s["start_time"][11:16], s["end_time"][11:16]) for s in merged], [
+            ("desk", "Code.exe", "10:00", "10:20"),
+            ("laptop", "chrome.exe", "10:20", "10:30"),
+            ("desk", "Code.exe", "10:30", "11:00"),
+            ("desk", "Slack.exe", "11:00", "11:10"),
+        ])
+        self.assertEqual(merged[0]["duration"], 1200)
+        self.assertEqual(merged[2]["title_seconds"], [1800])
+        # Events are counted once, on the first piece
+        self.assertEqual([s["event_count"] for s in merged], [2, 2, 0, 2])
+        self.assertFalse(any(k.startswith("_") for s in merged for k in s))
+
+    def test_slivers_of_cut_sessions_are_dropped(self):
+        sources = self.sources(
+            ("desk", [session("10:00", "10:30", "Code.exe", "main.py")]),
+            ("laptop", [session("10:00", "10:30", "chrome.exe", "Docs")]),
+        )
+        merged = list(log_merger.merge_sessions(sources))
+        self.assertEqual([s["machine"] for s in merged], ["laptop"])
+
+    def test_git_is_deduplicated_by_hash(self):
+        merged = log_merger.merge_git([
+            [{"repo": "proj", "commits": [commit("aaa1111"), commit("bbb2222", "2026-02-23 11:00:00 +0900")]}],
+            [{"repo": "proj-laptop", "commits": [commit("aaa1111")]},
+             {"repo": "proj", "commits": [commit("ccc3333", "2026-02-23 12:00:00 +0900")]}],
+        ])
+        self.assertEqual([(r["repo"], [c["hash"] for c in r["commits"]]) for r in merged],
+                         [("proj", ["ccc3333", "bbb2222", "aaa1111"])])
+
+class TestMergePending(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, stamp, machine, sessions, git=(), diagnostics=()):
+        date = f"{stamp[:4]}-{stamp[4:6]}-{stamp[6:8]}T{stamp[9:11]}:{stamp[11:13]}:{stamp[13:15]}+09:00"
+        header = {"machine": machine} if machine else {}
+        path = self.dir / sensor_log.log_filename(stamp, machine)
+        with SensorLogWriter(path, date, header) as writer:
+            writer.write_sessions(sessions)
+            for repo in git:
+                writer.write_git(repo)
+            writer.write_status({"browser": "ok", "window": "ok", "git": "ok", "diagnostics": list(diagnostics)})
+        return path
+
+    def test_day_from_two_machines_becomes_one_log(self):
+        early = self.write("20260223_180000", "desk", [session("01:00", "02:00", "Code.exe", "old")])
+        desk = self.write("20260223_235900", "desk", [session("01:00", "03:00", "Code.exe", "main.py")],
+                          git=[{"repo": "proj", "commits": [commit("aaa1111")]}])
+        laptop = self.write("20260223_230000", "laptop", [session("00:30", "01:30", "chrome.exe", "Docs")],
+                            git=[{"repo": "proj", "commits": [commit("aaa1111")]}], diagnostics=["AW down"])
+        other_day = self.write("20260222_235900", "desk", [session("01:00", "02:00", "Code.exe", "x")])
+        legacy = self.write("20260223_120000", None, [session("05:00", "06:00", "Code.exe", "y")])
+
+        pending = log_merger.merge_pending(self.dir, max_workers=2)
+        merged_path = self.dir / "sensor_log_20260223_235900_merged.ndjson.gz"
+        self.assertEqual(pending, [other_day, legacy, merged_path])
+        for path in (early, desk, laptop):
+            self.assertFalse(path.exists())
+            self.assertTrue(path.with_name(path.name + ".merged").exists())
+
+        reader = SensorLogReader(merged_path)
+        self.assertEqual(reader.date, "2026-02-23T23:59:00+09:00")
+        self.assertEqual(reader.header["machines"], ["desk", "laptop"])
+        sessions = list(reader.sessions())
+        self.assertEqual([(s["machine"], s["titles"][0]) for s in sessions],
+                         [("laptop", "Docs"), ("desk", "main.py")])
+        # The desk took the focus at 01:00
+        self.assertEqual(sessions[0]["end_time"], "2026-02-23T01:00:00+00:00")
+        self.assertEqual(sessions[1]["start_time"], "2026-02-23T01:00:00+00:00")
+        self.assertEqual(reader.git_activity, [{"repo": "proj", "commits": [commit("aaa1111")]}])
+        self.assertEqual(reader.status["window"], "ok")
+        self.assertEqual(reader.status["diagnostics"], ["[laptop] AW down"])
+        self.assertEqual(sorted(reader.status["sources"]), ["desk", "laptop"])
+
+        # The merged log itself is never merged again
+        self.assertEqual(log_merger.merge_pending(self.dir), [other_day, legacy, merged_path])
+
+    def test_single_machine_logs_are_left_alone(self):
+        paths = [self.write("20260223_120000", "desk", [session("01:00", "02:00", "Code.exe", "a")]),
+                 self.write("20260223_235900", "desk", [session("01:00", "02:00", "Code.exe", "a")])]
+        self.assertEqual(log_merger.merge_pending(self.dir), paths)
+        self.assertTrue(all(p.exists() for p in paths))
+
+class TestImports(unittest.TestCase):
+    def test_merger_does_not_need_numpy(self):
+        # The cognizer image imports log_merger at startup and may lack NumPy
+        code = (f"import sys; sys.path.insert(0, {str(BASE_DIR / 'modules')!r}); "
+                "import log_merger; print('numpy' in sys.modules)")
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), "False")
+
+if __name__ == "__main__":
+    unittest.main()
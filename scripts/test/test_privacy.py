@@ -0,0 +1,52 @@
+import sys
+import unittest
+from pathlib import Path
+
+# Add modules directory to path
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR / "modules"))
+
+try:
+    import sensor
+except ImportError as e:
+    print(f"Could not import sensor: {e}")
+    sys.exit(1)
+
+class TestPrivacyFilter(unittest.TestCase):
+    def setUp(self):
+        self.privacy = sensor.PrivacyFilter(
+            sensitive_keywords=["Project X", "secret", "secret-plan", ""],
+            blocked_domains=[r"bank\.example\.com", r"mail\.google\.com"]
+        )
+
+    def test_keywords_and_email_are_redacted(self):
+        self.assertEqual(self.privacy.sanitize("Project X notes for bob@example.com"),
+                         "[REDACTED] notes for [EMAIL_REDACTED]")
+        # Longest keyword wins, and replacements are never re-matched
+        self.assertEqual(self.privacy.sanitize("the secret-plan"), "the [REDACTED]")
+        self.assertEqual(self.privacy.sanitize(""), "")
+        self.assertEqual(self.privacy.sanitize(None), "")
+
+    def test_blocked_domains(self):
+        self.assertTrue(self.privacy.is_blocked("https://bank.example.com/login"))
+        self.assertTrue(self.privacy.is_blocked("https://mail.google.com/mail/u/0"))
+        self.assertFalse(self.privacy.is_blocked("https://example.com/"))
+        self.assertFalse(self.privacy.is_blocked(""))
+
+    def test_window_titles_only_sanitized_when_sensitive(self):
+        self.assertEqual(self.privacy.filter_title("Inbox - bob@example.com"), "Inbox - bob@example.com")
+        self.assertEqual(self.privacy.filter_title("secret - bob@example.com"), "[REDACTED] - [EMAIL_REDACTED]")
+
+    def test_uncombinable_patterns_fall_back_per_pattern(self):
+        privacy = sensor.PrivacyFilter([], ["(?i)BANK", "mail\\.example", "(unclosed"])
+        self.assertTrue(privacy.is_blocked("https://bank.example.com"))
+        self.assertTrue(privacy.is_blocked("https://mail.example"))
+        self.assertFalse(privacy.is_blocked("https://example.com"))
+
+    def test_repeated_values_hit_the_cache(self):
+        for _ in range(100):
+            self.privacy.sanitize("secret meeting")
+        self.assertEqual(self.privacy.sanitize.cache_info().misses, 1)
+
+if __name__ == "__main__":
+    unittest.main()
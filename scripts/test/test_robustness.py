@@ -1,5 +1,6 @@
 import sys
 import json
+import tempfile
 import unittest
 from unittest.mock import MagicMock, patch
 from pathlib import Path
@@ -17,11 +18,15 @@ import cognizer
 
 class TestFallbacks(unittest.TestCase):
     def setUp(self):
-        self.test_journals = BASE_DIR / "data" / "journals_test_fallback"
-        self.test_journals.mkdir(parents=True, exist_ok=True)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.test_journals = Path(self.tmp.name) / "journals"
+        self.test_journals.mkdir()
         cognizer.JOURNALS_DIR = self.test_journals
         
-        self.test_log = BASE_DIR / "data" / "logs" / "test_fallback.json"
+        self.test_log = Path(self.tmp.name) / "test_fallback.json"
+
+    def tearDown(self):
+        self.tmp.cleanup()
 
     def test_skeleton_journal_on_llm_failure(self):
         # 1. Setup sensor log with some errors
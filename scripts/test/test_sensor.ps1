@@ -27,7 +27,7 @@ try {
         Write-Host "`n[SUCCESS] Sensor completed successfully!" -ForegroundColor Green
         
         # Show the latest log file
-        $LatestLog = Get-ChildItem "$ScriptDir\data\logs\sensor_log_*.json" | Sort-Object LastWriteTime -Descending | Select-Object -First 1
+        $LatestLog = Get-ChildItem "$ScriptDir\data\logs\sensor_log_*" -Include *.ndjson.gz, *.json | Sort-Object LastWriteTime -Descending | Select-Object -First 1
         if ($LatestLog) {
             Write-Host "`nLatest log file: $($LatestLog.Name)" -ForegroundColor Cyan
             Write-Host "Size: $([math]::Round($LatestLog.Length / 1KB, 2)) KB" -ForegroundColor Cyan
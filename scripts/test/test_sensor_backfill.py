@@ -0,0 +1,163 @@
+import sys
+import sqlite3
+import datetime
+import tempfile
+import unittest
+from unittest.mock import patch
+from pathlib import Path
+
+# Add modules directory to path
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR / "modules"))
+
+try:
+    import sensor
+    from sensor_log import SensorLogReader, find_logs
+    from event_archive import EventArchive
+except ImportError as e:
+    print(f"Could not import sensor: {e}")
+    sys.exit(1)
+
+JST = sensor.JST
+DAYS = [datetime.date(2026, 3, 1), datetime.date(2026, 3, 2), datetime.date(2026, 3, 3)]
+
+def at(day, hour, minute=0):
+    return datetime.datetime.combine(day, datetime.time(hour, minute), tzinfo=JST)
+
+class StubActivityWatch:
+    """Serves window events overlapping the requested range, like aw-server."""
+    def __init__(self, events):
+        self.events = events
+        self.calls = []
+
+    def find_bucket(self, name):
+        return "aw-watcher-window_test" if "window" in name else None
+
+    def get_events(self, bucket, start, end):
+        self.calls.append((start, end))
+        return [e for e in self.events
+                if sensor.parse_timestamp(e["timestamp"]) < end
+                and sensor.parse_timestamp(e["timestamp"]) + datetime.timedelta(seconds=e["duration"]) > start]
+
+def window_event(i, ts, app, title, duration=120.0):
+    return {"id": i, "timestamp": ts.isoformat(), "duration": duration, "data": {"app": app, "title": title}}
+
+def write_chrome_history(path, visits):
+    path.parent.mkdir(parents=True)
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE urls (id INTEGER PRIMARY KEY, url TEXT, title TEXT)")
+    conn.execute("CREATE TABLE visits (id INTEGER PRIMARY KEY, url INTEGER, visit_time INTEGER)")
+    for i, (ts, url, title) in enumerate(visits, start=1):
+        micros = int((ts - sensor.EPOCH_CHROMIUM).total_seconds() * 1_000_000)
+        conn.execute("INSERT INTO urls VALUES (?, ?, ?)", (i, url, title))
+        conn.execute("INSERT INTO visits (url, visit_time) VALUES (?, ?)", (i, micros))
+    conn.commit()
+    conn.close()
+
+class TestBackfill(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.logs = root / "logs"
+        self.archive = root / "archive"
+        home = root / "home"
+        write_chrome_history(home / "AppData/Local/Google/Chrome/User Data/Default/History", [
+            (at(DAYS[0], 9), "https://docs.example/a", "Docs A"),
+            (at(DAYS[1], 9), "https://docs.example/b", "Docs B"),
+            (at(DAYS[2], 9), "https://docs.example/c", "Docs C"),
+        ])
+        events = []
+        for d, day in enumerate(DAYS):
+            events.append(window_event(10 * d + 1, at(day, 9), "chrome.exe", f"Docs {'ABC'[d]} - Google Chrome"))
+            events.append(window_event(10 * d + 2, at(day, 10), "Code.exe", "main.py"))
+        # Still open at midnight: belongs to the day it started on
+        events.append(window_event(99, at(DAYS[0], 23, 58), "Code.exe", "late.py", duration=600.0))
+        self.aw = StubActivityWatch(events)
+        git_by_day = {DAYS[1]: [{"repo": "demo", "commits": [{"hash": "abc1234", "message": "fix"}]}]}
+
+        self.patches = [
+            patch.object(sensor, "DATA_DIR", root),
+            patch.object(sensor, "LOGS_DIR", self.logs),
+            patch.object(sensor, "ARCHIVE_DIR", self.archive),
+            patch.object(sensor, "SENSOR_LOCK_PATH", root / "sensor.lock"),
+            patch.object(sensor, "ActivityWatchClient", return_value=self.aw),
+            patch.object(sensor, "get_git_activity_by_day", return_value=(git_by_day, [])),
+            patch("pathlib.Path.home", return_value=home),
+            patch.object(sensor.config, "machine_id", "desk"),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.tmp.cleanup()
+
+    def read_logs(self):
+        logs = {}
+        for path in find_logs(self.logs):
+            reader = SensorLogReader(path)
+            sessions = list(reader.sessions())
+            logs[path.name] = (reader.date, sessions, reader.git_activity, reader.status)
+        return logs
+
+    def test_one_dated_log_per_day(self):
+        sensor.run_backfill(DAYS[0], DAYS[-1])
+        logs = self.read_logs()
+        self.assertEqual(sorted(logs), [f"sensor_log_2026030{d}_235959_desk.ndjson.gz" for d in (1, 2, 3)])
+
+        date, sessions, git, status = logs["sensor_log_20260302_235959_desk.ndjson.gz"]
+        self.assertEqual(date, "2026-03-02T23:59:59+09:00")
+        self.assertEqual(status["backfill"], {"since": "2026-03-01", "until": "2026-03-03"})
+        self.assertEqual(status["window"], "ok")
+        self.assertEqual([s["titles"][0] for s in sessions], ["Docs B - Google Chrome", "main.py"])
+        # Matched with that day's visit
+        self.assertEqual(sessions[0]["urls"], ["https://docs.example/b"])
+        self.assertEqual(git[0]["repo"], "demo")
+        self.assertEqual(logs["sensor_log_20260301_235959_desk.ndjson.gz"][2], [])
+        # The event crossing midnight stays on its own day
+        day1 = [t for s in logs["sensor_log_20260301_235959_desk.ndjson.gz"][1] for t in s["titles"]]
+        self.assertIn("late.py", day1)
+        self.assertNotIn("late.py", [t for s in sessions for t in s["titles"]])
+
+        archive = EventArchive(self.archive)
+        self.assertEqual(archive.days(), DAYS)
+        self.assertEqual([h["title"] for h in archive.load_day(DAYS[1]).history_items()], ["Docs B"])
+
+    def test_rerun_overwrites_instead_of_duplicating(self):
+        sensor.run_backfill(DAYS[0], DAYS[1])
+        # A partial day left behind by an interrupted run
+        partial = self.logs / "sensor_log_20260302_235959_desk.ndjson.gz.partial"
+        partial.write_bytes(b"")
+        sensor.run_backfill(DAYS[0], DAYS[1])
+        logs = self.read_logs()
+        self.assertEqual(len(logs), 2)
+        self.assertFalse(partial.exists())
+        self.assertEqual(len(logs["sensor_log_20260301_235959_desk.ndjson.gz"][1]), 3)
+        self.assertEqual(len(EventArchive(self.archive).load_day(DAYS[0]).window_events()), 3)
+
+    def test_backfill_day_filters_history_by_instant(self):
+        client = StubActivityWatch([window_event(1, at(DAYS[1], 9), "chrome.exe", "Docs B - Google Chrome")])
+        history = [
+            # The day before, but "2026-03-01T23:30:00+09:00" > "2026-03-01T15:00:00+00:00" as strings
+            {"timestamp": at(DAYS[0], 23, 30).isoformat(), "url": "https://docs.example/a", "title": "Docs A",
+             "source": "Chrome"},
+            {"timestamp": at(DAYS[1], 8, 30).astimezone(datetime.timezone.utc).isoformat(),
+             "url": "https://docs.example/b", "title": "Docs B", "source": "Chrome"},
+        ]
+        status = {"browser": "ok", "window": "pending", "git": "ok", "diagnostics": []}
+        count = sensor.backfill_day(client, DAYS[1], history, [], status, at(DAYS[2], 12))
+        self.assertEqual(count, 1)
+        self.assertEqual(len(client.calls), 1)
+        self.assertEqual(self.aw.calls, [])
+        archived = EventArchive(self.archive).load_day(DAYS[1]).history_items()
+        self.assertEqual([h["title"] for h in archived], ["Docs B"])
+
+    def test_dry_run_writes_nothing(self):
+        sensor.run_backfill(DAYS[0], DAYS[-1], dry_run=True)
+        self.assertFalse(self.logs.exists())
+        self.assertFalse(self.archive.exists())
+        self.assertEqual(len(self.aw.calls), 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,207 @@
+import os
+import sys
+import datetime
+import tempfile
+import unittest
+from unittest.mock import patch
+from pathlib import Path
+
+# Add modules directory to path
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR / "modules"))
+
+try:
+    import sensor
+    from sensor_log import SensorLogReader
+except ImportError as e:
+    print(f"Could not import sensor: {e}")
+    sys.exit(1)
+
+class DaemonTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data = Path(self.tmp.name)
+        self.patches = [
+            patch.object(sensor, "SENSOR_LOCK_PATH", self.data / "sensor.lock"),
+            patch.object(sensor, "DAEMON_PID_PATH", self.data / "sensor_daemon.pid"),
+            patch.object(sensor, "DAEMON_STOP_PATH", self.data / "sensor_daemon.stop"),
+            patch.object(sensor, "CACHE_DIR", self.data / "cache"),
+            patch.object(sensor, "LOGS_DIR", self.data / "logs"),
+            patch.object(sensor, "ARCHIVE_DIR", self.data / "archive"),
+            patch.object(sensor.config, "machine_id", "test-pc"),
+            patch.object(sensor, "get_git_activity_by_day", return_value=({}, [])),
+            patch.object(sensor, "sync_browser_history"),
+            patch.object(sensor, "sync_window_activity"),
+            patch.object(sensor, "get_git_activity", return_value=([], [])),
+        ]
+        self.mocks = [p.start() for p in self.patches]
+        self.sync_browser, self.sync_window, self.git = self.mocks[-3:]
+        # Empty caches in the temp dir stand in for what the syncs filled
+        self.window_store = sensor.EventPartitionStore("aw_test")
+        self.browser_store = sensor.EventPartitionStore("browser")
+        self.sync_window.return_value = self.window_store
+        self.sync_browser.return_value = self.browser_store
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.tmp.cleanup()
+
+class TestCollectIncremental(DaemonTestCase):
+    def test_syncs_every_source(self):
+        status = sensor.collect_incremental(hours=24)
+        self.assertEqual((status["browser"], status["window"], status["git"]), ("ok", "ok", "ok"))
+        self.sync_browser.assert_called_once_with(24)
+        self.sync_window.assert_called_once()
+        self.git.assert_called_once_with(24)
+
+    def test_one_failing_source_does_not_stop_the_others(self):
+        self.sync_window.side_effect = ConnectionError("AW down")
+        self.git.return_value = ([], ["Git log timed out in slow after 30s"])
+        status = sensor.collect_incremental()
+        self.assertEqual(status["window"], "failed")
+        self.assertEqual(status["browser"], "ok")
+        self.assertEqual(status["git"], "ok")
+        self.assertEqual(len(status["diagnostics"]), 2)
+        self.assertIn("AW down", status["diagnostics"][0])
+
+    def test_skips_cycle_while_another_run_holds_the_lock(self):
+        with sensor.sensor_lock() as locked:
+            self.assertTrue(locked)
+            status = sensor.collect_incremental()
+        self.sync_browser.assert_not_called()
+        self.sync_window.assert_not_called()
+        self.assertEqual(status["browser"], "pending")
+        # Released again afterwards
+        sensor.collect_incremental()
+        self.sync_browser.assert_called_once()
+
+JST = sensor.JST
+DAY = datetime.date(2024, 5, 1)
+
+def at(hour, minute=0, day=DAY):
+    return datetime.datetime.combine(day, datetime.time(hour, minute), tzinfo=JST)
+
+def window_event(event_id, start, minutes, app, title):
+    return {"id": event_id, "timestamp": start.isoformat(), "duration": minutes * 60.0,
+            "data": {"app": app, "title": title}}
+
+class TestDaemonLog(DaemonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.logs = self.data / "logs"
+        self.status = {"browser": "ok", "window": "ok", "git": "ok", "diagnostics": []}
+        self.window_store.append([
+            window_event(1, at(10, 0), 10, "Code.exe", "sensor.py"),
+            window_event(2, at(10, 10), 10, "WindowsTerminal.exe", "pytest"),
+        ])
+
+    def partial(self):
+        partials = list(self.logs.glob("*.partial"))
+        self.assertEqual(len(partials), 1)
+        return partials[0]
+
+    def sessions(self, path):
+        return [s["app"] for s in SensorLogReader(path).sessions()]
+
+    def test_appends_sessions_once_they_settle(self):
+        log = sensor.DaemonLog(at(10, 30))
+        # The terminal session ended at 10:20, less than the settle time before 10:30
+        self.assertEqual(log.update(self.window_store, self.browser_store, self.status, at(10, 30)), 1)
+        self.assertEqual(self.sessions(self.partial()), ["Code.exe"])
+
+        self.assertEqual(log.update(self.window_store, self.browser_store, self.status, at(10, 40)), 1)
+        self.assertEqual(log.update(self.window_store, self.browser_store, self.status, at(10, 50)), 0)
+        self.assertEqual(self.sessions(self.partial()), ["Code.exe", "WindowsTerminal.exe"])
+
+        log.close(at(11, 0))
+        self.assertEqual(list(self.logs.glob("*.partial")), [])
+        reader = SensorLogReader(log.writer.path)
+        self.assertEqual([s["app"] for s in reader.sessions()], ["Code.exe", "WindowsTerminal.exe"])
+        self.assertEqual(reader.date, "2024-05-01T23:59:59+09:00")
+        self.assertEqual(reader.status["daemon"], {"cycles": 3})
+        # The day's raw events are archived for --replay
+        self.assertTrue(sensor.EventArchive(self.data / "archive").has_day(DAY))
+
+    def test_close_writes_unsettled_sessions_and_git(self):
+        commits = [{"repo": "repo", "commits": [{"hash": "abc1234", "message": "Fix"}]}]
+        log = sensor.DaemonLog(at(10, 30))
+        log.update(self.window_store, self.browser_store, self.status, at(10, 30))
+        with patch.object(sensor, "get_git_activity_by_day", return_value=({DAY: commits}, [])):
+            log.close(at(10, 30))
+        reader = SensorLogReader(log.writer.path)
+        self.assertEqual([s["app"] for s in reader.sessions()], ["Code.exe", "WindowsTerminal.exe"])
+        self.assertEqual(reader.git_activity, commits)
+
+    def test_restart_resumes_a_killed_daemons_log(self):
+        log = sensor.DaemonLog(at(10, 30))
+        log.update(self.window_store, self.browser_store, self.status, at(10, 30))
+        # Killed after the cycle: the .partial ends without a gzip trailer
+        partial = self.partial()
+        flushed = partial.read_bytes()
+        log.writer._f.close()
+        partial.write_bytes(flushed)
+
+        restarted = sensor.DaemonLog(at(10, 45))
+        self.assertEqual(self.partial(), partial)
+        self.assertEqual(restarted.written_until, at(10, 10))
+        restarted.update(self.window_store, self.browser_store, self.status, at(10, 45))
+        restarted.close(at(10, 45))
+        self.assertEqual(self.sessions(restarted.writer.path), ["Code.exe", "WindowsTerminal.exe"])
+
+    def test_publishes_the_day_at_midnight(self):
+        self.window_store.append([window_event(3, at(23, 50), 5, "Code.exe", "daemon")])
+        log = sensor.DaemonLog(at(23, 0))
+        log.update(self.window_store, self.browser_store, self.status, at(0, 5, DAY + datetime.timedelta(days=1)))
+        published = [p for p in self.logs.iterdir() if not p.name.endswith(".partial")]
+        self.assertEqual(len(published), 1)
+        self.assertEqual(self.sessions(published[0]), ["Code.exe", "WindowsTerminal.exe", "Code.exe"])
+        # The next day's log is open
+        self.assertEqual(log.day, DAY + datetime.timedelta(days=1))
+        self.assertIn("20240502_", self.partial().name)
+
+class TestRunDaemon(DaemonTestCase):
+    def test_sleeps_for_the_rest_of_the_interval(self):
+        with patch.object(sensor, "wait_for_stop", return_value=False) as mock_wait:
+            sensor.run_daemon(interval_minutes=5, max_cycles=3)
+        self.assertEqual(self.sync_browser.call_count, 3)
+        # No wait after the last cycle
+        self.assertEqual(mock_wait.call_count, 2)
+        for call in mock_wait.call_args_list:
+            self.assertLessEqual(call.args[0], 300)
+            self.assertGreater(call.args[0], 290)
+
+    def test_keyboard_interrupt_stops_cleanly(self):
+        with patch.object(sensor, "wait_for_stop", side_effect=KeyboardInterrupt):
+            sensor.run_daemon(interval_minutes=1)
+        self.assertEqual(self.sync_browser.call_count, 1)
+        self.assertEqual(len(list((self.data / "logs").glob("sensor_log_*.ndjson.gz"))), 1)
+
+    def test_stop_file_publishes_the_log_and_exits(self):
+        pids = []
+        def sync_browser(hours):
+            pids.append(sensor.DAEMON_PID_PATH.read_text())
+            if len(pids) == 2:
+                # What run_nightly_batch.ps1 does to stop the daemon
+                sensor.DAEMON_STOP_PATH.touch()
+            return self.browser_store
+        self.sync_browser.side_effect = sync_browser
+        # A stop request left over from an earlier run is ignored
+        sensor.DAEMON_STOP_PATH.touch()
+
+        sensor.run_daemon(interval_minutes=0)
+        self.assertEqual(pids, [str(os.getpid())] * 2)
+        self.assertFalse(sensor.DAEMON_PID_PATH.exists())
+        self.assertFalse(sensor.DAEMON_STOP_PATH.exists())
+        logs = list((self.data / "logs").iterdir())
+        self.assertEqual(len(logs), 1)
+        self.assertTrue(logs[0].name.endswith(".ndjson.gz"))
+
+class TestWaitForStop(DaemonTestCase):
+    def test_returns_when_stop_is_requested(self):
+        self.assertFalse(sensor.wait_for_stop(0.05, poll=0.01))
+        sensor.DAEMON_STOP_PATH.touch()
+        self.assertTrue(sensor.wait_for_stop(60))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import sys
+import gzip
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add modules directory to path
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR / "modules"))
+
+try:
+    import sensor_log
+    from sensor_log import SensorLogReader, SensorLogWriter
+except ImportError as e:
+    print(f"Could not import sensor_log: {e}")
+    sys.exit(1)
+
+SESSIONS = [
+    {"start_time": "2026-02-23T01:00:00+00:00", "end_time": "2026-02-23T01:30:00+00:00",
+     "app": "Code.exe", "titles": ["main.py"], "urls": [], "duration": 1800, "event_count": 3},
+    {"start_time": "2026-02-23T01:30:00+00:00", "end_time": "2026-02-23T01:40:00+00:00",
+     "app": "chrome.exe", "titles": ["Docs"], "urls": ["https://a/"], "duration": 600, "event_count": 1},
+]
+GIT = [{"repo": "proj", "commits": [{"hash": "abc1234", "message": "feat: x", "timestamp": "2026-02-23 10:00:00 +0900"}]}]
+STATUS = {"browser": "ok", "window": "ok", "git": "ok", "diagnostics": ["slow repo"]}
+
+class TestSensorLog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_v2(self):
+        path = self.dir / sensor_log.log_filename("20260223_235959")
+        with SensorLogWriter(path, "2026-02-23T23:59:59+09:00") as writer:
+            # Not visible to readers until closed
+            self.assertEqual(sensor_log.find_logs(self.dir), [])
+            writer.write_sessions(SESSIONS)
+            for repo in GIT:
+                writer.write_git(repo)
+            writer.write_status(STATUS)
+        return path
+
+    def test_round_trip(self):
+        path = self.write_v2()
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(2), sensor_log.GZIP_MAGIC)
+
+        reader = SensorLogReader(path)
+        self.assertEqual(reader.version, 2)
+        self.assertEqual(reader.date, "2026-02-23T23:59:59+09:00")
+        self.assertEqual(list(reader.sessions()), SESSIONS)
+        self.assertEqual(reader.git_activity, GIT)
+        self.assertEqual(reader.status, STATUS)
+
+    def test_legacy_json_is_detected(self):
+        path = self.dir / "sensor_log_20260222_235959.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"date": "2026-02-22T23:59:59+09:00", "status": STATUS,
+                       "timeline": SESSIONS, "git_activity": GIT}, f, indent=2)
+
+        reader = SensorLogReader(path)
+        self.assertEqual(reader.version, 1)
+        self.assertEqual(reader.load()["timeline"], SESSIONS)
+        self.assertEqual(reader.git_activity, GIT)
+        self.assertEqual(reader.status, STATUS)
+
+    def test_truncated_log_keeps_complete_records(self):
+        path = self.write_v2()
+        raw = gzip.decompress(path.read_bytes())
+        cut = raw[:raw.index(b'"type": "git"') - 20]
+        path.write_bytes(gzip.compress(cut)[:-8])
+
+        reader = SensorLogReader(path)
+        self.assertEqual(list(reader.sessions()), SESSIONS)
+        self.assertEqual(reader.status, {})
+
+    def test_find_logs_both_formats(self):
+        self.write_v2()
+        (self.dir / "sensor_log_20260222_235959.json").write_text("{}", encoding="utf-8")
+        (self.dir / "sensor_log_20260221_235959.json.processed").write_text("{}", encoding="utf-8")
+        names = [p.name for p in sensor_log.find_logs(self.dir)]
+        self.assertEqual(names, ["sensor_log_20260222_235959.json", "sensor_log_20260223_235959.ndjson.gz"])
+
+if __name__ == "__main__":
+    unittest.main()
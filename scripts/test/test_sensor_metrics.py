@@ -0,0 +1,97 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add modules directory to path
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR / "modules"))
+
+try:
+    import sensor
+    import sensor_metrics
+    from sensor_metrics import Counters, StageRecorder
+except ImportError as e:
+    print(f"Could not import sensor_metrics: {e}")
+    sys.exit(1)
+
+def run(date, **seconds):
+    return {"date": date, "stages": {name: {"seconds": s, "items_out": 10} for name, s in seconds.items()}}
+
+class TestStageRecorder(unittest.TestCase):
+    def test_counters_are_attributed_to_the_running_stage(self):
+        counters = Counters()
+        recorder = StageRecorder(counters)
+        counters.add("bytes_read", 999)  # before any stage
+        with recorder.stage("aw_fetch") as stage:
+            counters.add("items_read", 40)
+            counters.add("bytes_read", 2048)
+            counters.add("requests", 3)
+            counters.add("retries")
+            stage["items_out"] = 35
+        with recorder.stage("fuse", items_in=35):
+            pass
+
+        stages = recorder.to_dict()
+        self.assertEqual(stages["aw_fetch"]["items_in"], 40)
+        self.assertEqual(stages["aw_fetch"]["items_out"], 35)
+        self.assertEqual(stages["aw_fetch"]["bytes_read"], 2048)
+        self.assertEqual(stages["aw_fetch"]["requests"], 3)
+        self.assertEqual(stages["aw_fetch"]["retries"], 1)
+        self.assertEqual(stages["fuse"]["items_in"], 35)
+        self.assertEqual(stages["fuse"]["bytes_read"], 0)
+        self.assertGreaterEqual(stages["fuse"]["seconds"], 0)
+
+    def test_failed_stage_is_marked(self):
+        recorder = StageRecorder(Counters())
+        with self.assertRaises(ValueError):
+            with recorder.stage("git"):
+                raise ValueError("boom")
+        self.assertEqual(recorder.stages["git"]["status"], "failed")
+
+    def test_build_timeline_records_its_stages(self):
+        recorder = StageRecorder(Counters())
+        events = [
+            {"timestamp": "2026-03-02T00:00:00+00:00", "duration": 60.0, "app": "chrome.exe", "title": "Docs - Google Chrome"},
+            {"timestamp": "2026-03-02T00:01:00+00:00", "duration": 60.0, "app": "Code.exe", "title": "main.py"},
+        ]
+        history = [{"timestamp": "2026-03-01T23:59:00+00:00", "url": "https://docs.example/", "title": "Docs"}]
+        sensor.build_timeline(history, events, recorder=recorder)
+        stages = recorder.to_dict()
+        self.assertEqual(list(stages), ["canonicalize", "fuse", "sessionize", "compress"])
+        self.assertEqual(stages["canonicalize"]["items_out"], 1)
+        self.assertEqual(stages["fuse"]["matched"], 1)
+        self.assertEqual(stages["sessionize"]["items_out"], 2)
+
+class TestRegressions(unittest.TestCase):
+    def test_slow_stage_is_flagged(self):
+        history = [run(f"2026-03-0{d}", aw_fetch=2.0, fuse=0.1) for d in range(1, 6)]
+        findings = sensor_metrics.find_regressions({"aw_fetch": {"seconds": 9.0, "items_out": 10},
+                                                    "fuse": {"seconds": 0.5, "items_out": 10}}, history)
+        # fuse is 5x slower but only 0.4s: below min_seconds
+        self.assertEqual(findings, ["aw_fetch: 9.0s (usually 2.0s)"])
+
+    def test_empty_output_is_flagged(self):
+        history = [run(f"2026-03-0{d}", browser=1.0) for d in range(1, 6)]
+        findings = sensor_metrics.find_regressions({"browser": {"seconds": 1.0, "items_out": 0}}, history)
+        self.assertEqual(findings, ["browser: produced nothing (usually 10)"])
+        # A day without commits is normal
+        history = [run(f"2026-03-0{d}", git=1.0) for d in range(1, 6)]
+        self.assertEqual(sensor_metrics.find_regressions({"git": {"seconds": 1.0, "items_out": 0}}, history), [])
+
+    def test_needs_enough_history(self):
+        history = [run("2026-03-01", git=1.0)]
+        self.assertEqual(sensor_metrics.find_regressions({"git": {"seconds": 30.0, "items_out": 0}}, history), [])
+
+    def test_metrics_file_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            logs = Path(tmp)
+            for d in range(1, 4):
+                sensor_metrics.append_metrics(logs, run(f"2026-03-0{d}T23:00:00+09:00", git=1.0))
+            self.assertEqual(len(sensor_metrics.load_metrics(logs)), 3)
+            before = sensor_metrics.load_metrics(logs, before="2026-03-03T23:00:00+09:00")
+            self.assertEqual([r["date"][:10] for r in before], ["2026-03-01", "2026-03-02"])
+            self.assertEqual(len(sensor_metrics.load_metrics(logs, limit=1)), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import sys
+import random
+import unittest
+from pathlib import Path
+
+# Add modules directory to path
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR / "modules"))
+
+try:
+    import sensor
+    import event_columns
+    from event_columns import EventColumns
+    from heavy_hitters import CAPACITY_FACTOR, SpaceSaving
+except ImportError as e:
+    print(f"Could not import heavy_hitters: {e}")
+    sys.exit(1)
+
+class TestSpaceSaving(unittest.TestCase):
+    def test_exact_within_capacity(self):
+        sketch = SpaceSaving(4)
+        for key, weight in [("a", 10), ("b", 5), ("a", 1), ("c", 5)]:
+            sketch.add(key, weight)
+        # Ties keep first-seen order
+        self.assertEqual(sketch.top(2), [("a", 11), ("b", 5)])
+        self.assertEqual(sketch.other(2), 1)
+
+    def test_heavy_items_survive_a_long_tail(self):
+        rng = random.Random(0)
+        sketch = SpaceSaving(8)
+        for i in range(2000):
+            sketch.add(f"tail {rng.randrange(500)}", 1.0)
+            if i % 10 == 0:
+                sketch.add("focus", 30.0)
+        self.assertLessEqual(len(sketch), 8)
+        self.assertEqual(sketch.top(1)[0][0], "focus")
+        self.assertGreater(sketch.other(3), 100)
+
+    def test_update_keeps_what_the_other_sketch_left_out(self):
+        a, b = SpaceSaving(2), SpaceSaving(2)
+        a.add("x", 10)
+        for key in ("y", "z", "w"):
+            b.add(key, 1)
+        a.update(b)
+        self.assertEqual(len(a), 2)
+        self.assertEqual(a.top(1), [("x", 10)])
+        # b evicted one value, and a one more while folding b in
+        self.assertEqual(a.other(2), 2)
+
+class TestSessionSummaries(unittest.TestCase):
+    def events(self, n_titles):
+        """One long browser session: a main page plus many short visits."""
+        events = []
+        for i in range(n_titles):
+            events.append({"timestamp": f"2026-02-23T10:{i // 60:02d}:{i % 60:02d}+00:00", "duration": 1.0,
+                           "app": "chrome.exe", "title": f"page {i}"})
+        events.insert(50, {"timestamp": "2026-02-23T10:00:49.500000+00:00", "duration": 300.0,
+                           "app": "chrome.exe", "title": "design doc"})
+        return events
+
+    def test_session_keeps_top_k_by_dwell(self):
+        sessions = sensor.build_timeline([], self.events(200), top_k=5)
+        self.assertEqual(len(sessions), 1)
+        session = sessions[0]
+        self.assertEqual(session["titles"][0], "design doc")
+        self.assertEqual(session["title_seconds"][0], 300.0)
+        self.assertEqual(len(session["titles"]), 5)
+        self.assertEqual(session["titles_other"], 196)
+        self.assertEqual(session["urls"], [])
+        self.assertEqual(session["urls_other"], 0)
+
+    def test_live_sessions_stay_bounded(self):
+        # Small chunks: the sketch absorbs the tail as the stream passes
+        chunks = event_columns.iter_chunks(EventColumns.from_events(self.events(1000)), 64)
+        sessions = list(event_columns.iter_sessions(chunks, top_k=5))
+        self.assertEqual(len(sessions), 1)
+        self.assertLessEqual(len(sessions[0].titles), 5 * CAPACITY_FACTOR)
+        session = sessions[0].to_dict(5)
+        self.assertEqual(session["titles"][0], "design doc")
+        # Exact up to the sketch capacity, an upper bound past it
+        self.assertGreaterEqual(session["titles_other"], 996)
+
+if __name__ == "__main__":
+    unittest.main()
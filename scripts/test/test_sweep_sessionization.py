@@ -0,0 +1,75 @@
+import sys
+import datetime
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add modules and bench directories to path
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR / "modules"))
+sys.path.append(str(BASE_DIR / "scripts" / "bench"))
+
+try:
+    import sensor
+    import sweep_sessionization as sweep
+    from event_archive import EventArchive
+except ImportError as e:
+    print(f"Could not import sweep_sessionization: {e}")
+    sys.exit(1)
+
+JST = datetime.timezone(datetime.timedelta(hours=9))
+DAY = datetime.date(2026, 3, 2)
+
+def window(hour, minute, app, title, duration=120.0, day=DAY):
+    """A raw AW window event."""
+    ts = datetime.datetime.combine(day, datetime.time(hour, minute), tzinfo=JST)
+    return {"timestamp": ts.isoformat(), "duration": duration, "data": {"app": app, "title": title}}
+
+class TestSweepSessionization(unittest.TestCase):
+    def test_grid_covers_every_combination(self):
+        rows = sweep.grid({"noise_seconds": [15, 30, 60], "max_merge_gap_seconds": [900, 1800]},
+                          sweep.BLOCK_KEYS)
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[0], {"noise_seconds": 15, "max_merge_gap_seconds": 900})
+        self.assertEqual(len({tuple(r.values()) for r in rows}), 6)
+
+    def test_evaluate_one_synthetic_day(self):
+        sweep.init_worker({"replay": None, "synthetic_days": 1})
+        self.assertGreaterEqual(len(sweep._days), 1)
+        block_grid = sweep.grid({"noise_seconds": [15, 60], "max_merge_gap_seconds": [1800]}, sweep.BLOCK_KEYS)
+        sensor_params = {k: sweep.DEFAULTS[k] for k in sweep.SENSOR_KEYS}
+
+        rows = sweep.evaluate(sensor_params, block_grid)
+        self.assertEqual(len(rows), len(block_grid))
+        for row, block_params in zip(rows, block_grid):
+            self.assertEqual({k: row[k] for k in sweep.SENSOR_KEYS}, sensor_params)
+            self.assertEqual({k: row[k] for k in sweep.BLOCK_KEYS}, block_params)
+            self.assertEqual(row["days"], len(sweep._days))
+            self.assertGreater(row["sessions"], 0)
+            self.assertGreater(row["blocks"], 0)
+            self.assertGreater(row["prompt_chars"], 0)
+            self.assertGreaterEqual(row["sensor_seconds"], 0)
+            for share in ("categorized", "in_prompt"):
+                self.assertGreaterEqual(row[share], 0.0)
+                self.assertLessEqual(row[share], 1.0)
+        # Absorbing longer blocks never leaves more of them
+        self.assertLessEqual(rows[1]["blocks"], rows[0]["blocks"])
+        self.assertEqual(rows[0]["sessions"], rows[1]["sessions"])
+
+    def test_archived_days_clean_the_raw_events(self):
+        with tempfile.TemporaryDirectory() as tmp, patch.object(sensor, "ARCHIVE_DIR", Path(tmp)):
+            EventArchive(Path(tmp)).write_day(DAY, [
+                window(9, 0, "Code.exe", "main.py - Visual Studio Code"),
+                window(9, 2, "explorer.exe", "", duration=0.5),
+            ], [])
+            days = sweep.archived_days(["20260302"])
+        self.assertEqual(len(days), 1)
+        label, history, windows = days[0]
+        self.assertEqual(label, "2026-03-02")
+        self.assertEqual(history, [])
+        # The alt-tab blip is cleaned away, as sensor.replay_day does
+        self.assertEqual(len(windows), 1)
+
+if __name__ == "__main__":
+    unittest.main()
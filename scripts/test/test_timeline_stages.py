@@ -0,0 +1,75 @@
+import sys
+import datetime
+import itertools
+import unittest
+from pathlib import Path
+
+# Add modules directory to path
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR / "modules"))
+
+try:
+    import sensor
+    import event_columns
+    from event_columns import EventColumns, StringTable
+except ImportError as e:
+    print(f"Could not import sensor: {e}")
+    sys.exit(1)
+
+START = datetime.datetime(2026, 2, 23, tzinfo=datetime.timezone.utc)
+
+def alternating_events(n):
+    """A long day of Code.exe interrupted every minute by a short Slack check."""
+    for i in range(n):
+        app, duration = ("slack.exe", 10) if i % 2 else ("Code.exe", 50)
+        yield {"timestamp": (START + datetime.timedelta(seconds=30 * i)).isoformat(),
+               "duration": duration, "app": app, "title": f"{app} {i % 7}"}
+
+class TestTimelineStages(unittest.TestCase):
+    def test_alternating_day_collapses_to_one_session(self):
+        sessions = sensor.build_timeline([], list(alternating_events(20_001)))
+        self.assertEqual(len(sessions), 1)
+        self.assertEqual(sessions[0]["event_count"], 20_001)
+        # 14 distinct titles: the top 10 by dwell time are listed, the rest counted
+        self.assertEqual(len(sessions[0]["titles"]), 10)
+        self.assertEqual(sessions[0]["titles_other"], 4)
+        self.assertTrue(all(t.startswith("Code.exe") for t in sessions[0]["titles"][:7]))
+
+    def test_cascading_merge_of_sessionized_list(self):
+        # A-B-A-...-A as separate sessions (B ends before the next A starts)
+        sessions = sensor.sessionize_events(list(alternating_events(2_001)))
+        self.assertEqual(len(sessions), 2_001)
+        compressed = sensor.compress_sessions(sessions)
+        self.assertEqual(len(compressed), 1)
+        self.assertEqual(compressed[0]["event_count"], 2_001)
+        # Input sessions are left untouched
+        self.assertEqual(sessions[1]["app"], "slack.exe")
+
+    def test_chunk_boundaries_do_not_change_sessions(self):
+        events = EventColumns.from_events(list(alternating_events(301)))
+        whole = [s.to_dict() for s in event_columns.iter_sessions(event_columns.iter_chunks(events), 10)]
+        for size in (1, 2, 7):
+            chunked = event_columns.iter_sessions(event_columns.iter_chunks(events, size), 10)
+            self.assertEqual([s.to_dict() for s in chunked], whole)
+
+    def test_stages_consume_an_endless_stream(self):
+        strings = StringTable()
+
+        def endless_chunks():
+            # Hour-long Code.exe blocks separated by long Slack visits, forever
+            for i in itertools.count():
+                yield EventColumns.from_events([
+                    {"timestamp": (START + datetime.timedelta(hours=2 * i)).isoformat(), "duration": 3600.0,
+                     "app": "Code.exe", "title": "main.py"},
+                    {"timestamp": (START + datetime.timedelta(hours=2 * i + 1)).isoformat(), "duration": 600.0,
+                     "app": "slack.exe", "title": "general"},
+                ], strings)
+
+        sessions = event_columns.iter_merged_interruptions(
+            event_columns.iter_without_noise(event_columns.iter_sessions(endless_chunks())))
+        first = [s.to_dict() for s in itertools.islice(sessions, 3)]
+        self.assertEqual([s["app"] for s in first], ["Code.exe", "slack.exe", "Code.exe"])
+        self.assertEqual(first[2]["start_time"], (START + datetime.timedelta(hours=2)).isoformat())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import sys
+import unittest
+from pathlib import Path
+
+# Add modules directory to path
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR / "modules"))
+
+try:
+    import sensor
+    from sensor import UrlCanonicalizer
+except ImportError as e:
+    print(f"Could not import sensor: {e}")
+    sys.exit(1)
+
+def visit(ts, url, title="Docs"):
+    return {"timestamp": f"2026-02-23T{ts}+00:00", "url": url, "title": title, "source": "Chrome"}
+
+class TestCanonicalizeUrl(unittest.TestCase):
+    def setUp(self):
+        self.canon = UrlCanonicalizer(sensor.DEFAULT_STRIP_PARAMS).canonicalize
+
+    def test_tracking_params_and_fragment_are_dropped(self):
+        self.assertEqual(
+            self.canon("https://WWW.Example.com:443//docs/page?utm_source=x&id=7&fbclid=abc&UTM_Medium=y#section"),
+            "https://example.com/docs/page?id=7")
+
+    def test_remaining_query_keeps_order_and_encoding(self):
+        self.assertEqual(self.canon("https://example.com/search?q=a%20b&gclid=1&page=2"),
+                         "https://example.com/search?q=a%20b&page=2")
+
+    def test_session_tokens_and_ports(self):
+        self.assertEqual(self.canon("http://shop.example:80/cart;jsessionid=ABC123?PHPSESSID=z&item=3"),
+                         "http://shop.example/cart?item=3")
+        self.assertEqual(self.canon("http://user:pw@localhost:8080/"), "http://localhost:8080/")
+
+    def test_hash_routes_are_kept(self):
+        self.assertEqual(self.canon("https://app.example/#/inbox/42"), "https://app.example/#/inbox/42")
+
+    def test_other_schemes_are_unchanged(self):
+        for url in ("chrome://settings/", "file:///C:/notes.txt#top", "about:blank", "http://[::1"):
+            self.assertEqual(self.canon(url), url)
+
+    def test_configurable_params(self):
+        canon = UrlCanonicalizer(["ref", "x-*"]).canonicalize
+        self.assertEqual(canon("https://a.example/?ref=hn&x-trace=1&utm_source=y"),
+                         "https://a.example/?utm_source=y")
+
+class TestCollapseVisits(unittest.TestCase):
+    def test_repeated_visits_collapse_with_a_count(self):
+        history = [
+            visit("10:00:00", "https://example.com/a?utm_source=feed"),
+            visit("10:00:02", "https://example.com/a"),          # redirect / reload
+            visit("10:01:00", "https://example.com/b", "Other"),
+            visit("10:03:00", "https://www.example.com/a#top"),
+            visit("10:06:00", "https://example.com/a"),          # outside the window: new visit
+        ]
+        visits = list(sensor.iter_canonical_visits(history, window_seconds=300))
+        self.assertEqual([(v["url"], v["visit_count"]) for v in visits], [
+            ("https://example.com/a", 3),
+            ("https://example.com/b", 1),
+            ("https://example.com/a", 1),
+        ])
+        self.assertEqual(visits[0]["timestamp"], history[0]["timestamp"])
+
+    def test_distinct_titles_of_one_url_are_kept(self):
+        # A single-page app: the URL stays, the page title changes
+        history = [visit("10:00:00", "https://app.example/", "Inbox"),
+                   visit("10:00:30", "https://app.example/", "Draft - Report"),
+                   visit("10:01:00", "https://app.example/", "Inbox")]
+        visits = list(sensor.iter_canonical_visits(history, window_seconds=300))
+        self.assertEqual([(v["title"], v["visit_count"]) for v in visits], [("Inbox", 2), ("Draft - Report", 1)])
+
+        events = [{"timestamp": "2026-02-23T10:00:40+00:00", "duration": 60.0,
+                   "app": "chrome.exe", "title": "Draft - Report - Google Chrome"}]
+        self.assertEqual(sensor.build_timeline(history, events)[0]["urls"], ["https://app.example/"])
+
+    def test_zero_window_only_canonicalizes(self):
+        history = [visit("10:00:00", "https://example.com/a"), visit("10:00:01", "https://example.com/a")]
+        self.assertEqual(len(list(sensor.iter_canonical_visits(history, window_seconds=0))), 2)
+
+    def test_sessions_list_canonical_urls(self):
+        history = [visit("09:59:00", "https://example.com/a?utm_campaign=x"),
+                   visit("09:59:30", "https://example.com/a?fbclid=y")]
+        events = [{"timestamp": "2026-02-23T10:00:00+00:00", "duration": 60.0,
+                   "app": "chrome.exe", "title": "Docs - Google Chrome"}]
+        sessions = sensor.build_timeline(history, events)
+        self.assertEqual(sessions[0]["urls"], ["https://example.com/a"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+import sys
+import datetime
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from pathlib import Path
+
+# Add modules directory to path
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(BASE_DIR / "modules"))
+
+try:
+    import sensor
+except ImportError as e:
+    print(f"Could not import sensor: {e}")
+    sys.exit(1)
+
+BUCKET = "aw-watcher-window_testhost"
+AFK_BUCKET = "aw-watcher-afk_testhost"
+
+def make_event(event_id, minutes_ago, duration, app="Code.exe", title="main.py - proj"):
+    ts = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(minutes=minutes_ago)
+    return {
+        "id": event_id,
+        "timestamp": ts.isoformat(),
+        "duration": duration,
+        "data": {"app": app, "title": title}
+    }
+
+class FakeAW:
+    """Minimal stand-in for the AW REST API used by get_window_activity."""
+    def __init__(self, events):
+        self.events = events
+        self.event_requests = []
+
+    def get(self, url, params=None, **kwargs):
+        response = MagicMock(status_code=200)
+        if url.endswith("/api/0/buckets"):
+            response.json.return_value = {BUCKET: {}, AFK_BUCKET: {}}
+            return response
+
+        self.event_requests.append(params)
+        start = sensor.parse_timestamp(params["start"])
+        end = sensor.parse_timestamp(params["end"])
+        # AW returns newest first, capped at limit
+        matched = [e for e in self.events if start <= sensor.parse_timestamp(e["timestamp"]) < end]
+        matched.sort(key=lambda e: e["timestamp"], reverse=True)
+        response.json.return_value = [dict(e) for e in matched[:params["limit"]]]
+        return response
+
+class TestWindowWatermark(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        tmp_path = Path(self.tmp.name)
+        self.patches = [
+            patch.object(sensor, "CACHE_DIR", tmp_path / "cache"),
+            patch.object(sensor, "STATE_PATH", tmp_path / "sensor_state.json"),
+            patch.object(sensor, "aw_client", sensor.ActivityWatchClient("http://localhost:5600")),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.tmp.cleanup()
+
+    def test_second_run_fetches_from_watermark(self):
+        aw = FakeAW([make_event(1, 120, 60), make_event(2, 60, 30, title="other.py - proj")])
+        with patch("requests.Session.get", side_effect=aw.get):
+            first = sensor.get_window_activity(hours=24)
+        self.assertEqual(len(first), 2)
+
+        state = sensor.load_state()
+        self.assertEqual(state["aw_watermarks"]["aw_" + BUCKET]["id"], 2)
+
+        # The newest event grew via heartbeats and a new one arrived
+        aw.events[1]["duration"] = 90
+        aw.events.append(make_event(3, 10, 20, app="chrome.exe", title="Docs"))
+        first_run_requests = len(aw.event_requests)
+        with patch("requests.Session.get", side_effect=aw.get):
+            second = sensor.get_window_activity(hours=24)
+
+        # Only the range since the watermark was requested
+        first_slice = min(aw.event_requests[first_run_requests:], key=lambda p: p["start"])
+        self.assertEqual(first_slice["start"], state["aw_watermarks"]["aw_" + BUCKET]["timestamp"])
+        # Merge is idempotent: the grown event is replaced, not duplicated
+        self.assertEqual([e["duration"] for e in second], [60, 90, 20])
+
+    def test_dry_run_saves_neither_cache_nor_watermark(self):
+        aw = FakeAW([make_event(1, 120, 60), make_event(2, 60, 30, title="other.py - proj")])
+        with patch("requests.Session.get", side_effect=aw.get):
+            events = sensor.get_raw_window_activity(hours=24, dry_run=True)
+        self.assertEqual([e["id"] for e in events], [1, 2])
+        self.assertFalse(sensor.STATE_PATH.exists())
+        self.assertFalse(sensor.CACHE_DIR.exists())
+
+        # The next real run still fetches the whole window
+        with patch("requests.Session.get", side_effect=aw.get):
+            sensor.get_raw_window_activity(hours=24)
+        self.assertEqual(len(aw.event_requests), 48)
+
+    def test_full_refresh_ignores_watermark(self):
+        aw = FakeAW([make_event(1, 120, 60)])
+        with patch("requests.Session.get", side_effect=aw.get):
+            sensor.get_window_activity(hours=24)
+            sensor.get_window_activity(hours=24, full_refresh=True)
+
+        # Both runs request the full 24h window
+        self.assertEqual(len(aw.event_requests), 48)
+
+    def test_query_mode_pushes_afk_filter_to_server(self):
+        active = [make_event(None, 50, 40), make_event(None, 20, 30, title="other.py - proj")]
+        queries = []
+
+        def fake_post(url, json=None, **kwargs):
+            queries.append(json)
+            response = MagicMock(status_code=200)
+            # The "server" result: only non-AFK window time, one list per period
+            response.json.return_value = [[dict(e) for e in active]] + [[] for _ in json["timeperiods"][1:]]
+            return response
+
+        aw = FakeAW([])
+        with patch("requests.Session.get", side_effect=aw.get), \
+             patch("requests.Session.post", side_effect=fake_post):
+            first = sensor.get_window_activity(hours=24, use_query=True)
+            # Re-running over the same range must not duplicate id-less events
+            active[1]["duration"] = 45
+            second = sensor.get_window_activity(hours=24, use_query=True)
+
+        program = " ".join(queries[0]["query"])
+        self.assertIn(AFK_BUCKET, program)
+        self.assertIn("filter_period_intersect", program)
+        self.assertEqual(len(first), 2)
+        self.assertEqual([e["duration"] for e in second], [40, 45])
+        # Raw event downloads are skipped entirely
+        self.assertEqual(aw.event_requests, [])
+
+class TestSlicedFetch(unittest.TestCase):
+    def test_busy_day_is_not_truncated(self):
+        # 3000 events within one hour, far beyond a single page
+        events = [make_event(i, 60 - i * 0.01, 0.5) for i in range(3000)]
+        aw = FakeAW(events)
+        client = sensor.ActivityWatchClient("http://localhost:5600", slice_minutes=60, max_workers=4)
+
+        end = datetime.datetime.now(datetime.timezone.utc)
+        with patch("requests.Session.get", side_effect=aw.get), \
+             patch.object(sensor.ActivityWatchClient, "PAGE_LIMIT", 500):
+            fetched = client.get_events(BUCKET, end - datetime.timedelta(hours=2), end)
+
+        self.assertEqual(len(fetched), 3000)
+        self.assertEqual([e["id"] for e in fetched], list(range(3000)))
+
+    def test_stitch_joins_cropped_boundary_pieces(self):
+        piece_a = {"id": 7, "timestamp": "2026-02-23T00:59:00+00:00", "duration": 60, "data": {}}
+        piece_b = {"id": 7, "timestamp": "2026-02-23T01:00:00+00:00", "duration": 30, "data": {}}
+        stitched = sensor.ActivityWatchClient._stitch([piece_b, piece_a])
+        self.assertEqual(len(stitched), 1)
+        self.assertEqual(stitched[0]["timestamp"], piece_a["timestamp"])
+        self.assertEqual(stitched[0]["duration"], 90)
+
+    def test_bucket_listing_is_cached(self):
+        aw = FakeAW([])
+        client = sensor.ActivityWatchClient("http://localhost:5600")
+        with patch("requests.Session.get", side_effect=aw.get) as mock_get:
+            client.find_bucket("aw-watcher-window")
+            client.find_bucket("aw-watcher-window")
+        self.assertEqual(mock_get.call_count, 1)
+
+if __name__ == "__main__":
+    unittest.main()